@@ -0,0 +1,78 @@
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.average import (  # type: ignore
+    AverageDamageACResults,
+    AverageDamageDCResults,
+    _average_damage,
+)
+from logic.distribution import _cached_distribution  # type: ignore
+from logic.roll import Advantage
+
+# AC (or modifier) ranges of increasing width
+RANGES = {"single": (15, 15), "narrow": (10, 20), "full": (0, 30)}
+
+
+@pytest.mark.parametrize(
+    ("hit", "damage", "miss_damage"),
+    [
+        ("5", "1d8+3", "0"),
+        ("7+1d4", "2d6+4", "0"),
+        ("9", "4d6kh3+5", "1d4"),
+    ],
+)
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "hot"])
+def test_average_ac_sweep(benchmark: BenchmarkFixture, hit: str, damage: str, miss_damage: str, cached: bool):
+    """Calculates the average damage against the full range of ACs, 0 to 30."""
+
+    def setup():
+        if not cached:
+            _cached_distribution.cache_clear()
+        return (hit, damage, 0, 30, 20, miss_damage, 1), {}
+
+    benchmark.pedantic(AverageDamageACResults, setup=setup, rounds=50, warmup_rounds=2)  # type: ignore
+
+
+@pytest.mark.parametrize(("damage", "miss_damage"), [("8d6", "(8d6)/2"), ("2d10+5", "0")])
+def test_average_dc_sweep(benchmark: BenchmarkFixture, damage: str, miss_damage: str):
+    """Calculates the average damage against the full range of saving throw modifiers."""
+    benchmark.pedantic(AverageDamageDCResults, args=(15, damage, miss_damage, -20, 40), rounds=50, warmup_rounds=2)  # type: ignore
+
+
+@pytest.mark.parametrize("damage", ["1d8+3", "4d6kh3+5", "10d10+2d6", "1d8ro1+1d6"])
+@pytest.mark.parametrize("advantage", Advantage.values())
+@pytest.mark.parametrize("ac_range", RANGES.values(), ids=RANGES.keys())
+def test_average_damage_math(benchmark: BenchmarkFixture, damage: str, advantage: Advantage, ac_range: tuple[int, int]):
+    """Only the math of a single advantage's sweep, without the chart, csv or table."""
+    acs = list(range(ac_range[0], ac_range[1] + 1))
+
+    def setup():
+        _cached_distribution.cache_clear()
+        return ("1d20+7", damage, acs, advantage, 20, "0"), {}
+
+    benchmark.pedantic(_average_damage, setup=setup, rounds=20, warmup_rounds=2)  # type: ignore
+
+
+@pytest.mark.parametrize("mod_range", RANGES.values(), ids=RANGES.keys())
+def test_average_dc_math(benchmark: BenchmarkFixture, mod_range: tuple[int, int]):
+    mods = list(range(mod_range[0], mod_range[1] + 1))
+
+    def setup():
+        _cached_distribution.cache_clear()
+        return ("0", "4d6", [15 - mod for mod in mods], Advantage.NORMAL, 20, "8d6", True), {}
+
+    benchmark.pedantic(_average_damage, setup=setup, rounds=20, warmup_rounds=2)  # type: ignore
+
+
+@pytest.mark.parametrize("ac_range", RANGES.values(), ids=RANGES.keys())
+def test_average_chart(benchmark: BenchmarkFixture, ac_range: tuple[int, int]):
+    """Only the chart rendering, of results which were already calculated."""
+    results = AverageDamageACResults("7", "2d6+4", ac_range[0], ac_range[1], 20, "0", 1)
+    benchmark.pedantic(results.generate_chart, rounds=5)  # type: ignore
+
+
+@pytest.mark.parametrize("attacks", [1, 3, 10])
+def test_round_damage(benchmark: BenchmarkFixture, attacks: int):
+    """Distribution of the damage of a round of attacks, as shown with a target AC or HP."""
+    results = AverageDamageACResults("7", "2d6+4", 10, 20, 20, "1d4", attacks)
+    benchmark.pedantic(results.round_damage, args=(15, Advantage.ADVANTAGE), rounds=100, warmup_rounds=2)  # type: ignore
@@ -0,0 +1,95 @@
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.color import hue_shift_n_colors_from_base
+from logic.distribution import (  # type: ignore
+    DistributionChartStyle,
+    SingleDistributionResult,
+    _cached_distribution,
+    _multi_adjacent_distribution_chart,
+    _multi_overlap_distribution_chart,
+    _single_distribution_chart,
+    dice_distribution,
+    distribution,
+    simulate_distribution,
+    to_matplotlib_color,
+)
+from logic.roll import Advantage
+from logic.versus import versus
+
+COLOR = 0xFF00FF
+
+# Expressions of increasing complexity, from a single die to expressions only d100 can calculate.
+EXPRESSIONS = {
+    "die": "1d20",
+    "sum": "8d6 + 1d4 + 3",
+    "keep": "4d6kh3",
+    "large": "100d6 + 20d10",
+    "reroll": "1d8ro1 + 2d6",
+    "exploding": "2d6e6",
+}
+
+# Comma-separated expressions, for the charts with multiple distributions.
+MULTIPLE_EXPRESSIONS = {count: ",".join(f"{amount}d6" for amount in range(1, count + 1)) for count in (2, 4, 6, 10)}
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS.values(), ids=EXPRESSIONS.keys())
+@pytest.mark.parametrize("advantage", Advantage.values())
+def test_dice_distribution(benchmark: BenchmarkFixture, expression: str, advantage: Advantage):
+    """Calculates a distribution without the in-memory cache, only the math is timed."""
+
+    def setup():
+        _cached_distribution.cache_clear()
+        return (expression, advantage), {}
+
+    benchmark.pedantic(dice_distribution, setup=setup, rounds=20, warmup_rounds=2)  # type: ignore
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS.values(), ids=EXPRESSIONS.keys())
+def test_dice_distribution_hot(benchmark: BenchmarkFixture, expression: str):
+    dice_distribution(expression)
+    benchmark.pedantic(dice_distribution, args=(expression,), rounds=1000, warmup_rounds=24)  # type: ignore
+
+
+@pytest.mark.parametrize("expression", ["4d6kh3", "1d8ro1 + 2d6"], ids=["numpy", "d100"])
+def test_simulate_distribution(benchmark: BenchmarkFixture, expression: str):
+    """Simulates a distribution for a fixed time budget, so this mostly measures the amount of rolls."""
+    result = benchmark.pedantic(simulate_distribution, args=(expression, Advantage.NORMAL, 0.5), rounds=5)  # type: ignore
+    benchmark.extra_info["samples"] = result.samples
+
+
+@pytest.mark.parametrize("expression", ["1d20", "4d6kh3", "100d6 + 20d10"], ids=["die", "keep", "large"])
+def test_single_chart(benchmark: BenchmarkFixture, expression: str):
+    """Renders the chart of a single, already calculated, distribution."""
+    result = SingleDistributionResult(expression, Advantage.NORMAL, None)
+    benchmark.pedantic(_single_distribution_chart, args=(result.distribution, COLOR, 0), rounds=5)  # type: ignore
+
+
+@pytest.mark.parametrize("count", MULTIPLE_EXPRESSIONS.keys())
+@pytest.mark.parametrize("style", DistributionChartStyle.values())
+def test_multi_chart(benchmark: BenchmarkFixture, count: int, style: str):
+    """Renders the chart of multiple, already calculated, distributions."""
+    results = [SingleDistributionResult(expr, Advantage.NORMAL, None) for expr in MULTIPLE_EXPRESSIONS[count].split(",")]
+    colors = hue_shift_n_colors_from_base(to_matplotlib_color(COLOR), count)
+    chart = (
+        _multi_adjacent_distribution_chart if style == DistributionChartStyle.ADJACENT else _multi_overlap_distribution_chart
+    )
+    benchmark.pedantic(chart, args=(results, colors), rounds=5)  # type: ignore
+
+
+@pytest.mark.parametrize("count", [1, *MULTIPLE_EXPRESSIONS.keys()])
+@pytest.mark.parametrize("style", DistributionChartStyle.values())
+def test_distribution(benchmark: BenchmarkFixture, count: int, style: str):
+    """The full /distribution calculation, math and chart rendering combined."""
+    expressions = MULTIPLE_EXPRESSIONS.get(count, "4d6kh3")
+
+    def setup():
+        _cached_distribution.cache_clear()
+        return (expressions, Advantage.NORMAL, COLOR, None, DistributionChartStyle(style)), {}
+
+    benchmark.pedantic(distribution, setup=setup, rounds=5)  # type: ignore
+
+
+@pytest.mark.parametrize(("expression", "opponent"), [("1d20+7", "1d20+4"), ("100d6", "50d12")])
+def test_versus(benchmark: BenchmarkFixture, expression: str, opponent: str):
+    benchmark.pedantic(versus, args=(expression, opponent, Advantage.ADVANTAGE, Advantage.NORMAL, COLOR), rounds=5)  # type: ignore
@@ -1,7 +1,19 @@
+import random
+from test.mocking import MockInteraction
+
 import pytest
 from pytest_benchmark.fixture import BenchmarkFixture
 
-from logic.roll import Advantage, roll
+from logic.grouproll import GroupRollRoll
+from logic.roll import (  # type: ignore
+    Advantage,
+    DiceRNG,
+    _parse_cached,
+    multi_roll,
+    parse,
+    roll,
+)
+from logic.stats import Stats
 
 
 @pytest.mark.parametrize(
@@ -17,3 +29,81 @@ from logic.roll import Advantage, roll
 @pytest.mark.parametrize("advantage", Advantage.values())
 def test_roll(benchmark: BenchmarkFixture, expression: str, advantage: Advantage):
     benchmark.pedantic(roll, args=(expression, advantage), rounds=1000, iterations=5, warmup_rounds=24)  # type: ignore
+
+
+HOT_EXPRESSIONS = ["1d20+5", "2d6+3", "4d6kh3"]
+
+
+@pytest.mark.parametrize("expression", HOT_EXPRESSIONS)
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "hot"])
+def test_roll_parse_cache(benchmark: BenchmarkFixture, expression: str, cached: bool):
+    """Rolls an expression with and without its parsed AST in the cache."""
+
+    def setup():
+        if not cached:
+            _parse_cached.cache_clear()
+        return (expression, Advantage.NORMAL), {}
+
+    roll(expression)  # Warm up the cache for hot rolls
+    benchmark.pedantic(roll, setup=setup, rounds=1000, warmup_rounds=24)  # type: ignore
+
+
+@pytest.mark.parametrize("expression", HOT_EXPRESSIONS)
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "hot"])
+def test_parse_cache(benchmark: BenchmarkFixture, expression: str, cached: bool):
+    """Parsing a cached expression only copies the cached AST."""
+
+    def setup():
+        if not cached:
+            _parse_cached.cache_clear()
+        return (expression, Advantage.ADVANTAGE), {}
+
+    parse(expression, Advantage.ADVANTAGE)
+    benchmark.pedantic(parse, setup=setup, rounds=1000, warmup_rounds=24)  # type: ignore
+
+
+@pytest.mark.parametrize(
+    ("expression"),
+    [
+        ("1d20+5"),  # Fast path
+        ("2d6+3"),  # Fast path
+        ("4d6kh3"),  # Rolled through d100
+    ],
+)
+@pytest.mark.parametrize("advantage", [Advantage.NORMAL, Advantage.ADVANTAGE, Advantage.ELVEN_ACCURACY])
+@pytest.mark.parametrize("amount", [1, 4, 8, 16, 32])
+def test_multi_roll(benchmark: BenchmarkFixture, expression: str, advantage: Advantage, amount: int):
+    benchmark.pedantic(multi_roll, args=(expression, amount, advantage), rounds=200, warmup_rounds=8)  # type: ignore
+
+
+@pytest.mark.parametrize("modifier", ["5", "1d4+2"])
+@pytest.mark.parametrize("batched", [False, True], ids=["individual", "batched"])
+def test_bulk_initiative(benchmark: BenchmarkFixture, modifier: str, batched: bool):
+    """Rolls initiative for 25 creatures, like the bulk group roll modal does."""
+    itr = MockInteraction()
+
+    def bulk():
+        if batched:
+            return GroupRollRoll.batch(itr, "Goblin", modifier, Advantage.NORMAL, 25)
+        return [GroupRollRoll(itr, "Goblin", modifier, Advantage.NORMAL) for _ in range(25)]
+
+    benchmark.pedantic(bulk, rounds=200, warmup_rounds=8)  # type: ignore
+
+
+@pytest.mark.parametrize("size", [6, 20])
+@pytest.mark.parametrize("generator", ["stdlib", "buffered"])
+def test_dice_rng(benchmark: BenchmarkFixture, size: int, generator: str):
+    """Rolls 1000 single dice, with the stdlib random module and with the buffered numpy generator."""
+    rng = DiceRNG()
+
+    def rolls():
+        if generator == "stdlib":
+            return [random.randint(1, size) for _ in range(1000)]
+        return [rng.roll(size) for _ in range(1000)]
+
+    benchmark.pedantic(rolls, rounds=200, warmup_rounds=8)  # type: ignore
+
+
+def test_stats(benchmark: BenchmarkFixture):
+    """Rolls character stats with a minimum total, which requires many attempts."""
+    benchmark.pedantic(Stats, args=(75,), rounds=200, warmup_rounds=8)  # type: ignore
@@ -0,0 +1,35 @@
+import pytest
+from benchmarks.storage.storage_utils import (
+    GUILD_SCALES,
+    USER_SCALES,
+    populate_guilds,
+    populate_users,
+)
+
+from logic.storage import JsonFileBackend, Storage
+
+
+@pytest.fixture(autouse=True)
+def temp_storage(monkeypatch: pytest.MonkeyPatch, tmp_path: str):
+    """Runs every storage benchmark on an empty storage directory, instead of the bot's './temp' folder."""
+    monkeypatch.setattr(Storage, "backend", JsonFileBackend(base_dir=str(tmp_path)))
+
+
+@pytest.fixture(scope="module")
+def populated_dir(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """
+    Storage directory with synthetic data for the largest user and guild scales, shared by all benchmarks
+    of a module. Smaller scales only use part of the data.
+    """
+    base_dir = str(tmp_path_factory.mktemp("populated"))
+    backend = JsonFileBackend(base_dir=base_dir)
+    populate_users(backend, max(USER_SCALES))
+    populate_guilds(backend, max(GUILD_SCALES))
+    return base_dir
+
+
+@pytest.fixture
+def populated_storage(monkeypatch: pytest.MonkeyPatch, populated_dir: str) -> str:
+    """Same as temp_storage, but on the module's shared directory which already contains users and guilds."""
+    monkeypatch.setattr(Storage, "backend", JsonFileBackend(base_dir=populated_dir))
+    return populated_dir
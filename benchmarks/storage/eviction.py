@@ -0,0 +1,44 @@
+import pytest
+from benchmarks.storage.storage_utils import USER_SCALES, user_interactions
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.dicecache import GlobalDiceCache
+from logic.jsonhandler import PendingWrites
+
+
+@pytest.mark.parametrize("max_entries", [100, 5000])
+@pytest.mark.parametrize("users", USER_SCALES)
+def test_get(benchmark: BenchmarkFixture, populated_storage: str, users: int, max_entries: int):
+    """
+    Gets 1000 random users from a folder handler. When there are more users than cache entries,
+    this measures the cost of cache misses and evictions.
+    """
+    interactions = user_interactions(users, count=1000)
+    cache = GlobalDiceCache(max_entries=max_entries)
+
+    def get():
+        for itr in interactions:
+            cache.get(itr)
+
+    benchmark.pedantic(get, rounds=8, warmup_rounds=1)  # type: ignore
+    benchmark.extra_info["hit_rate"] = cache.stats.hit_rate
+    benchmark.extra_info["evictions"] = cache.stats.evictions
+
+
+@pytest.mark.parametrize("dirty", [False, True])
+def test_clear_cache(benchmark: BenchmarkFixture, monkeypatch: pytest.MonkeyPatch, populated_storage: str, dirty: bool):
+    """Evicts 1000 cached users, which have to be written first if they have unsaved changes."""
+    if dirty:
+        monkeypatch.setattr(PendingWrites, "interval", 5.0)  # Keep changes pending until the users are evicted
+    interactions = user_interactions(max(USER_SCALES), count=1000)
+
+    def setup():
+        cache = GlobalDiceCache()
+        for itr in interactions:
+            handler = cache.get(itr)
+            if dirty:
+                handler.cache.rolls.append("1d20")
+                handler.save()
+        return (cache,), {}
+
+    benchmark.pedantic(lambda cache: cache.clear_cache(max_age=-1), setup=setup, rounds=8)  # type: ignore
@@ -0,0 +1,81 @@
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.storage import SerializationFormat, StoredData, decode, encode
+
+
+def _dice_cache() -> StoredData:
+    return {
+        "dice": {
+            "rolls": ["1d20+5", "2d6+3", "4d6kh3", "1d8+4+2d6", "8d6"],
+            "reasons": ["Attack", "Damage", "Perception", "Stealth", "Fireball"],
+            "grouproll": {"initiative": "3", "perception": "5"},
+            "trie": {f"{i}d{size}+{i}": i % 7 + 1 for i in range(1, 11) for size in (4, 6, 8, 10, 12)},
+            "coin": ["10gp", "5sp + 3cp"],
+        }
+    }
+
+
+def _search_cache() -> StoredData:
+    return {entry_type: [f"{entry_type} entry {i}" for i in range(5)] for entry_type in ("spell", "item", "creature", "table")}
+
+
+def _favorites() -> StoredData:
+    return {"spell": [f"Spell number {i} (XPHB)" for i in range(50)], "item": [f"Item {i} (XDMG)" for i in range(25)]}
+
+
+def _homebrew() -> StoredData:
+    description = "A long homebrew description, with *markdown* and multiple sentences. " * 40
+    return {
+        "spell": [
+            {
+                "name": f"Homebrew spell {i}",
+                "author_id": 123456789012345678,
+                "entry_type": "spell",
+                "description": description,
+                "select_description": "Short description",
+                "url": None,
+            }
+            for i in range(100)
+        ]
+    }
+
+
+def _config() -> StoredData:
+    return {
+        "config": {
+            "disallowed_official_sources": ["PHB", "DMG", "MM"],
+            "allowed_partnered_sources": ["TDCSR", "HWCS"],
+            "roles": [123456789012345678 + i for i in range(5)],
+        }
+    }
+
+
+def _user_colors() -> StoredData:
+    return {str(100000000000000000 + i): (i * 7919) % 0xFFFFFF for i in range(10_000)}
+
+
+DOCUMENTS = {
+    "dice_cache": _dice_cache(),
+    "search_cache": _search_cache(),
+    "favorites": _favorites(),
+    "homebrew": _homebrew(),
+    "config": _config(),
+    "user_colors": _user_colors(),
+}
+
+
+@pytest.mark.parametrize("document", DOCUMENTS.keys())
+@pytest.mark.parametrize("fmt", list(SerializationFormat))
+def test_encode(benchmark: BenchmarkFixture, document: str, fmt: SerializationFormat):
+    data = DOCUMENTS[document]
+    encoded = benchmark(encode, data, fmt)
+    benchmark.extra_info["size_bytes"] = len(encoded)
+
+
+@pytest.mark.parametrize("document", DOCUMENTS.keys())
+@pytest.mark.parametrize("fmt", list(SerializationFormat))
+def test_decode(benchmark: BenchmarkFixture, document: str, fmt: SerializationFormat):
+    encoded = encode(DOCUMENTS[document], fmt)
+    benchmark(decode, encoded)
+    benchmark.extra_info["size_bytes"] = len(encoded)
@@ -0,0 +1,66 @@
+import os
+import random
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.storage import JsonFileBackend
+
+FAMILY = "user_cache"
+
+
+@pytest.fixture(scope="module", params=[10_000, 100_000], ids=lambda files: f"{files}_files")
+def files(request: pytest.FixtureRequest) -> int:
+    return request.param
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["flat", "sharded"])
+def populated_backend(tmp_path_factory: pytest.TempPathFactory, files: int, request: pytest.FixtureRequest) -> JsonFileBackend:
+    """A storage directory with one small document per user, which is shared by all benchmarks of the same layout."""
+    backend = JsonFileBackend(base_dir=str(tmp_path_factory.mktemp("layout")), sharded=request.param)
+    for key in range(files):
+        backend.write(FAMILY, str(key), {"dice": {"rolls": ["1d20+5"], "reasons": ["Attack"]}})
+    return backend
+
+
+def _random_keys(files: int, count: int = 1000) -> list[str]:
+    rng = random.Random(42)
+    return [str(rng.randrange(files)) for _ in range(count)]
+
+
+def test_load(benchmark: BenchmarkFixture, populated_backend: JsonFileBackend, files: int):
+    keys = _random_keys(files)
+
+    def load():
+        for key in keys:
+            populated_backend.read_document(FAMILY, key)
+
+    benchmark.pedantic(load, rounds=16, warmup_rounds=2)  # type: ignore
+
+
+def test_save(benchmark: BenchmarkFixture, populated_backend: JsonFileBackend, files: int):
+    keys = _random_keys(files)
+
+    def save():
+        for key in keys:
+            populated_backend.write(FAMILY, key, {"dice": {"rolls": ["1d20+5", "2d6"], "reasons": ["Attack"]}})
+
+    benchmark.pedantic(save, rounds=16, warmup_rounds=2)  # type: ignore
+
+
+def test_new_users(benchmark: BenchmarkFixture, populated_backend: JsonFileBackend, files: int):
+    """Creating documents for new users, which grows the directories."""
+    counter = iter(range(files, files * 2))
+
+    def create():
+        for _ in range(100):
+            populated_backend.write(FAMILY, str(next(counter)), {})
+
+    benchmark.pedantic(create, rounds=16, warmup_rounds=2)  # type: ignore
+
+
+def test_list_keys(benchmark: BenchmarkFixture, populated_backend: JsonFileBackend):
+    benchmark.pedantic(lambda: sum(1 for _ in populated_backend.keys(FAMILY)), rounds=4)  # type: ignore
+    benchmark.extra_info["largest_directory"] = max(
+        len(names) for _, _, names in os.walk(os.path.join(populated_backend.base_dir, FAMILY))
+    )
@@ -0,0 +1,67 @@
+import random
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from benchmarks.storage.storage_utils import (
+    GUILD_SCALES,
+    TOME_SIZES,
+    USER_SCALES,
+    guild_id,
+    homebrew_tome,
+    user_id,
+)
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.dicecache import DiceCacheHandler
+from logic.favorites import FavoritesHandler
+from logic.homebrew import HomebrewGuildData
+from logic.jsonhandler import JsonHandler
+from logic.searchcache import SearchCacheHandler
+from logic.storage import Storage
+
+USER_HANDLERS: dict[str, Callable[[int], JsonHandler[Any]]] = {
+    "dice_cache": DiceCacheHandler,
+    "search_cache": lambda key: SearchCacheHandler(str(key)),
+    "favorites": FavoritesHandler,
+}
+
+
+@pytest.mark.parametrize("users", USER_SCALES)
+@pytest.mark.parametrize("handler", USER_HANDLERS.keys())
+def test_load_user(benchmark: BenchmarkFixture, populated_storage: str, handler: str, users: int):
+    """Loads the handlers of 100 random existing users."""
+    create_handler = USER_HANDLERS[handler]
+    rng = random.Random(users)
+    keys = [user_id(rng.randrange(users)) for _ in range(100)]
+
+    def load():
+        for key in keys:
+            create_handler(key)
+
+    benchmark.pedantic(load, rounds=16, warmup_rounds=2)  # type: ignore
+
+
+def test_load_new_user(benchmark: BenchmarkFixture):
+    """Loading a user without stored data creates and saves an empty document."""
+    keys = iter(range(1_000_000))
+    benchmark.pedantic(lambda: DiceCacheHandler(user_id(next(keys))), rounds=256, warmup_rounds=8)  # type: ignore
+
+
+@pytest.mark.parametrize("guilds", GUILD_SCALES)
+def test_load_guild_homebrew(benchmark: BenchmarkFixture, populated_storage: str, guilds: int):
+    rng = random.Random(guilds)
+    keys = [guild_id(rng.randrange(guilds)) for _ in range(100)]
+
+    def load():
+        for key in keys:
+            HomebrewGuildData(key)
+
+    benchmark.pedantic(load, rounds=16, warmup_rounds=2)  # type: ignore
+
+
+@pytest.mark.parametrize("tome_size", TOME_SIZES)
+def test_load_homebrew_tome(benchmark: BenchmarkFixture, tome_size: int):
+    """Loads a single guild with a large homebrew tome."""
+    Storage.write("homebrew", str(guild_id(0)), homebrew_tome(tome_size))
+    benchmark.pedantic(HomebrewGuildData, args=(guild_id(0),), rounds=64, warmup_rounds=4)  # type: ignore
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+from benchmarks.storage.storage_utils import create_handler, measure_event_loop_stall
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.jsonhandler import JsonHandler
+
+
+@pytest.mark.parametrize("entries", [10, 1000])
+def test_save(benchmark: BenchmarkFixture, entries: int):
+    handler = create_handler("save", entries=entries)
+    benchmark.pedantic(handler.save, rounds=256, warmup_rounds=8)  # type: ignore
+
+
+@pytest.mark.parametrize("concurrent", [8, 64])
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_save_event_loop_stall(benchmark: BenchmarkFixture, concurrent: int, mode: str):
+    """Measures how long the event loop is blocked while many users save at once, see extra_info for the stall time."""
+    handlers = [create_handler(str(i), entries=500) for i in range(concurrent)]
+    stalls: list[float] = []
+
+    async def save(handler: JsonHandler[list[str]]) -> None:
+        if mode == "sync":
+            handler.save()
+        else:
+            await handler.save_async()
+
+    def run():
+        stall = asyncio.run(measure_event_loop_stall([save(handler) for handler in handlers]))
+        stalls.append(stall)
+
+    benchmark.pedantic(run, rounds=16, warmup_rounds=2)  # type: ignore
+    benchmark.extra_info["max_stall_ms"] = 1000 * max(stalls)
+    benchmark.extra_info["mean_stall_ms"] = 1000 * sum(stalls) / len(stalls)
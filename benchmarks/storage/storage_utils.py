@@ -0,0 +1,115 @@
+import asyncio
+import random
+from collections.abc import Coroutine
+from test.mocking import MockInteraction, MockUser
+from typing import Any
+
+from logic.jsonhandler import JsonHandler
+from logic.storage import SerializationFormat, StorageBackend
+
+USER_SCALES = [100, 10_000]
+GUILD_SCALES = [10, 1000]
+TOME_SIZES = [10, 500]
+
+
+class BenchmarkHandler(JsonHandler[list[str]]):
+    def __init__(self, key: str, family: str = "benchmark"):
+        super().__init__(key, family)
+
+
+def create_handler(key: str, entries: int = 100, entry_length: int = 32) -> BenchmarkHandler:
+    handler = BenchmarkHandler(key)
+    handler.data = {f"key_{i}": ["x" * entry_length for _ in range(8)] for i in range(entries)}
+    return handler
+
+
+def user_id(index: int) -> int:
+    return 100_000_000_000_000_000 + index
+
+
+def guild_id(index: int) -> int:
+    return 200_000_000_000_000_000 + index
+
+
+def populate_users(backend: StorageBackend, users: int):
+    """Writes a synthetic dice cache, search cache and favorites document for every user."""
+    rng = random.Random(users)
+    for i in range(users):
+        key = str(user_id(i))
+        rolls = [f"{rng.randint(1, 8)}d{rng.choice((4, 6, 8, 10, 12, 20))}+{rng.randint(0, 5)}" for _ in range(5)]
+        dice = {
+            "rolls": rolls,
+            "reasons": ["Attack", "Damage", "Perception", "Stealth", "Initiative"],
+            "grouproll": {"initiative": str(rng.randint(0, 5))},
+            "trie": {roll.replace(" ", ""): rng.randint(1, 20) for roll in rolls},
+            "coin": ["10gp"],
+        }
+        backend.write("user_cache", key, {"dice": dice}, SerializationFormat.MSGPACK)
+        backend.write(
+            "user_search", key, {"spell": ["Fire Bolt", "Fireball"], "item": ["Bag of Holding"]}, SerializationFormat.MSGPACK
+        )
+        backend.write("user_favorites", key, {"spell": [f"Spell {j} (XPHB)" for j in range(10)]}, SerializationFormat.MSGPACK)
+
+
+def homebrew_tome(entries: int, description_length: int = 2000) -> dict[str, Any]:
+    """A guild's homebrew data, with roughly the given amount of entries spread over a few entry types."""
+    tome: dict[str, list[dict[str, Any]]] = {}
+    for i in range(entries):
+        entry_type = ("spell", "item", "creature", "feat")[i % 4]
+        tome.setdefault(entry_type, []).append(
+            {
+                "name": f"Homebrew {entry_type} {i}",
+                "author_id": user_id(i),
+                "entry_type": entry_type,
+                "description": "Lorem ipsum dolor sit amet. " * (description_length // 28),
+                "select_description": f"A homebrew {entry_type}",
+                "url": None,
+            }
+        )
+    return tome
+
+
+def populate_guilds(backend: StorageBackend, guilds: int, tome_size: int = 10):
+    """Writes a synthetic config and homebrew tome for every guild."""
+    tome = homebrew_tome(tome_size)
+    for i in range(guilds):
+        key = str(guild_id(i))
+        config = {"disallowed_official_sources": ["PHB", "DMG", "MM"], "allowed_partnered_sources": [], "roles": []}
+        backend.write("config", key, {"config": config})
+        backend.write("homebrew", key, tome)
+
+
+def user_interactions(users: int, count: int, seed: int = 42) -> list[MockInteraction]:
+    """Interactions of randomly chosen existing users, in different guilds."""
+    rng = random.Random(seed)
+    interactions: list[MockInteraction] = []
+    for _ in range(count):
+        index = rng.randrange(users)
+        user = MockUser(f"benchmark_{index}")
+        user.id = user_id(index)
+        interactions.append(MockInteraction(user=user, guild_id=guild_id(index % 10)))
+    return interactions
+
+
+async def measure_event_loop_stall(tasks: list[Coroutine[Any, Any, None]]) -> float:
+    """
+    Runs the given tasks concurrently while measuring how long the event loop was blocked.
+    Returns the longest time in seconds that a simple ticking task had to wait to be scheduled.
+    """
+    loop = asyncio.get_running_loop()
+    running = True
+    stall = 0.0
+
+    async def ticker():
+        nonlocal stall
+        while running:
+            start = loop.time()
+            await asyncio.sleep(0)
+            stall = max(stall, loop.time() - start)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)  # Make sure the ticker is running before the tasks start
+    await asyncio.gather(*tasks)
+    running = False
+    await ticker_task
+    return stall
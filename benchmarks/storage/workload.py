@@ -0,0 +1,114 @@
+import random
+from test.mocking import MockInteraction
+
+import pytest
+from benchmarks.storage.storage_utils import (
+    TOME_SIZES,
+    USER_SCALES,
+    homebrew_tome,
+    user_interactions,
+)
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from logic.config import GlobalConfigHandler
+from logic.dicecache import GlobalDiceCache
+from logic.dnd.abstract import DNDEntry, DNDEntryType
+from logic.dnd.data import Data
+from logic.favorites import GlobalFavoritesHandler
+from logic.homebrew import GlobalHomebrewData
+from logic.jsonhandler import PendingWrites
+from logic.searchcache import GlobalSearchCache
+
+
+def test_store_expression(benchmark: BenchmarkFixture, populated_storage: str):
+    """A single roll, which stores the expression and reason of the user."""
+    handler = GlobalDiceCache().get(user_interactions(1, count=1)[0])
+
+    def roll():
+        handler.store_expression("1d20+5")
+        handler.store_reason("Attack")
+
+    benchmark.pedantic(roll, rounds=256, warmup_rounds=8)  # type: ignore
+
+
+@pytest.mark.parametrize("favorites", [10, 200])
+def test_favorites_store(benchmark: BenchmarkFixture, populated_storage: str, favorites: int):
+    handler = GlobalFavoritesHandler().get(user_interactions(1, count=1)[0])
+    spells = Data.spells.entries[: favorites + 64]
+
+    def setup():
+        handler.data = {}
+        for spell in spells[:favorites]:
+            handler.store(spell)
+        return (spells[favorites:],), {}
+
+    def store(new_spells: list[DNDEntry]):
+        for spell in new_spells:
+            handler.store(spell)
+
+    benchmark.pedantic(store, setup=setup, rounds=16)  # type: ignore
+
+
+@pytest.mark.parametrize("tome_size", TOME_SIZES)
+def test_homebrew_add(benchmark: BenchmarkFixture, tome_size: int):
+    itr = user_interactions(1, count=1)[0]
+    handler = GlobalHomebrewData().get(itr)
+    counter = iter(range(1_000_000))
+
+    def setup():
+        handler.data = {key: handler.deserialize(entries) for key, entries in homebrew_tome(tome_size).items()}
+        return (), {}
+
+    def add():
+        handler.add(itr, DNDEntryType.SPELL, f"New spell {next(counter)}", None, None, "Lorem ipsum dolor sit amet. " * 70)
+
+    benchmark.pedantic(add, setup=setup, rounds=16)  # type: ignore
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+@pytest.mark.parametrize("users", USER_SCALES)
+def test_mixed(
+    benchmark: BenchmarkFixture, monkeypatch: pytest.MonkeyPatch, populated_storage: str, users: int, write_behind: bool
+):
+    """
+    A mix of commands from random users: mostly rolls, some searches and favorites, and the occasional
+    homebrew addition. Each command reads the guild's config, like most commands do.
+    """
+    if write_behind:
+        monkeypatch.setattr(PendingWrites, "interval", 5.0)
+
+    rng = random.Random(users)
+    interactions = user_interactions(users, count=500)
+    spells = Data.spells.entries
+    dice, search, favorites, config, homebrew = (
+        GlobalDiceCache(),
+        GlobalSearchCache(),
+        GlobalFavoritesHandler(),
+        GlobalConfigHandler(),
+        GlobalHomebrewData(),
+    )
+    counter = iter(range(1_000_000))
+
+    def command(itr: MockInteraction):
+        config.get(itr)
+        action = rng.random()
+        if action < 0.7:
+            roll_cache = dice.get(itr)
+            roll_cache.store_expression(f"1d20+{rng.randint(0, 10)}")
+            roll_cache.store_reason("Attack")
+        elif action < 0.9:
+            search.get(itr).store(rng.choice(spells))
+        elif action < 0.99:
+            try:
+                favorites.get(itr).store(rng.choice(spells))
+            except KeyError:
+                pass  # Already a favorite
+        else:
+            homebrew.get(itr).add(itr, DNDEntryType.ITEM, f"Item {next(counter)}", None, None, "Description")
+
+    def run():
+        for itr in interactions:
+            command(itr)
+        PendingWrites.flush()
+
+    benchmark.pedantic(run, rounds=8, warmup_rounds=1)  # type: ignore
@@ -1,6 +1,7 @@
 import argparse
 import logging
 import os
+import sys
 
 # pylint: disable=import-private-name
 from discord.utils import (
@@ -8,6 +9,7 @@ from discord.utils import (
 )
 
 from bot import Bot
+from logic.storage import JsonFileBackend, SqliteBackend, migrate
 
 if __name__ == "__main__":
     # Parse command line arguments, see `python lenny --help`
@@ -26,6 +28,18 @@ if __name__ == "__main__":
         action=argparse.BooleanOptionalAction,
         help="Enable voice behavior. Enabled by default.",
     )
+    parser.add_argument(
+        "--migrate-storage",
+        default=False,
+        action="store_true",
+        help="Migrate the JSON files in './temp' into the SQLite storage backend, then exit.",
+    )
+    parser.add_argument(
+        "--migrate-storage-layout",
+        default=False,
+        action="store_true",
+        help="Move the files in './temp' to the directory layout set by STORAGE_SHARDED, then exit.",
+    )
 
     args = parser.parse_args()
 
@@ -41,6 +55,20 @@ if __name__ == "__main__":
     else:
         logging.getLogger("discord.player").setLevel(logging.WARNING)
 
+    if args.migrate_storage:
+        target = SqliteBackend()
+        if target.families():
+            logging.error("SQLite database '%s' already contains data, aborting migration.", target.db_path)
+            sys.exit(1)
+        count = migrate(JsonFileBackend(), target)
+        logging.info("Migrated %d documents, set STORAGE_BACKEND='sqlite' in your .env file to use them.", count)
+        sys.exit(0)
+
+    if args.migrate_storage_layout:
+        count = JsonFileBackend().relayout()
+        logging.info("Moved %d files to the new storage layout.", count)
+        sys.exit(0)
+
     # Start the bot
     os.makedirs("./temp", exist_ok=True)
     bot = Bot(voice=args.voice)
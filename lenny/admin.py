@@ -0,0 +1,56 @@
+"""
+Administrative commands for the bot's stored data, which can be run without starting the bot.
+See `python lenny/admin.py --help`.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+from logic.archive import export_archive, import_archive
+from logic.storage import create_backend
+
+
+def _export(args: argparse.Namespace):
+    backend = create_backend(args.backend)
+    count = export_archive(backend, args.path, workers=args.workers)
+    logging.info("Exported %d documents to '%s'.", count, args.path)
+
+
+def _import(args: argparse.Namespace):
+    backend = create_backend(args.backend)
+    if backend.families() and not args.force:
+        logging.error("The '%s' storage backend already contains data, use --force to import anyway.", args.backend)
+        sys.exit(1)
+    count = import_archive(backend, args.path)
+    logging.info("Imported %d documents from '%s'.", count, args.path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the bot's stored data.")
+    parser.add_argument(
+        "--backend",
+        default=os.getenv("STORAGE_BACKEND", "json"),
+        help="Storage backend to use, either 'json' or 'sqlite'. Defaults to STORAGE_BACKEND.",
+    )
+    subparsers = parser.add_subparsers(required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export all stored data into a compressed archive.")
+    export_parser.add_argument("path", help="Path of the archive to create, e.g. 'backup.tar.gz'.")
+    export_parser.add_argument("--workers", type=int, default=8, help="Amount of documents read in parallel.")
+    export_parser.set_defaults(func=_export)
+
+    import_parser = subparsers.add_parser("import", help="Import all data from an exported archive.")
+    import_parser.add_argument("path", help="Path of the archive to import.")
+    import_parser.add_argument(
+        "--force",
+        default=False,
+        action="store_true",
+        help="Import even if the storage backend already contains data, overwriting documents with the same key.",
+    )
+    import_parser.set_defaults(func=_import)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args.func(args)
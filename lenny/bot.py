@@ -30,6 +30,7 @@ from commands.search import SearchCommandGroup
 from commands.stats import StatsCommandGroup
 from commands.timestamp import TimestampCommandGroup
 from commands.tokengen import TokenGenCommandGroup
+from commands.versus import VersusCommand
 from context_menus.delete import DeleteContextMenu
 from context_menus.favorites import AddFavoriteContextMenu
 from context_menus.reroll import RerollContextMenu
@@ -41,11 +42,16 @@ from logger import (
     log_modal_submit_interaction,
 )
 from logic.config import Config
-from logic.dicecache import DiceCache
+from logic.dicecache import DiceCache, default_dicecache_trie
+from logic.distribution import distribution_cache_info, warm_distribution_cache
+from logic.distributioncache import DistributionDisk
 from logic.favorites import FavoritesCache
 from logic.homebrew import HomebrewData
+from logic.jsonhandler import PendingWrites
 from logic.searchcache import SearchCache
+from logic.storage import Storage
 from logic.voice_chat import VC, Sounds
+from methods import Calculations
 
 
 class Bot(discord.Client):
@@ -76,11 +82,16 @@ class Bot(discord.Client):
         self.guild_id = int(guild_id) if guild_id is not None else None
         self.voice_enabled = voice
 
+        # Distributions are calculated and cached in the workers of the process pool, which report their cache
+        # statistics back with every result.
+        Calculations.stats = distribution_cache_info
+
     def register_commands(self):
         logging.info("Registering slash-commands")
 
         # Commands
         self.tree.add_command(DistributionCommand())
+        self.tree.add_command(VersusCommand())
         self.tree.add_command(HelpCommand(tree=self.tree))
         self.tree.add_command(StatsCommandGroup())
         self.tree.add_command(RollCommand())
@@ -142,6 +153,19 @@ class Bot(discord.Client):
         logging.info("Finished initialization")
         self._cache_cleaner.start()
         self._frequent_cleanup.start()
+        if PendingWrites.enabled:
+            self._storage_flusher.change_interval(seconds=PendingWrites.interval)
+            self._storage_flusher.start()
+        await self._warm_distribution_cache()
+
+    async def _warm_distribution_cache(self):
+        if not DistributionDisk.enabled:
+            return
+        try:
+            count = await Calculations.run(300, warm_distribution_cache, list(default_dicecache_trie()))
+            logging.info("Warmed distribution cache, calculated %d distributions", count)
+        except (TimeoutError, RuntimeError) as exception:
+            logging.warning("Could not warm distribution cache: %s", exception)
 
     async def _attempt_sync_guild(self):
         guild = discord.utils.get(self.guilds, id=self.guild_id)
@@ -160,10 +184,55 @@ class Bot(discord.Client):
         SearchCache.clear_cache(max_age=450)
         FavoritesCache.clear_cache(max_age=450)
 
+        for name, cache in (
+            ("Homebrew", HomebrewData),
+            ("Dice", DiceCache),
+            ("Config", Config),
+            ("Search", SearchCache),
+            ("Favorites", FavoritesCache),
+        ):
+            stats = cache.stats
+            logging.debug(
+                "%s cache: %d entries, %d hits, %d misses, %d evictions (%.0f%% hit rate)",
+                name,
+                len(cache),
+                stats.hits,
+                stats.misses,
+                stats.evictions,
+                stats.hit_rate * 100,
+            )
+
+        infos = Calculations.worker_stats()
+        hits = sum(info.hits for info in infos)
+        misses = sum(info.misses for info in infos)
+        logging.debug(
+            "Distribution cache: %d entries, %d hits, %d misses (%.0f%% hit rate) over %d workers",
+            sum(info.currsize for info in infos),
+            hits,
+            misses,
+            hits / (hits + misses) * 100 if hits + misses else 0,
+            len(infos),
+        )
+
     @tasks.loop(minutes=3)
     async def _frequent_cleanup(self):
         await VC.leave_inactive_voice_chats()
 
+    @tasks.loop(seconds=5)  # Actual interval is set through STORAGE_FLUSH_INTERVAL
+    async def _storage_flusher(self):
+        count = await PendingWrites.flush_async()
+        if count:
+            logging.debug("Flushed %d handlers to storage", count)
+
+    async def close(self):
+        """Ensures unsaved changes are written to storage when shutting down."""
+        if self._storage_flusher.is_running():
+            self._storage_flusher.cancel()
+        PendingWrites.flush()
+        Storage.wait()  # Writes of saves are queued in the background
+        Calculations.shutdown()
+        await super().close()
+
     async def on_interaction(self, interaction: discord.Interaction):
         match interaction.type:
             case InteractionType.application_command:
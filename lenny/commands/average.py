@@ -8,6 +8,9 @@ from logic.average import (
     AverageDamageACResults,
     AverageDamageDCResults,
 )
+from methods import Calculations
+
+AVERAGE_TIMEOUT = 10  # seconds
 
 
 class AverageDamageACCommand(BaseCommand):
@@ -23,6 +26,8 @@ class AverageDamageACCommand(BaseCommand):
         crit_min="The minimum roll required on the d20 to land a critical hit, default = 20.",
         miss_damage="The damage rolled on a miss, default = 0.",
         attacks="The amount of attacks done against the target, default = 1.",
+        target_ac="Show the damage per round against this AC, default = the middle of the AC range.",
+        target_hp="Show the odds of dealing at least this much damage in a round.",
     )
     async def handle(
         self,
@@ -33,11 +38,27 @@ class AverageDamageACCommand(BaseCommand):
         max_ac: Range[int, 0, 30] = 30,
         crit_min: Range[int, 0, 20] = 20,
         miss_damage: str = "0",
-        attacks: int = 1,
+        attacks: Range[int, 1, 20] = 1,
+        target_ac: Range[int, 0, 30] | None = None,
+        target_hp: Range[int, 1] | None = None,
     ) -> None:
-        results = AverageDamageACResults(hit, damage, min_ac, max_ac, crit_min, miss_damage, attacks)
+        await itr.response.defer()
+        results = await Calculations.run(
+            AVERAGE_TIMEOUT,
+            AverageDamageACResults,
+            hit,
+            damage,
+            min_ac,
+            max_ac,
+            crit_min,
+            miss_damage,
+            attacks,
+            target_ac,
+            target_hp,
+            timeout_message="Average damage took too long to calculate!",
+        )
         view = AverageDamageLayoutView(itr, results)
-        await itr.response.send_message(view=view, files=[results.chart, results.csv])
+        await itr.followup.send(view=view, files=[results.chart, results.csv])
 
 
 async def miss_damage_dc_autocomplete(itr: discord.Interaction, current: str):
@@ -78,9 +99,19 @@ class AverageDamageDCCommand(BaseCommand):
         min_mod: Range[int, -20, 40] = -4,
         max_mod: Range[int, -20, 40] = 12,
     ) -> None:
-        results = AverageDamageDCResults(dc, damage, miss_damage, min_mod, max_mod)
+        await itr.response.defer()
+        results = await Calculations.run(
+            AVERAGE_TIMEOUT,
+            AverageDamageDCResults,
+            dc,
+            damage,
+            miss_damage,
+            min_mod,
+            max_mod,
+            timeout_message="Average damage took too long to calculate!",
+        )
         view = AverageDamageLayoutView(itr, results)
-        await itr.response.send_message(view=view, files=[results.chart, results.csv])
+        await itr.followup.send(view=view, files=[results.chart, results.csv])
 
 
 class AverageDamageCommandGroup(BaseCommandGroup):
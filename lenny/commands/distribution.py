@@ -2,11 +2,14 @@ from discord import Interaction
 from discord.app_commands import choices, describe
 
 from commands.command import BaseCommand
-from embeds.distribution import MultiDistributionView, SingleDistributionEmbed
+from embeds.distribution import (
+    MultiDistributionView,
+    SingleDistributionEmbed,
+    calculate_distribution,
+)
 from logic.color import UserColor
-from logic.distribution import DistributionChartStyle, distribution
+from logic.distribution import DistributionChartStyle
 from logic.roll import Advantage
-from methods import call_with_timeout
 
 
 class DistributionCommand(BaseCommand):
@@ -32,19 +35,12 @@ class DistributionCommand(BaseCommand):
         min_to_beat: int | None = None,
         style: DistributionChartStyle = DistributionChartStyle.ADJACENT,
     ):
-        timeout = 5  # seconds
-
         await itr.response.defer()
         style = DistributionChartStyle(style)
         color = UserColor.get(itr)
 
-        result = call_with_timeout(
-            timeout=timeout,
-            func=distribution,
-            args=[expression, Advantage(advantage), color, min_to_beat, style],
-        )
-        if result is None:
-            raise TimeoutError("Distribution took too long to calculate! For more information, see `/help distribution`.")
+        # Expressions which are too expensive to calculate exactly are simulated instead.
+        result = await calculate_distribution(expression, Advantage(advantage), color, min_to_beat, style)
 
         if len(result.distributions) == 1:
             embed = SingleDistributionEmbed(itr, result)
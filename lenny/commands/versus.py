@@ -0,0 +1,52 @@
+from discord import Interaction
+from discord.app_commands import choices, describe
+
+from commands.command import BaseCommand
+from embeds.versus import VersusEmbed
+from logic.color import UserColor
+from logic.roll import Advantage
+from logic.versus import versus
+from methods import Calculations
+
+VERSUS_TIMEOUT = 5  # seconds
+
+
+class VersusCommand(BaseCommand):
+    name = "versus"
+    desc = "Show the odds of an expression beating another expression."
+    help = "Calculates the odds of winning, tying or losing a contested roll, such as a grapple or stealth versus perception."
+
+    @choices(
+        advantage=Advantage.choices(),
+        opponent_advantage=Advantage.choices(),
+    )
+    @describe(
+        expression="Your dice-expression (Example: 1d20+7).",
+        opponent="Your opponent's dice-expression (Example: 1d20+4).",
+        advantage="Whether you roll normally, or with advantage or disadvantage.",
+        opponent_advantage="Whether your opponent rolls normally, or with advantage or disadvantage.",
+    )
+    async def handle(
+        self,
+        itr: Interaction,
+        expression: str,
+        opponent: str,
+        advantage: str = Advantage.NORMAL,
+        opponent_advantage: str = Advantage.NORMAL,
+    ):
+        await itr.response.defer()
+        color = UserColor.get(itr)
+
+        result = await Calculations.run(
+            VERSUS_TIMEOUT,
+            versus,
+            expression,
+            opponent,
+            Advantage(advantage),
+            Advantage(opponent_advantage),
+            color,
+            timeout_message="Versus took too long to calculate! For more information, see `/help distribution`.",
+        )
+
+        embed = VersusEmbed(itr, result)
+        await itr.followup.send(embed=embed, file=embed.chart)
@@ -3,7 +3,7 @@ import discord
 from context_menus.context_menu import BaseContextMenu
 from embeds.roll import MultiRollEmbed, RollEmbed
 from logic.dicecache import DiceCache
-from logic.roll import Advantage, multi_roll, roll
+from logic.roll import Advantage, RollMetadata, multi_roll, roll
 from logic.voice_chat import VC, SoundType
 
 
@@ -37,12 +37,22 @@ class RerollContextMenu(BaseContextMenu):
             return Advantage.ELVEN_ACCURACY
         return Advantage.NORMAL
 
-    async def _handle_multiroll(self, interaction: discord.Interaction, dice_notation: str, embed: discord.Embed):
-        advantage = self._parse_advantage(dice_notation)
+    @classmethod
+    def _parse_metadata(cls, embed: discord.Embed) -> RollMetadata:
+        """Recovers the roll from the embed's text, for messages sent before roll embeds carried metadata."""
+        title = embed.author.name or ""
+        if not ("Rolling" in title or "Re-rolling" in title):
+            raise ValueError("Message does not contain a dice-roll!")
+
+        dice_notation = title.replace("Rolling ", "").replace("Re-rolling", "").replace("!", "")
+        advantage = cls._parse_advantage(dice_notation)
         dice_notation = dice_notation.replace(advantage.title_suffix.strip(), "")
-        dice_notation = dice_notation.replace("multiple times", "").strip()
-        reason = self._get_reason(embed)
+        reason = cls._get_reason(embed)
 
+        if "multiple times" not in dice_notation:
+            return RollMetadata(dice_notation.strip(), advantage, reason=reason)
+
+        dice_notation = dice_notation.replace("multiple times", "").strip()
         if not embed.fields[0].value:
             raise ValueError("Could not find any roll-related info in this message!")
 
@@ -50,26 +60,23 @@ class RerollContextMenu(BaseContextMenu):
         for line in embed.fields[0].value.split("\n"):
             if "`" in line:
                 amount += 1
+        return RollMetadata(dice_notation, advantage, amount, reason)
 
-        result = multi_roll(dice_notation, amount, advantage)
-        embed = MultiRollEmbed(interaction, result, reason, reroll=True)
-        DiceCache.get(interaction).store_expression(dice_notation)
+    async def _handle_multiroll(self, interaction: discord.Interaction, metadata: RollMetadata, amount: int):
+        result = multi_roll(metadata.expression, amount, metadata.advantage)
+        embed = MultiRollEmbed(interaction, result, metadata.reason, reroll=True)
+        DiceCache.get(interaction).store_expression(metadata.expression)
 
         await interaction.response.send_message(embed=embed)
         await VC.play(interaction, SoundType.ROLL)
 
-    async def _handle_single_roll(self, interaction: discord.Interaction, dice_notation: str, embed: discord.Embed):
-        advantage = self._parse_advantage(dice_notation)
-        dice_notation = dice_notation.replace(advantage.title_suffix.strip(), "")
-        dice_notation = dice_notation.strip()
-
-        reason = self._get_reason(embed)
-        result = roll(dice_notation, advantage)
-        embed = RollEmbed(interaction, result, reason, reroll=True)
-        DiceCache.get(interaction).store_expression(dice_notation)
+    async def _handle_single_roll(self, interaction: discord.Interaction, metadata: RollMetadata):
+        result = roll(metadata.expression, metadata.advantage)
+        embed = RollEmbed(interaction, result, metadata.reason, reroll=True)
+        DiceCache.get(interaction).store_expression(metadata.expression)
 
         await interaction.response.send_message(embed=embed)
-        await VC.play_dice_roll(interaction, result, reason)
+        await VC.play_dice_roll(interaction, result, metadata.reason)
 
     async def handle(self, interaction: discord.Interaction, message: discord.Message):
         if interaction.client.user is None:
@@ -82,12 +89,8 @@ class RerollContextMenu(BaseContextMenu):
             raise ValueError("Reroll doesn't work on this message type!")
 
         embed = message.embeds[0]
-        title = embed.author.name or ""
-        if not ("Rolling" in title or "Re-rolling" in title):
-            raise ValueError("Message does not contain a dice-roll!")
-
-        dice_notation = title.replace("Rolling ", "").replace("Re-rolling", "").replace("!", "")
-        if "multiple times" in dice_notation:
-            await self._handle_multiroll(interaction, dice_notation, embed)
+        metadata = RollMetadata.decode(embed.url) or self._parse_metadata(embed)
+        if metadata.amount is not None:
+            await self._handle_multiroll(interaction, metadata, metadata.amount)
             return
-        await self._handle_single_roll(interaction, dice_notation, embed)
+        await self._handle_single_roll(interaction, metadata)
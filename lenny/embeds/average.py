@@ -25,6 +25,8 @@ class AverageDamageLayoutView(discord.ui.LayoutView):
 
         container.add_item(TitleTextDisplay(self.results.title))
         container.add_item(discord.ui.TextDisplay(self.results.details))
+        if self.results.round_summary:
+            container.add_item(discord.ui.TextDisplay(self.results.round_summary))
         container.add_item(
             discord.ui.MediaGallery(discord.MediaGalleryItem(media=f"attachment://{self.results.chart.filename}"))
         )
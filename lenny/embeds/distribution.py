@@ -1,10 +1,56 @@
+import time
+
 import discord
 from discord.utils import MISSING
 
 from logic.color import UserColor
-from logic.distribution import DistributionResult, distribution
+from logic.distribution import (
+    DistributionChartStyle,
+    DistributionResult,
+    SimulatedDistribution,
+    distribution_chart,
+    distribution_results,
+)
 from logic.roll import Advantage
-from methods import join_strings
+from methods import Calculations, join_strings
+
+DISTRIBUTION_TIMEOUT = 5  # seconds, for calculating the distribution and drawing its chart together
+EXACT_TIMEOUT = 2  # seconds, expressions which take longer are simulated instead
+
+
+async def calculate_distribution(
+    expression: str,
+    advantage: Advantage,
+    color: int,
+    min_to_beat: int | None = None,
+    style: DistributionChartStyle = DistributionChartStyle.ADJACENT,
+) -> DistributionResult:
+    """
+    Calculates distributions in the process pool. All steps share a single deadline, each step only gets the
+    time which is left. Only the math counts towards the time limit of the exact calculation.
+    """
+    timeout_message = "Distribution took too long to calculate! For more information, see `/help distribution`."
+    deadline = time.monotonic() + DISTRIBUTION_TIMEOUT
+
+    def remaining() -> float:
+        return max(0.0, deadline - time.monotonic())
+
+    try:
+        results = await Calculations.run(
+            min(EXACT_TIMEOUT, remaining()), distribution_results, expression, advantage, min_to_beat
+        )
+    except TimeoutError:
+        results = await Calculations.run(
+            remaining(),
+            distribution_results,
+            expression,
+            advantage,
+            min_to_beat,
+            True,
+            timeout_message=timeout_message,
+        )
+
+    return await Calculations.run(remaining(), distribution_chart, results, color, style, timeout_message=timeout_message)
 
 
 class SingleDistributionEmbed(discord.Embed):
@@ -17,20 +63,29 @@ class SingleDistributionEmbed(discord.Embed):
         mean = dist.distribution.mean()
         stdev = dist.distribution.stdev()
 
+        title = "Approximate distribution" if dist.approximate else "Distribution"
         super().__init__(
             color=color,
-            title=f"Distribution for {dist.expression}{result.advantage.title_suffix}!",
+            title=f"{title} for {dist.expression}{result.advantage.title_suffix}!",
             type="rich",
         )
 
-        self.add_field(name="Mean", value=f"{mean:.2f}", inline=True)
+        mean_text = f"{mean:.2f}"
+        if isinstance(dist.distribution, SimulatedDistribution):
+            mean_text += f" ± {dist.distribution.mean_margin():.2f}"
+            self.set_footer(text=f"Simulated from {dist.distribution.samples:,} rolls, ranges are 95% confidence intervals.")
+
+        self.add_field(name="Mean", value=mean_text, inline=True)
         self.add_field(name="Deviation", value=f"{stdev:.2f}", inline=True)
         self.add_field(name="Range", value=f"{result.min} ~ {result.max}", inline=True)
 
         if result.min_to_beat is not None:
+            odds_text = f"{(100 * dist.min_to_beat_odds):.2f}%"
+            if bounds := dist.min_to_beat_bounds:
+                odds_text += f" ({100 * bounds[0]:.2f}% ~ {100 * bounds[1]:.2f}%)"
             self.add_field(
                 name=f"Odds to beat {result.min_to_beat}",
-                value=f"{(100 * dist.min_to_beat_odds):.2f}%",
+                value=odds_text,
                 inline=True,
             )
 
@@ -49,12 +104,11 @@ class MultiDistributionButton(discord.ui.Button[discord.ui.LayoutView]):
         self.callback = self.send_distribution
 
     async def send_distribution(self, interaction: discord.Interaction) -> None:
-        # If the MultiDistributionView was sent without a timeout, then this one can
-        # also be calculated without a timeout.
+        await interaction.response.defer()
         color = UserColor.get(interaction)
-        result = distribution(expressions=self.expression, advantage=self.advantage, color=color)
+        result = await calculate_distribution(self.expression, self.advantage, color)
         embed = SingleDistributionEmbed(interaction, result)
-        await interaction.response.send_message(embed=embed, file=embed.chart)
+        await interaction.followup.send(embed=embed, file=embed.chart)
 
 
 class MultiDistributionView(discord.ui.LayoutView):
@@ -71,8 +125,11 @@ class MultiDistributionView(discord.ui.LayoutView):
         expressions = list(r.expression for r in result.distributions)
         joined_expressions = join_strings(expressions, ", ", " and ")
 
-        title = f"### Distributions for {joined_expressions}!"
+        title = f"### {'Approximate distributions' if result.approximate else 'Distributions'} for {joined_expressions}!"
         range_text = f"**Range:** {result.min} ~ {result.max}"
+        for dist in result.distributions:
+            if isinstance(dist.distribution, SimulatedDistribution):
+                range_text += f"\n-# {dist.expression} was simulated from {dist.distribution.samples:,} rolls."
 
         container = discord.ui.Container[MultiDistributionView](accent_color=color)
         button_row = discord.ui.ActionRow[MultiDistributionView]()
@@ -288,10 +288,10 @@ class GroupRollBulkModal(GroupRollModal):
                 raise ValueError(f"Could not parse '{modifier}' as an integer when value was force set.") from exc
             rolls = [GroupRollSet(itr, name, value) for _ in range(amount)]
         else:
-            rolls = [GroupRollRoll(itr, name, modifier, advantage) for _ in range(amount)]
+            # Shared rolls only need a single roll, which is used by every creature
+            rolls = GroupRollRoll.batch(itr, name, modifier, advantage, 1 if shared else amount)
             if shared:
-                for i in range(1, len(rolls)):
-                    rolls[i].roll = rolls[0].roll
+                rolls = [GroupRollRoll(itr, name, modifier, advantage, rolls[0].roll) for _ in range(amount)]
             else:
                 rolls.sort(key=lambda init: init.total, reverse=True)
 
@@ -5,11 +5,21 @@ from embeds.components import BaseModal, ModalRadioGroupComponent
 from embeds.dnd.table import DNDTableEntryView
 from embeds.embed import UserActionEmbed
 from logic.dnd.table import DNDTable, roll_table
-from logic.roll import MultiRollResult, RollResult, SingleRollResult
+from logic.roll import MultiRollResult, RollMetadata, RollResult, SingleRoll
 from logic.voice_chat import VC, SoundType
 from methods import when
 
 
+def set_roll_metadata(embed: discord.Embed, metadata: RollMetadata):
+    """
+    Stores the roll's metadata as the embed's URL, so it can be re-rolled without parsing the embed. The URL is
+    only shown as a link on the embed's title, which roll embeds do not have.
+    """
+    url = metadata.encode()
+    if len(url) <= 2048:  # Discord's limit on embed URLs
+        embed.url = url
+
+
 class RollEmbed(UserActionEmbed):
     def __init__(
         self,
@@ -23,6 +33,7 @@ class RollEmbed(UserActionEmbed):
         else:
             title = f"Rolling {result.expression}{result.advantage.title_suffix}!"
 
+        metadata = RollMetadata(result.expression, result.advantage, reason=reason)
         if reason is None:
             reason = "Result"
 
@@ -57,6 +68,7 @@ class RollEmbed(UserActionEmbed):
             description = "⚠️ Message too long, try sending a shorter expression!"
 
         super().__init__(itr, title, description)
+        set_roll_metadata(self, metadata)
 
 
 class MultiRollEmbed(UserActionEmbed):
@@ -72,6 +84,7 @@ class MultiRollEmbed(UserActionEmbed):
         else:
             title = f"Rolling {result.expression} multiple times{result.advantage.title_suffix}!"
 
+        metadata = RollMetadata(result.expression, result.advantage, amount=len(result.rolls), reason=reason)
         if reason is None:
             reason = "Total"
 
@@ -94,9 +107,11 @@ class MultiRollEmbed(UserActionEmbed):
 
         if len(winning_result) > 1024:
             super().__init__(itr, title, "⚠️ Message too long, try sending a shorter expression!")
+            set_roll_metadata(self, metadata)
             return
 
         super().__init__(itr, title, "")
+        set_roll_metadata(self, metadata)
 
         if result.warnings:
             self.description = "\n".join(f"⚠️ {warning} ⚠️" for warning in result.warnings)
@@ -109,7 +124,7 @@ class MultiRollEmbed(UserActionEmbed):
         self.add_field(name="", value=winning_result, inline=True)
         self.add_field(name="", value=footer, inline=False)
 
-    def _get_roll_list(self, rolls: list[SingleRollResult], strike_through: bool = False) -> str:
+    def _get_roll_list(self, rolls: list[SingleRoll], strike_through: bool = False) -> str:
         results: list[str] = []
         for roll in rolls:
             roll_message = f"`{roll.expr} -> {roll.total}`"
@@ -0,0 +1,27 @@
+import discord
+
+from logic.color import UserColor
+from logic.versus import VersusResult
+
+
+class VersusEmbed(discord.Embed):
+    chart: discord.File
+
+    def __init__(self, itr: discord.Interaction, result: VersusResult):
+        color = UserColor.get(itr)
+        first = f"{result.expression}{result.advantage.title_suffix}"
+        second = f"{result.opponent}{result.opponent_advantage.title_suffix}"
+
+        super().__init__(
+            color=color,
+            title=f"{first} versus {second}!",
+            type="rich",
+        )
+
+        self.add_field(name="Win", value=f"{(100 * result.chances.win):.2f}%", inline=True)
+        self.add_field(name="Tie", value=f"{(100 * result.chances.tie):.2f}%", inline=True)
+        self.add_field(name="Lose", value=f"{(100 * result.chances.loss):.2f}%", inline=True)
+        self.add_field(name="Mean difference", value=f"{result.difference.mean():.2f}", inline=True)
+
+        self.chart = result.chart
+        self.set_image(url=f"attachment://{self.chart.filename}")
@@ -0,0 +1,135 @@
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from logic.storage import (
+    LogRecord,
+    SerializationFormat,
+    StorageBackend,
+    StoredData,
+    decode,
+    encode,
+)
+
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass
+class ArchivedDocument:
+    family: str
+    key: str
+    data: StoredData
+    fmt: SerializationFormat
+    log: list[LogRecord]
+
+    @property
+    def name(self) -> str:
+        """Path of the document within the archive, e.g. 'user_cache/123.msgpack'."""
+        filename = f"{self.key}{self.fmt.extension}"
+        return f"{self.family}/{filename}" if self.family else filename
+
+
+def _read_document(backend: StorageBackend, family: str, key: str) -> ArchivedDocument | None:
+    document = backend.read_document(family, key)
+    if document is None:
+        return None
+    data, fmt = document
+    return ArchivedDocument(family, key, data, fmt, backend.read_log(family, key))
+
+
+def _iter_documents(backend: StorageBackend, workers: int, window: int = 256) -> Iterator[ArchivedDocument]:
+    """
+    Reads all documents of a backend, using multiple threads if the backend supports it.
+    At most `window` documents are read ahead, so memory usage does not depend on the amount of documents.
+    """
+    if not backend.parallel_reads:
+        workers = 1
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as executor:
+        pending: deque[Future[ArchivedDocument | None]] = deque()
+        for family in backend.families():
+            for key in backend.keys(family):
+                pending.append(executor.submit(_read_document, backend, family, key))
+                if len(pending) >= window:
+                    document = pending.popleft().result()
+                    if document is not None:
+                        yield document
+        while pending:
+            document = pending.popleft().result()
+            if document is not None:
+                yield document
+
+
+def _add_file(archive: tarfile.TarFile, name: str, content: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(content))
+
+
+def export_archive(backend: StorageBackend, path: str, workers: int = 8) -> int:
+    """
+    Streams all documents of a backend into a compressed tar archive, returns the amount of documents exported.
+    Documents are read from a snapshot of the backend, so the bot can keep running during the export.
+    """
+    count = 0
+    with backend.snapshot() as snapshot, tarfile.open(path, "w|gz") as archive:
+        manifest = {"version": ARCHIVE_VERSION, "created": int(time.time())}
+        _add_file(archive, MANIFEST_NAME, json.dumps(manifest).encode("utf-8"))
+
+        for document in _iter_documents(snapshot, workers):
+            _add_file(archive, document.name, encode(document.data, document.fmt))
+            if document.log:
+                log = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in document.log)
+                _add_file(archive, os.path.splitext(document.name)[0] + ".log", log.encode("utf-8"))
+            count += 1
+            if count % 10_000 == 0:
+                logging.info("Exported %d documents...", count)
+    return count
+
+
+def _split_name(name: str) -> tuple[str, str, str]:
+    """Splits an archived path into its family, key and extension."""
+    family, _, filename = name.rpartition("/")
+    key, extension = os.path.splitext(filename)
+    return family, key, extension
+
+
+def import_archive(backend: StorageBackend, path: str) -> int:
+    """Writes all documents of an archive to a backend, returns the amount of documents imported."""
+    count = 0
+    with tarfile.open(path, "r|gz") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            file = archive.extractfile(member)
+            if file is None:
+                continue
+            content = file.read()
+
+            if member.name == MANIFEST_NAME:
+                manifest = json.loads(content)
+                if manifest.get("version") != ARCHIVE_VERSION:
+                    raise ValueError(f"Unsupported archive version '{manifest.get('version')}', expected {ARCHIVE_VERSION}.")
+                continue
+
+            family, key, extension = _split_name(member.name)
+            if extension == ".log":
+                for line in content.decode("utf-8").splitlines():
+                    backend.append(family, key, json.loads(line))
+                continue
+
+            data, fmt = decode(content)
+            backend.write(family, key, data, fmt)
+            count += 1
+            if count % 10_000 == 0:
+                logging.info("Imported %d documents...", count)
+    return count
@@ -8,28 +8,56 @@ from collections.abc import Callable
 
 import discord
 import matplotlib.pyplot as plt
-
-from logic.distribution import dice_distribution
+import numpy as np
+import numpy.typing as npt
+
+from logic.distribution import (
+    DenseDistribution,
+    DiceDistribution,
+    check_distribution_cost,
+    dice_distribution,
+    to_dense,
+)
 from logic.dnd.abstract import build_table_from_rows
 from logic.roll import Advantage
+from methods import PicklableFile
 
 
 @dataclasses.dataclass
-class AverageDamageResult:
-    hit: str
-    damage: str
-    ac: int
+class AverageDamageSweep:
+    """Average damage of an attack against a range of ACs (or DCs) at once, for a single advantage."""
+
     advantage: Advantage
+    attacks: int
 
-    hit_chance: float
-    miss_chance: float
-    crit_chance: float
+    # Chances for each AC in the sweep
+    hit_chance: npt.NDArray[np.float64]
+    miss_chance: npt.NDArray[np.float64]
+    crit_chance: npt.NDArray[np.float64]
 
-    hit_avg_damage: float
-    miss_avg_damage: float
-    crit_avg_damage: float
+    hit_damage: DiceDistribution
+    miss_damage: DiceDistribution
+    crit_damage: DiceDistribution
 
-    avg_damage: float
+    @property
+    def avg_damage(self) -> npt.NDArray[np.float64]:
+        avg_per_attack = (
+            self.hit_chance * self.hit_damage.mean()
+            + self.miss_chance * self.miss_damage.mean()
+            + self.crit_chance * self.crit_damage.mean()
+        )
+        return avg_per_attack * self.attacks
+
+    def round_damage(self, index: int) -> DenseDistribution:
+        """Distribution of the total damage of all attacks in a round, against the AC at `index` in the sweep."""
+        attack = DenseDistribution.mixture(
+            [
+                (float(self.hit_chance[index]), to_dense(self.hit_damage)),
+                (float(self.miss_chance[index]), to_dense(self.miss_damage)),
+                (float(self.crit_chance[index]), to_dense(self.crit_damage)),
+            ]
+        )
+        return attack.repeated(self.attacks)
 
 
 def double_dice_in_expression(expression: str) -> str:
@@ -43,83 +71,81 @@ def double_dice_in_expression(expression: str) -> str:
 
 
 def _calculate_hit_chances(
-    hit: str, ac: int, advantage: Advantage, crit_min: int, ignore_crit: bool
-) -> tuple[float, float, float]:
+    hit: str, acs: npt.NDArray[np.int64], advantage: Advantage, crit_min: int, ignore_crit: bool
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Calculates the hit, miss and crit chances against every AC at once. The odds are added up in the same order
+    as when each AC is calculated on its own, so the averages are identical down to the last digit.
+    """
     d20_hit = dice_distribution("1d20", advantage)
     hit_bonus = dice_distribution(hit)
 
     # Calculate the hit chances
-    crit_miss_values: set[int] = set([1])  # Always crit fail on a 1
-    crit_hit_values: set[int] = set(range(crit_min, 21))
+    rolls = np.arange(1, 21)
+    crit_miss_rolls = rolls == 1  # Always crit fail on a 1
+    crit_hit_rolls = rolls >= crit_min
     if ignore_crit:
-        crit_miss_values = set()
-        crit_hit_values = set()
-    other_roll_values = set(range(1, 21)) - crit_miss_values - crit_hit_values
+        crit_miss_rolls[:] = False
+        crit_hit_rolls[:] = False
+    other_rolls = rolls[~(crit_miss_rolls | crit_hit_rolls)].tolist()
 
-    crit_miss_chance = sum(d20_hit.get(r) for r in crit_miss_values)
-    crit_hit_chance = sum(d20_hit.get(r) for r in crit_hit_values)
+    crit_miss_chance = sum(d20_hit.get(r) for r in rolls[crit_miss_rolls].tolist())
+    crit_hit_chance = sum(d20_hit.get(r) for r in rolls[crit_hit_rolls].tolist())
 
-    normal_hit_chance = 0
-    normal_miss_chance = 0
+    # Odds and total of each combination of a non-critical d20 roll and the hit bonus, starting with an empty
+    # combination so there is always something to add up.
+    bonuses = hit_bonus.keys()
+    odds = np.outer([d20_hit.get(r) for r in other_rolls], [hit_bonus.get(b) for b in bonuses]).ravel()
+    odds = np.concatenate(([0.0], odds))
+    totals = np.concatenate(([0], np.add.outer(other_rolls, bonuses).ravel()))
 
-    for value in other_roll_values:
-        for bonus in hit_bonus.keys():
-            odds = d20_hit.get(value) * hit_bonus.get(bonus)
-            total = value + bonus
-            if total >= ac:
-                normal_hit_chance += odds
-            else:
-                normal_miss_chance += odds
+    # Unlike sum(), cumsum() adds the combinations one by one, the same as a loop over each AC would
+    hits = totals >= acs[:, np.newaxis]
+    normal_hit_chance = np.cumsum(np.where(hits, odds, 0.0), axis=1)[:, -1]
+    normal_miss_chance = np.cumsum(np.where(hits, 0.0, odds), axis=1)[:, -1]
 
     miss_chance = normal_miss_chance + crit_miss_chance
-    assert abs(normal_hit_chance + miss_chance + crit_hit_chance - 1) < 1e-6
-    return normal_hit_chance, miss_chance, crit_hit_chance
+    crit_chance = np.full(len(acs), crit_hit_chance)
+    assert np.all(np.abs(normal_hit_chance + miss_chance + crit_chance - 1) < 1e-6)
+    return normal_hit_chance, miss_chance, crit_chance
 
 
 def _average_damage(
     hit: str,
     damage: str,
-    ac: int,
+    acs: list[int],
     advantage: Advantage,
     crit_min: int,
     miss_damage_expr: str = "0",
     ignore_crit: bool = False,
     attacks: int = 1,
-) -> AverageDamageResult:
+) -> AverageDamageSweep:
+    ac_array = np.array(acs, dtype=np.int64)
+
     # Unlike other advantages, savage attacker should apply advantage to the
     # *damage* and not the hit chances!
     if advantage == Advantage.SAVAGE_ATTACKER:
-        hit_chance, miss_chance, crit_chance = _calculate_hit_chances(hit, ac, Advantage.NORMAL, crit_min, ignore_crit)
+        hit_chance, miss_chance, crit_chance = _calculate_hit_chances(hit, ac_array, Advantage.NORMAL, crit_min, ignore_crit)
 
         hit_damage = dice_distribution(damage, advantage=Advantage.SAVAGE_ATTACKER)
         miss_damage = dice_distribution(miss_damage_expr, advantage=Advantage.SAVAGE_ATTACKER)
         crit_damage = dice_distribution(double_dice_in_expression(damage), advantage=Advantage.SAVAGE_ATTACKER)
     else:
-        hit_chance, miss_chance, crit_chance = _calculate_hit_chances(hit, ac, advantage, crit_min, ignore_crit)
+        hit_chance, miss_chance, crit_chance = _calculate_hit_chances(hit, ac_array, advantage, crit_min, ignore_crit)
 
         hit_damage = dice_distribution(damage)
         miss_damage = dice_distribution(miss_damage_expr)
         crit_damage = dice_distribution(double_dice_in_expression(damage))
 
-    hit_avg = hit_damage.mean()
-    miss_avg = miss_damage.mean()
-    crit_avg = crit_damage.mean()
-
-    avg_per_attack = (hit_chance * hit_avg) + (miss_chance * miss_avg) + (crit_chance * crit_avg)
-    avg = avg_per_attack * attacks
-
-    return AverageDamageResult(
-        hit=hit,
-        damage=damage,
-        ac=ac,
+    return AverageDamageSweep(
         advantage=advantage,
+        attacks=attacks,
         hit_chance=hit_chance,
         miss_chance=miss_chance,
         crit_chance=crit_chance,
-        hit_avg_damage=hit_avg,
-        miss_avg_damage=miss_avg,
-        crit_avg_damage=crit_avg,
-        avg_damage=avg,
+        hit_damage=hit_damage,
+        miss_damage=miss_damage,
+        crit_damage=crit_damage,
     )
 
 
@@ -136,10 +162,12 @@ class AverageDamageResultsBase(ABC):
     x_values: list[int]
     advantages: list[Advantage]
     data: dict[tuple[int, Advantage], float]
+    sweeps: dict[Advantage, AverageDamageSweep]
 
     chart: discord.File
     csv: discord.File
     table: str
+    round_summary: str | None  # Additional details about the damage per round, if requested by the user
 
     damage: str
     miss_damage: str
@@ -149,17 +177,26 @@ class AverageDamageResultsBase(ABC):
         x_values: list[int],
         damage: str,
         miss_damage: str,
-        calc_func: Callable[[int, Advantage], AverageDamageResult],
+        calc_func: Callable[[list[int], Advantage], AverageDamageSweep],
     ):
         self.x_values = x_values
         self.advantages = [Advantage.NORMAL, Advantage.ADVANTAGE, Advantage.DISADVANTAGE]
         self.damage = damage.strip().replace(" ", "").lower()
         self.miss_damage = miss_damage.strip().replace(" ", "").lower()
         self.data = {}
+        self.round_summary = None
 
-        for x in self.x_values:
-            for adv in Advantage.values():
-                self.data[(x, adv)] = calc_func(x, adv).avg_damage
+        # Reject expensive expressions before calculating any of the averages. Crits double the dice and
+        # savage attacker rolls damage twice, so those are the most expensive variants of each expression.
+        for expr in (damage, miss_damage):
+            check_distribution_cost(double_dice_in_expression(expr), Advantage.SAVAGE_ATTACKER)
+
+        self.sweeps = {}
+        for adv in Advantage.values():
+            sweep = calc_func(self.x_values, adv)
+            self.sweeps[Advantage(adv)] = sweep
+            for x, avg in zip(self.x_values, sweep.avg_damage.tolist()):
+                self.data[(x, adv)] = avg
 
         self.chart = self.generate_chart()
         self.csv = self.generate_csv()
@@ -190,7 +227,7 @@ class AverageDamageResultsBase(ABC):
         buffer.seek(0)
 
         filename = f"average_chart_{int(time.time())}.png"
-        return discord.File(fp=buffer, filename=filename)
+        return PicklableFile(fp=buffer, filename=filename)
 
     def _headers(self, advantages: list[Advantage]) -> list[str]:
         return [self.label, *[adv.capitalize() for adv in advantages]]
@@ -207,7 +244,7 @@ class AverageDamageResultsBase(ABC):
 
         bytes_buffer = io.BytesIO(buffer.getvalue().encode("utf-8"))
         bytes_buffer.seek(0)
-        return discord.File(fp=bytes_buffer, filename=f"damage_vs_{self.label}_{int(time.time())}.csv")
+        return PicklableFile(fp=bytes_buffer, filename=f"damage_vs_{self.label}_{int(time.time())}.csv")
 
     def generate_table(self) -> str:
         headers = self._headers(self.advantages)
@@ -236,9 +273,13 @@ class AverageDamageResultsBase(ABC):
 
 
 class AverageDamageACResults(AverageDamageResultsBase):
+    PERCENTILES = (10, 25, 50, 75, 90)
+
     hit_expr: str
     crit_min: int
     attacks: int
+    target_ac: int | None
+    target_hp: int | None
 
     def __init__(
         self,
@@ -249,19 +290,58 @@ class AverageDamageACResults(AverageDamageResultsBase):
         crit_min: int,
         miss_damage: str,
         attacks: int,
+        target_ac: int | None = None,
+        target_hp: int | None = None,
     ) -> None:
         hit = hit.lstrip("+").replace(" ", "")
         self.hit_expr = f"1d20+{hit}" if not hit.startswith("-") else f"1d20{hit}"
         self.crit_min = crit_min
         self.attacks = attacks
+        self.target_ac = target_ac
+        self.target_hp = target_hp
         acs = list(range(min(min_ac, max_ac), max(min_ac, max_ac) + 1))
+        if target_ac is not None and target_ac not in acs:
+            raise ValueError(f"The target AC must be between {acs[0]} and {acs[-1]}!")
 
         super().__init__(
             x_values=acs,
             damage=damage,
             miss_damage=miss_damage,
-            calc_func=lambda ac, adv: _average_damage(hit, damage, ac, adv, crit_min, miss_damage, attacks=attacks),
+            calc_func=lambda acs, adv: _average_damage(hit, damage, acs, adv, crit_min, miss_damage, attacks=attacks),
         )
+        self.round_summary = self.generate_round_summary()
+
+    def round_damage(self, ac: int, advantage: Advantage) -> DenseDistribution:
+        """Distribution of the total damage dealt in a round of attacks against an AC."""
+        return self.sweeps[advantage].round_damage(self.x_values.index(ac))
+
+    def kill_chance(self, ac: int, advantage: Advantage, hp: int) -> float:
+        """Odds of dealing at least `hp` damage in a round of attacks against an AC."""
+        return self.round_damage(ac, advantage).get_at_least(hp)
+
+    @property
+    def summary_ac(self) -> int | None:
+        """The AC used for the round summary, defaults to the middle of the AC range."""
+        if self.target_ac is None and self.target_hp is None:
+            return None
+        if self.target_ac is not None:
+            return self.target_ac
+        return self.x_values[len(self.x_values) // 2]
+
+    def generate_round_summary(self) -> str | None:
+        ac = self.summary_ac
+        if ac is None:
+            return None
+
+        lines = [f"**Damage per round vs AC {ac}** (percentiles)"]
+        for adv in self.advantages:
+            dist = self.round_damage(ac, adv)
+            line = " · ".join(f"{percent}th: {dist.percentile(percent)}" for percent in self.PERCENTILES)
+            line = f"{adv.value.title()}: {line}"
+            if self.target_hp is not None:
+                line += f" · Kill ({self.target_hp} HP): {100 * self.kill_chance(ac, adv, self.target_hp):.2f}%"
+            lines.append(line)
+        return "\n".join(lines)
 
     @property
     def label(self) -> str:
@@ -312,9 +392,9 @@ class AverageDamageDCResults(AverageDamageResultsBase):
             x_values=mods,
             damage=damage,
             miss_damage=miss_damage,
-            calc_func=lambda mod, adv: _average_damage(
-                str(mod), miss_damage, dc, adv, 20, damage, True
-            ),  # Swap damage/miss_damage and use ignore_crit for Save DCs
+            # Rolling 1d20+mod against the DC is the same as rolling 1d20 against DC-mod. Swap
+            # damage/miss_damage and use ignore_crit for Save DCs
+            calc_func=lambda mods, adv: _average_damage("0", miss_damage, [dc - mod for mod in mods], adv, 20, damage, True),
         )
 
     @property
@@ -1,4 +1,3 @@
-import time
 from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import Any
@@ -101,6 +100,11 @@ class ConfigHandler(JsonHandler[GuildConfig]):
             return
         super().save()
 
+    async def save_async(self):
+        if not self.guild:
+            return
+        await super().save_async()
+
     @property
     def config(self) -> GuildConfig:
         return self.data["config"]
@@ -252,23 +256,18 @@ class ConfigHandler(JsonHandler[GuildConfig]):
 
 class GlobalConfigHandler(JsonFolderHandler[ConfigHandler]):
     _handler_type = ConfigHandler
+    _max_entries = 1000
 
     def _itr_key(self, itr: discord.Interaction[discord.Client]) -> int:
         if not itr.guild_id:
             return -1
         return itr.guild_id
 
-    def get(self, itr: discord.Interaction[discord.Client]) -> ConfigHandler:
+    def _create_handler(self, itr: discord.Interaction[discord.Client], key: int) -> ConfigHandler:
         # Some of the functionality of ConfigHandler requires the specific guild object
         # (e.g. for managing roles). As such, the guild object needs to be stored inside
-        # the handler object. Because `get` only works on the key, and not on the actual
-        # interaction, this method needs to be overwritten.
-
-        key = self._itr_key(itr)
-        if key not in self._data:
-            self._data[key] = ConfigHandler(itr.guild)
-        self._last_accessed[key] = int(time.time())
-        return self._data[key]
+        # the handler object, instead of only creating the handler from the key.
+        return ConfigHandler(itr.guild)
 
 
 Config = GlobalConfigHandler()
@@ -1,3 +1,4 @@
+import logging
 import re
 from dataclasses import dataclass
 from typing import Any
@@ -8,7 +9,8 @@ from discord.app_commands import Choice
 
 from logic.coin import CoinResult
 from logic.dnd.data import Data
-from logic.jsonhandler import JsonFolderHandler, JsonHandler
+from logic.jsonhandler import JournaledJsonHandler, JsonFolderHandler
+from logic.storage import LogRecord, SerializationFormat
 from logic.voice_chat import SPECIAL_ROLL_REASONS
 
 
@@ -16,6 +18,14 @@ def _normalize_key(key: str) -> str:
     return key.strip().lower().replace(" ", "")
 
 
+def _push_recent(values: list[str], value: str, limit: int = 5) -> list[str]:
+    """Moves a value to the end of the list, keeping only the last `limit` values."""
+    if value in values:
+        values.remove(value)
+    values.append(value)
+    return values[-limit:]
+
+
 def default_dicecache_trie() -> dict[str, int]:
     return {
         "1d10red": 3,  # Cyberpunk Red roll
@@ -46,6 +56,10 @@ class DiceCacheInfo:
             coin=obj.get("coin", []),
         )
 
+    @classmethod
+    def empty(cls) -> "DiceCacheInfo":
+        return cls(rolls=[], reasons=[], grouproll={}, trie={}, coin=[])
+
 
 class DiceCacheTrie:
     _data: DiceCacheInfo
@@ -60,8 +74,17 @@ class DiceCacheTrie:
         if not expression:
             return
 
-        count: int = self._trie.get(expression, 0)  # type: ignore
-        self._trie[expression] = count + 1
+        self.set(expression, self.count(expression) + 1)
+
+    def count(self, expression: str) -> int:
+        return self._trie.get(_normalize_key(expression), 0)  # type: ignore
+
+    def set(self, expression: str, count: int):
+        expression = _normalize_key(expression)
+        if not expression:
+            return
+
+        self._trie[expression] = count
         self._data.trie = dict(self._trie.items())  # type: ignore
 
     def get_suggestions(self, expression: str, limit: int) -> list[str]:
@@ -96,13 +119,19 @@ class DiceCacheTrie:
         self._data.trie = dict(self._trie.items())  # type: ignore
 
 
-class DiceCacheHandler(JsonHandler[DiceCacheInfo]):
-    _trie: DiceCacheTrie
+class DiceCacheHandler(JournaledJsonHandler[DiceCacheInfo]):
+    """
+    Every roll changes the user's dice cache, so changes are stored as small records in the
+    change log instead of rewriting the user's whole cache on every roll.
+    """
+
+    _format = SerializationFormat.MSGPACK
+    _trie: DiceCacheTrie | None = None
 
     def __init__(self, user_id: int):
         super().__init__(str(user_id), "user_cache")
         if not self.data:
-            self.cache = DiceCacheInfo(rolls=[], reasons=[], grouproll={}, trie={}, coin=[])
+            self.cache = DiceCacheInfo.empty()
         self._trie = DiceCacheTrie(self.cache)
 
     @property
@@ -116,39 +145,51 @@ class DiceCacheHandler(JsonHandler[DiceCacheInfo]):
     def deserialize(self, obj: Any) -> DiceCacheInfo:
         return DiceCacheInfo.fromdict(obj)
 
+    def apply(self, record: LogRecord):
+        if not self.data:
+            self.cache = DiceCacheInfo.empty()
+
+        match record:
+            case ["roll", str(expression), int(count)]:
+                self.cache.rolls = _push_recent(self.cache.rolls, expression)  # Store max 5 expressions
+                if self._trie is not None:
+                    self._trie.set(expression, count)
+                elif key := _normalize_key(expression):
+                    # Replaying while loading, the trie is built from the cache afterwards
+                    self.cache.trie[key] = count
+            case ["roll", str(expression)]:
+                # Logged before records stored the resulting count
+                self.cache.rolls = _push_recent(self.cache.rolls, expression)
+                if self._trie is not None:
+                    self._trie.add(expression)
+                elif key := _normalize_key(expression):
+                    self.cache.trie[key] = self.cache.trie.get(key, 0) + 1
+            case ["reason", str(reason)]:
+                self.cache.reasons = _push_recent(self.cache.reasons, reason)  # Store max 5 reasons
+            case ["grouproll", str(reason), str(modifier)]:
+                self.cache.grouproll[reason] = modifier
+            case ["coin", str(expression)]:
+                self.cache.coin = _push_recent(self.cache.coin, expression)
+            case _:
+                logging.warning("Ignoring unknown dice cache record for '%s': %s", self.file_path, record)
+
     def store_expression(self, expression: str):
         """Stores a user's used diceroll input to the cache, if it is without errors."""
-        if expression in self.cache.rolls:
-            self.cache.rolls.remove(expression)
-        self.cache.rolls.append(expression)
-
-        self.cache.rolls = self.cache.rolls[-5:]  # Store max 5 expressions
-        self._trie.add(expression)
-        self.save()
+        # The resulting count is logged instead of an increment, so replaying the record twice doesn't count it twice.
+        count = self._trie.count(expression) + 1 if self._trie is not None else 1
+        self.record("roll", expression, count)
 
     def store_reason(self, reason: str | None):
         if reason is None:
             return
-
-        if reason in self.cache.reasons:
-            self.cache.reasons.remove(reason)
-        self.cache.reasons.append(reason)
-
-        self.cache.reasons = self.cache.reasons[-5:]  # Store max 5 reasons
-        self.save()
+        self.record("reason", reason)
 
     def store_grouproll(self, reason: str, modifier: str):
-        reason = _normalize_key(reason)
-        self.cache.grouproll[reason] = modifier
-        self.save()
+        self.record("grouproll", _normalize_key(reason), modifier)
 
     def store_coin(self, coin: CoinResult):
         expression = coin.expression  # TODO use evaluated expression instead.
-        if expression in self.cache.coin:
-            self.cache.coin.remove(expression)
-        self.cache.coin.append(expression)
-        self.cache.coin = self.cache.coin[-5:]
-        self.save()
+        self.record("coin", expression)
 
     def get_coin_autocomplete_suggestions(self, query: str) -> list[Choice[str]]:
         coins = self.cache.coin
@@ -183,8 +224,9 @@ class DiceCacheHandler(JsonHandler[DiceCacheInfo]):
             if query in roll.lower():
                 add_suggestion(roll)
 
-        for roll in self._trie.get_suggestions(query, 5 - len(suggestions)):
-            add_suggestion(roll)
+        if self._trie is not None:
+            for roll in self._trie.get_suggestions(query, 5 - len(suggestions)):
+                add_suggestion(roll)
 
         return [Choice(name=roll, value=roll) for roll in suggestions[:5]]
 
@@ -0,0 +1,327 @@
+"""
+Static cost estimation of dice expressions. Expressions are analyzed without rolling them, so expensive
+expressions can be rejected before any dice are rolled or any distributions are calculated.
+"""
+
+import dataclasses
+import math
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+MAX_ROLLS = 1000  # Same limit d100 enforces while rolling
+MAX_CONVOLUTION_COST = 50_000_000
+
+# Exploding and rerolling dice can roll indefinitely, their bounds are only exceeded with this probability.
+TAIL_PROBABILITY = 1e-6
+TAIL_DEVIATIONS = 6
+
+if TYPE_CHECKING:
+    from logic.roll import DiceOperation, ExpressionToken
+
+_COMPARISONS = {"==", "!=", ">=", "<=", ">", "<"}
+
+
+class UnsupportedExpression(ValueError):
+    """Raised when an expression uses syntax which the cost analyzer does not understand."""
+
+
+@dataclasses.dataclass(frozen=True)
+class ExpressionCost:
+    rolls: int  # Amount of dice rolled, except in extremely unlikely cases of exploding or rerolling dice
+    min_rolls: int  # Amount of dice which are always rolled
+    minimum: float
+    maximum: float
+    support: int  # Upper bound on the amount of distinct results
+    convolution: int  # Estimate of the amount of work required to calculate the distribution
+
+    @property
+    def too_many_rolls(self) -> bool:
+        """Whether rolling the expression is certain to exceed the roll limit."""
+        return self.min_rolls > MAX_ROLLS
+
+    @property
+    def too_expensive(self) -> bool:
+        """Whether the expression is too expensive to calculate its distribution, or likely to exceed the roll limit."""
+        return self.rolls > MAX_ROLLS or self.convolution > MAX_CONVOLUTION_COST
+
+    def with_rerolled_dice(self, dice: int, size: int, times: int) -> "ExpressionCost":
+        """Cost of rolling `dice` of the expression's dice `times` times and picking one of them, e.g. for advantage."""
+        extra = (times - 1) * dice
+        return dataclasses.replace(
+            self,
+            rolls=self.rolls + extra,
+            min_rolls=self.min_rolls + extra,
+            convolution=self.convolution + extra * size * size,
+        )
+
+    def repeated(self, times: int) -> "ExpressionCost":
+        """Cost of rolling the expression multiple times and picking one of the results, e.g. for advantage."""
+        return dataclasses.replace(
+            self,
+            rolls=self.rolls * times,
+            min_rolls=self.min_rolls * times,
+            convolution=self.convolution * times,
+        )
+
+
+def _constant(value: float) -> ExpressionCost:
+    return ExpressionCost(rolls=0, min_rolls=0, minimum=value, maximum=value, support=1, convolution=0)
+
+
+def _support(minimum: float, maximum: float, limit: int) -> int:
+    """Amount of distinct results in a range, capped by `limit` when the range is not filled completely."""
+    if not math.isfinite(maximum - minimum):
+        return max(1, limit)  # Huge numbers, e.g. '1d20 * 1e400', have no meaningful range
+    return max(1, min(limit, int(maximum - minimum) + 1))
+
+
+def _combine(left: ExpressionCost, right: ExpressionCost, minimum: float, maximum: float) -> ExpressionCost:
+    """Cost of combining two sub-expressions, which requires every pair of their results to be combined."""
+    pairs = left.support * right.support
+    return ExpressionCost(
+        rolls=left.rolls + right.rolls,
+        min_rolls=left.min_rolls + right.min_rolls,
+        minimum=minimum,
+        maximum=maximum,
+        support=_support(minimum, maximum, pairs),
+        convolution=left.convolution + right.convolution + pairs,
+    )
+
+
+def _rolls_bound(count: int, probability: float) -> int:
+    """
+    Upper bound on the rolls required for `count` dice, if every roll has `probability` of requiring
+    another roll (e.g. when exploding or rerolling).
+    """
+    if probability <= 0:
+        return count
+    if probability >= 1:
+        return MAX_ROLLS + 1  # Never stops rolling
+
+    per_die = 1 + math.ceil(math.log(TAIL_PROBABILITY) / math.log(probability))
+    mean = count / (1 - probability)
+    deviation = math.sqrt(count * probability) / (1 - probability)
+    return min(count * per_die, math.ceil(mean + TAIL_DEVIATIONS * deviation))
+
+
+def _matching_faces(selector: str, value: int, size: int) -> int:
+    """Amount of faces of a die matching a selector, e.g. '>4' matches 2 faces of a d6."""
+    match selector:
+        case ">":
+            return min(size, max(0, size - value))
+        case "<":
+            return min(size, max(0, value - 1))
+        case "":
+            return 1 if 1 <= value <= size else 0
+        case _:
+            raise UnsupportedExpression(f"Unsupported selector '{selector}'")
+
+
+def _kept_dice(operation: str, selector: str, value: int, count: int) -> tuple[int, bool]:
+    """Amount of dice kept by a keep or drop operation, and whether the amount depends on the rolled values."""
+    if selector in ("h", "l"):
+        kept = min(count, value) if operation == "k" else max(0, count - value)
+        return kept, False
+    return count, True
+
+
+def _dice_cost(count: int, size: int, operations: Sequence["DiceOperation"]) -> ExpressionCost:
+    if size < 1:
+        raise UnsupportedExpression("Dice must have at least one face")
+
+    rolls = count
+    min_rolls = count
+    kept = count
+    value_dependent = False
+    low, high = 1, size
+
+    for operation in operations:
+        selector, value = operation.selector, operation.value
+        match operation.operation:
+            case "e":
+                probability = _matching_faces(selector, value, size) / size
+                explosions = _rolls_bound(count, probability) - count
+                rolls += explosions
+                min_rolls += explosions if probability >= 1 else 0
+                high += size * min(explosions, _rolls_bound(1, probability) - 1)
+            case "rr":
+                probability = _matching_faces(selector, value, size) / size
+                rerolls = _rolls_bound(count, probability) - count
+                rolls += rerolls
+                min_rolls += rerolls if probability >= 1 else 0
+            case "ro":
+                rolls += count
+                min_rolls += count if _matching_faces(selector, value, size) == size else 0
+            case "ra":
+                rolls += count
+                min_rolls += count if _matching_faces(selector, value, size) == size else 0
+                high += size
+            case "mi":
+                low, high = max(low, value), max(high, value)
+            case "ma":
+                low, high = min(low, value), min(high, value)
+            case "k" | "p":
+                kept, dependent = _kept_dice(operation.operation, selector, value, kept)
+                value_dependent = value_dependent or dependent
+            case _:
+                raise UnsupportedExpression(f"Unsupported operation '{operation.operation}'")
+
+    die_support = high - low + 1
+    if kept == count and not value_dependent:
+        # Summing dice convolves each die with the sum of the dice before it.
+        convolution = kept * (kept + 1) // 2 * die_support * die_support
+    else:
+        # Keeping or dropping dice requires the order of the dice to be tracked as well.
+        convolution = count * max(kept, 1) * die_support * die_support
+
+    minimum = 0 if value_dependent else kept * low
+    maximum = kept * high
+    return ExpressionCost(
+        rolls=rolls,
+        min_rolls=min_rolls,
+        minimum=minimum,
+        maximum=maximum,
+        support=_support(minimum, maximum, die_support**kept if kept < 64 else MAX_CONVOLUTION_COST),
+        convolution=convolution,
+    )
+
+
+class _CostParser:
+    """Recursive descent parser over the tokens of an expression, which estimates the cost of each node."""
+
+    def __init__(self, tokens: Sequence["ExpressionToken"]):
+        self.tokens = tokens
+        self.position = 0
+
+    def _peek(self) -> "ExpressionToken | None":
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _peek_operator(self) -> str | None:
+        token = self._peek()
+        return token.text if token is not None and token.kind == "operator" else None
+
+    def _consume(self) -> "ExpressionToken":
+        token = self._peek()
+        if token is None:
+            raise UnsupportedExpression("Unexpected end of expression")
+        self.position += 1
+        return token
+
+    def _expect(self, operator: str):
+        if self._consume().text != operator:
+            raise UnsupportedExpression(f"Expected '{operator}'")
+
+    def parse(self) -> ExpressionCost:
+        # Sets don't require parentheses at the top level, e.g. '1d20, 2d20'.
+        elements = self._elements()
+        if (token := self._peek()) is not None:
+            raise UnsupportedExpression(f"Unexpected token '{token.text}'")
+        return elements[0] if len(elements) == 1 else _set_cost(elements)
+
+    def _elements(self) -> list[ExpressionCost]:
+        elements = [self._comparison()]
+        while self._peek_operator() == ",":
+            self._consume()
+            if self._peek() is None or self._peek_operator() == ")":
+                break
+            elements.append(self._comparison())
+        return elements
+
+    def _comparison(self) -> ExpressionCost:
+        left = self._sum()
+        while self._peek_operator() in _COMPARISONS:
+            self._consume()
+            left = _combine(left, self._sum(), 0, 1)
+        return left
+
+    def _sum(self) -> ExpressionCost:
+        left = self._product()
+        while (operator := self._peek_operator()) in ("+", "-"):
+            self._consume()
+            right = self._product()
+            if operator == "+":
+                left = _combine(left, right, left.minimum + right.minimum, left.maximum + right.maximum)
+            else:
+                left = _combine(left, right, left.minimum - right.maximum, left.maximum - right.minimum)
+        return left
+
+    def _product(self) -> ExpressionCost:
+        left = self._unary()
+        while (operator := self._peek_operator()) in ("*", "/", "//", "%"):
+            self._consume()
+            right = self._unary()
+            if operator == "*":
+                corners = [a * b for a in (left.minimum, left.maximum) for b in (right.minimum, right.maximum)]
+                left = _combine(left, right, min(corners), max(corners))
+            elif operator == "%":
+                bound = max(abs(right.minimum), abs(right.maximum))
+                left = _combine(left, right, -bound, bound)
+            else:
+                bound = max(abs(left.minimum), abs(left.maximum))
+                left = _combine(left, right, -bound, bound)
+        return left
+
+    def _unary(self) -> ExpressionCost:
+        operator = self._peek_operator()
+        if operator == "-":
+            self._consume()
+            cost = self._unary()
+            return dataclasses.replace(cost, minimum=-cost.maximum, maximum=-cost.minimum)
+        if operator == "+":
+            self._consume()
+            return self._unary()
+        return self._atom()
+
+    def _atom(self) -> ExpressionCost:
+        token = self._consume()
+        if token.kind == "dice":
+            cost = _dice_cost(token.count, token.size, token.operations)
+        elif token.kind == "number":
+            cost = _constant(token.value)
+        elif token.text == "(":
+            cost = self._set()
+        else:
+            raise UnsupportedExpression(f"Unexpected token '{token.text}'")
+
+        # Annotations, e.g. '1d6 [fire]', do not change the result.
+        while (token := self._peek()) is not None and token.kind == "annotation":
+            self._consume()
+        return cost
+
+    def _set(self) -> ExpressionCost:
+        elements = self._elements()
+        self._expect(")")
+
+        operations = None
+        if (token := self._peek()) is not None and token.kind == "set_operations":
+            operations = self._consume()
+        if len(elements) == 1 and operations is None:
+            return elements[0]
+        return _set_cost(elements)
+
+
+def _set_cost(elements: Sequence[ExpressionCost]) -> ExpressionCost:
+    # Keeping or dropping elements requires every combination of the elements' results.
+    minimum = sum(min(0, element.minimum) for element in elements)
+    maximum = sum(max(0, element.maximum) for element in elements)
+    combinations = math.prod(element.support for element in elements)
+    return ExpressionCost(
+        rolls=sum(element.rolls for element in elements),
+        min_rolls=sum(element.min_rolls for element in elements),
+        minimum=minimum,
+        maximum=maximum,
+        support=_support(minimum, maximum, combinations),
+        convolution=sum(element.convolution for element in elements) + combinations,
+    )
+
+
+def estimate_cost(tokens: Sequence["ExpressionToken"]) -> ExpressionCost | None:
+    """
+    Estimates the cost of rolling an expression and calculating its distribution, based on the tokens of the
+    expression's cleaned form (see `tokenize_expression`). Returns None if the expression uses syntax the
+    analyzer does not support.
+    """
+    try:
+        return _CostParser(tokens).parse()
+    except UnsupportedExpression:
+        return None
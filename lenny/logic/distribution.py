@@ -1,26 +1,36 @@
 import dataclasses
-import io
-import itertools
+import functools
+import logging
 import math
+import time
 
 import d100
 import discord
 import matplotlib
-import matplotlib.axes
-import matplotlib.figure
-import matplotlib.legend
+import matplotlib.patches
 import numpy as np
+import numpy.typing as npt
 from d100.distribution import Distribution
 from matplotlib import pyplot as plt
 
+from logic.charts import convert_and_close_fig, empty_distribution_chart, style_legend
 from logic.color import (
     ColorRGBFloat,
     UserColor,
     hue_shift_n_colors_from_base,
     lerp_float_colors,
 )
-from logic.roll import Advantage, clean_expression, parse
-from methods import ChoicedEnum
+from logic.distributioncache import COMMON_EXPRESSIONS, DistributionDisk
+from logic.roll import (
+    Advantage,
+    clean_expression,
+    dice_rng,
+    expression_cost,
+    parse,
+    roll_batch,
+    sum_terms,
+)
+from methods import ChoicedEnum, PicklableFile
 
 # Required to calculate the chart in a separate thread, https://stackoverflow.com/questions/27147300/matplotlib-tcl-asyncdelete-async-handler-deleted-by-the-wrong-thread
 matplotlib.use("Agg")
@@ -31,22 +41,479 @@ class DistributionChartStyle(ChoicedEnum):
     OVERLAP = "overlap"
 
 
-def dice_distribution(expression: str, advantage: Advantage = Advantage.NORMAL):
-    parsed, _ = parse(expression, advantage)
-    return d100.distribution(parsed)
+DENSE_MAX_SUPPORT = 1_000_000
+DENSE_MAX_KEEP_COST = 250_000
+FFT_CONVOLUTION_THRESHOLD = 250_000
+
+SIMULATION_SAMPLES = 1_000_000
+SIMULATION_TIME_BUDGET = 1.0  # seconds
+SIMULATION_CHUNK_SIZE = 4_000_000  # Maximum amount of dice rolled at once
+SIMULATION_ROLL_BATCH = 250  # Rolls done through d100 between checks of the time budget
+CONFIDENCE_Z = 1.96  # 95% confidence intervals
+
+
+class DenseDistribution:
+    """
+    Distribution stored as a dense array of probabilities, where index `i` holds the probability of
+    `offset + i`. Mirrors the methods of d100's Distribution which are used by the bot.
+    """
+
+    probabilities: npt.NDArray[np.float64]
+    offset: int
+
+    def __init__(self, probabilities: npt.NDArray[np.float64], offset: int):
+        self.probabilities = probabilities
+        self.offset = offset
+
+    @classmethod
+    def constant(cls, value: int) -> "DenseDistribution":
+        return cls(np.ones(1), value)
+
+    @classmethod
+    def die(cls, size: int) -> "DenseDistribution":
+        return cls(np.full(size, 1 / size), 1)
+
+    def keys(self) -> list[int]:
+        return (np.flatnonzero(self.probabilities) + self.offset).tolist()
+
+    def get(self, key: int) -> float:
+        index = key - self.offset
+        if 0 <= index < len(self.probabilities):
+            return float(self.probabilities[index])
+        return 0.0
+
+    def get_at_least(self, key: int) -> float:
+        return float(self.probabilities[max(0, key - self.offset) :].sum())
+
+    def min(self) -> int:
+        return self.offset
+
+    def max(self) -> int:
+        return self.offset + len(self.probabilities) - 1
+
+    def mean(self) -> float:
+        values = np.arange(self.min(), self.max() + 1)
+        return float((values * self.probabilities).sum())
+
+    def stdev(self) -> float:
+        values = np.arange(self.min(), self.max() + 1)
+        variance = ((values - self.mean()) ** 2 * self.probabilities).sum()
+        return math.sqrt(float(variance))
+
+    def percentile(self, percent: float) -> int:
+        """The lowest result which is at least as high as `percent` percent of all results."""
+        cumulative = np.cumsum(self.probabilities)
+        index = int(np.searchsorted(cumulative, percent / 100 - 1e-9))
+        return self.offset + min(index, len(self.probabilities) - 1)
+
+    @classmethod
+    def mixture(cls, weighted: list[tuple[float, "DenseDistribution"]]) -> "DenseDistribution":
+        """Distribution of picking one of the distributions, each with the given chance."""
+        offset = min(dist.min() for _, dist in weighted)
+        probabilities = np.zeros(max(dist.max() for _, dist in weighted) - offset + 1)
+        for chance, dist in weighted:
+            start = dist.offset - offset
+            probabilities[start : start + len(dist.probabilities)] += chance * dist.probabilities
+        return cls(probabilities, offset)
+
+    def __add__(self, other: "DenseDistribution") -> "DenseDistribution":
+        return DenseDistribution(_convolve(self.probabilities, other.probabilities), self.offset + other.offset)
+
+    def __neg__(self) -> "DenseDistribution":
+        return DenseDistribution(self.probabilities[::-1].copy(), -self.max())
+
+    def scaled(self, factor: int) -> "DenseDistribution":
+        """Distribution of the result multiplied by a positive integer."""
+        probabilities = np.zeros((len(self.probabilities) - 1) * factor + 1)
+        probabilities[::factor] = self.probabilities
+        return DenseDistribution(probabilities, self.offset * factor)
+
+    def repeated(self, count: int) -> "DenseDistribution":
+        """Distribution of the sum of `count` independent results, using exponentiation by squaring."""
+        result = DenseDistribution.constant(0)
+        power = self
+        while count > 0:
+            if count & 1:
+                result = result + power
+            count >>= 1
+            if count:
+                power = power + power
+        return result
+
+    def highest_of(self, count: int) -> "DenseDistribution":
+        """Distribution of the highest of `count` independent results."""
+        cumulative = np.cumsum(self.probabilities) ** count
+        return DenseDistribution(np.diff(cumulative, prepend=0.0), self.offset)
+
+    def lowest_of(self, count: int) -> "DenseDistribution":
+        """Distribution of the lowest of `count` independent results."""
+        return -((-self).highest_of(count))
+
+
+def _convolve(a: npt.NDArray[np.float64], b: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    if len(a) * len(b) <= FFT_CONVOLUTION_THRESHOLD:
+        return np.convolve(a, b)
+
+    length = len(a) + len(b) - 1
+    size = 1 << (length - 1).bit_length()
+    result = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)[:length]
+    return np.clip(result, 0.0, None)  # FFT rounding errors can result in slightly negative probabilities
+
+
+def _kept_dice_distribution(count: int, size: int, kept: int, highest: bool) -> DenseDistribution:
+    """
+    Distribution of the sum of the highest (or lowest) `kept` dice out of `count` dice. Faces are assigned
+    from the highest face down (or lowest up), tracking how many dice have been assigned and the sum of the
+    dice kept so far.
+    """
+    width = kept * size + 1
+    states = np.zeros((count + 1, width))
+    states[0, 0] = 1.0
+    faces = range(size, 0, -1) if highest else range(1, size + 1)
+
+    for face in faces:
+        updated = np.zeros_like(states)
+        for assigned in range(count + 1):
+            row = states[assigned]
+            if not row.any():
+                continue
+            remaining = count - assigned
+            for amount in range(remaining + 1):
+                shift = min(amount, max(0, kept - assigned)) * face
+                weight = math.comb(remaining, amount) * (1 / size) ** amount
+                updated[assigned + amount, shift:] += weight * row[: width - shift]
+        states = updated
+
+    return DenseDistribution(states[count, kept:].copy(), kept)
+
+
+@dataclasses.dataclass(frozen=True)
+class _DenseTerm:
+    sign: int
+    factor: int
+    count: int  # 0 for constants
+    size: int  # The constant's value for constants
+    keep: str | None = None  # 'kh' or 'kl'
+    kept: int = 0
+
+    @property
+    def is_d20(self) -> bool:
+        return self.count == 1 and self.size == 20 and self.keep is None
+
+    @property
+    def width(self) -> int:
+        dice = min(self.count, self.kept) if self.keep else self.count
+        return self.factor * dice * self.size
+
+    @property
+    def keep_cost(self) -> int:
+        """Amount of steps required to calculate the distribution of the kept dice."""
+        return self.size * (self.count + 1) * (self.count + 2) // 2 if self.keep and self.kept < self.count else 0
+
+    def distribution(self, advantage: Advantage) -> DenseDistribution:
+        if self.count == 0:
+            result = DenseDistribution.constant(self.size)
+        elif self.keep and self.kept < self.count:
+            result = _kept_dice_distribution(self.count, self.size, self.kept, highest=self.keep == "kh")
+        else:
+            result = DenseDistribution.die(self.size).repeated(self.count)
+
+        if self.is_d20:
+            match advantage:
+                case Advantage.ADVANTAGE:
+                    result = result.highest_of(2)
+                case Advantage.ELVEN_ACCURACY:
+                    result = result.highest_of(3)
+                case Advantage.DISADVANTAGE:
+                    result = result.lowest_of(2)
+                case _:
+                    ...
+
+        if self.factor != 1:
+            result = result.scaled(self.factor)
+        return -result if self.sign < 0 else result
+
+    def sample(self, advantage: Advantage, samples: int) -> npt.NDArray[np.int64]:
+        """Rolls the term `samples` times at once."""
+        if self.count == 0:
+            return np.full(samples, self.sign * self.size, dtype=np.int64)
+
+        if self.is_d20 and advantage in (Advantage.ADVANTAGE, Advantage.DISADVANTAGE, Advantage.ELVEN_ACCURACY):
+            rolls = dice_rng.array(20, (samples, 3 if advantage == Advantage.ELVEN_ACCURACY else 2))
+            values = rolls.min(axis=1) if advantage == Advantage.DISADVANTAGE else rolls.max(axis=1)
+        elif self.keep and self.kept < self.count:
+            rolls = np.sort(dice_rng.array(self.size, (samples, self.count)), axis=1)
+            kept = rolls[:, self.count - self.kept :] if self.keep == "kh" else rolls[:, : self.kept]
+            values = kept.sum(axis=1)
+        else:
+            values = dice_rng.array(self.size, (samples, self.count)).sum(axis=1)
+        return self.sign * self.factor * values
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_terms(cleaned: str, advantage: Advantage) -> tuple[_DenseTerm, ...] | None:
+    """
+    Splits an expression into sums of dice and numbers, e.g. '2d6 + 1d20kh1 - 3'. Returns None if the
+    expression has any other syntax.
+    """
+    sums = sum_terms(cleaned)
+    if sums is None:
+        return None
+
+    terms: list[_DenseTerm] = []
+    for term in sums:
+        dice = term.dice
+        if dice is None:
+            terms.append(_DenseTerm(term.sign, 1, 0, term.constant))
+            continue
+        if dice.count == 0 or len(dice.operations) > 1:
+            return None
+
+        keep, kept = None, 0
+        if dice.operations:
+            operation = dice.operations[0]
+            if operation.operation != "k" or operation.selector not in ("h", "l"):
+                return None
+            keep, kept = f"k{operation.selector}", operation.value
+        terms.append(_DenseTerm(term.sign, term.factor, dice.count, dice.size, keep, kept))
+
+    if any(term.count and (term.size < 1 or term.factor < 1) for term in terms):
+        return None
+
+    # Advantage is applied to the expression's d20, only a single plain d20 is supported.
+    d20_terms = [term for term in terms if term.size == 20 and term.count]
+    if advantage in (Advantage.ADVANTAGE, Advantage.DISADVANTAGE, Advantage.ELVEN_ACCURACY) and d20_terms:
+        if len(d20_terms) != 1 or not d20_terms[0].is_d20:
+            return None
+    return tuple(terms)
+
+
+def _dense_terms(cleaned: str, advantage: Advantage) -> tuple[_DenseTerm, ...] | None:
+    """
+    Terms of an expression which can be calculated as dense distributions. Returns None if the expression
+    has any other syntax or is too large, in which case d100 calculates the distribution.
+    """
+    terms = _parse_terms(cleaned, advantage)
+    if terms is None:
+        return None
+    if sum(term.width for term in terms) > DENSE_MAX_SUPPORT:
+        return None
+    if any(term.keep_cost > DENSE_MAX_KEEP_COST for term in terms):
+        return None
+    return terms
+
+
+def dense_distribution(cleaned: str, advantage: Advantage) -> DenseDistribution | None:
+    """
+    Calculates the distribution of a cleaned expression as numpy convolutions, returns None if the
+    expression is not supported by the dense engine.
+    """
+    terms = _dense_terms(cleaned, advantage)
+    if terms is None:
+        return None
+
+    result = DenseDistribution.constant(0)
+    for term in terms:
+        result = result + term.distribution(advantage)
+
+    # Savage attacker rolls the entire expression twice, and keeps the highest result.
+    if advantage == Advantage.SAVAGE_ATTACKER:
+        result = result.highest_of(2)
+    return result
+
+
+DiceDistribution = Distribution | DenseDistribution
+
+
+def to_dense(dist: DiceDistribution) -> DenseDistribution:
+    """
+    Converts a distribution calculated by d100 into a dense distribution, for use in numpy calculations. Results
+    which aren't whole numbers, e.g. from halving damage with (8d6)/2, are rounded down as D&D does.
+    """
+    if isinstance(dist, DenseDistribution):
+        return dist
+
+    keys = dist.keys()
+    offset = math.floor(min(keys))
+    probabilities = np.zeros(math.floor(max(keys)) - offset + 1)
+    for key in keys:
+        probabilities[math.floor(key) - offset] += dist.get(key)
+    return DenseDistribution(probabilities, offset)
+
+
+class SimulatedDistribution(DenseDistribution):
+    """
+    Approximate distribution, estimated from a histogram of simulated rolls. Used for expressions whose
+    exact distribution is too expensive to calculate.
+    """
+
+    samples: int
+
+    def __init__(self, totals: npt.NDArray[np.float64] | npt.NDArray[np.int64]):
+        # Rounded down like the exact distributions are, e.g. for halved damage
+        totals = np.floor(totals).astype(np.int64)
+        offset = int(totals.min())
+        if int(totals.max()) - offset >= DENSE_MAX_SUPPORT:
+            raise TimeoutError("The results of the expression are too spread out to simulate!")
+
+        super().__init__(np.bincount(totals - offset) / len(totals), offset)
+        self.samples = len(totals)
+
+    def bounds(self, probability: float) -> tuple[float, float]:
+        """95% confidence interval of an estimated probability, using the Wilson score interval."""
+        z2n = CONFIDENCE_Z**2 / self.samples
+        center = (probability + z2n / 2) / (1 + z2n)
+        margin = CONFIDENCE_Z / (1 + z2n) * math.sqrt(probability * (1 - probability) / self.samples + z2n / (4 * self.samples))
+        return max(0.0, center - margin), min(1.0, center + margin)
+
+    def mean_margin(self) -> float:
+        """Half-width of the 95% confidence interval of the estimated mean."""
+        return CONFIDENCE_Z * self.stdev() / math.sqrt(self.samples)
+
+
+def _simulate_terms(terms: tuple[_DenseTerm, ...], advantage: Advantage, deadline: float) -> npt.NDArray[np.int64]:
+    """Rolls all terms of an expression in chunks with numpy, until enough samples are rolled or time runs out."""
+    repeats = 2 if advantage == Advantage.SAVAGE_ATTACKER else 1
+    dice = repeats * max(1, sum(term.count for term in terms))
+    chunk = max(1, min(SIMULATION_SAMPLES, SIMULATION_CHUNK_SIZE // dice))
+
+    chunks: list[npt.NDArray[np.int64]] = []
+    sampled = 0
+    while sampled < SIMULATION_SAMPLES and (not chunks or time.monotonic() < deadline):
+        totals = np.zeros((repeats, chunk), dtype=np.int64)
+        for repeat in range(repeats):
+            for term in terms:
+                totals[repeat] += term.sample(advantage, chunk)
+        # Savage attacker rolls the entire expression twice, and keeps the highest result.
+        chunks.append(totals.max(axis=0))
+        sampled += chunk
+    return np.concatenate(chunks)[:SIMULATION_SAMPLES]
+
+
+def _simulate_rolls(expression: str, advantage: Advantage, deadline: float) -> npt.NDArray[np.float64]:
+    """Rolls an expression through d100 in batches, until enough samples are rolled or time runs out."""
+    totals: list[float] = []
+    while len(totals) < SIMULATION_SAMPLES and (not totals or time.monotonic() < deadline):
+        totals.extend(result.total for result in roll_batch(expression, SIMULATION_ROLL_BATCH, advantage))
+    return np.array(totals, dtype=np.float64)
+
+
+def simulate_distribution(
+    expression: str,
+    advantage: Advantage = Advantage.NORMAL,
+    time_budget: float = SIMULATION_TIME_BUDGET,
+) -> SimulatedDistribution:
+    """
+    Estimates the distribution of an expression by rolling it many times within `time_budget` seconds. Sums of
+    dice are rolled in bulk with numpy, any other expression is rolled through d100.
+    """
+    deadline = time.monotonic() + time_budget
+    terms = _parse_terms(clean_expression(expression), advantage)
+    if terms is not None:
+        return SimulatedDistribution(_simulate_terms(terms, advantage, deadline))
+    return SimulatedDistribution(_simulate_rolls(expression, advantage, deadline))
+
+
+def distribution_too_expensive(expression: str, advantage: Advantage = Advantage.NORMAL) -> bool:
+    """Whether the exact distribution of an expression is estimated to be too expensive to calculate."""
+    if _dense_terms(clean_expression(expression), advantage) is not None:
+        return False  # Calculated by the dense engine, which handles large expressions without issues
+    cost = expression_cost(expression, advantage)
+    return cost is not None and cost.too_expensive
+
+
+def check_distribution_cost(expression: str, advantage: Advantage = Advantage.NORMAL):
+    """Rejects expressions whose distribution is too expensive to calculate, before calculating it."""
+    if distribution_too_expensive(expression, advantage):
+        raise TimeoutError(f"The distribution of '{expression}' is too expensive to calculate!")
+
+
+def _persisted(dist: DiceDistribution) -> DenseDistribution | None:
+    """Dense form of a distribution which can be stored on disk, only distributions of whole numbers are stored."""
+    if isinstance(dist, DenseDistribution):
+        return dist
+    if not all(float(key).is_integer() for key in dist.keys()):
+        return None
+    return to_dense(dist)
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_distribution(cleaned: str, advantage: Advantage) -> DiceDistribution:
+    """
+    Distributions only depend on the expression and advantage, so they are shared between all commands.
+    Cached distributions are shared as well, so they should never be modified. This cache is kept by each worker
+    of the process pool and is lost when a worker is replaced after a timeout. Distributions are also kept in the
+    disk cache if it is enabled, which is shared between restarts and all of the bot's processes.
+    """
+    stored = DistributionDisk.load(cleaned, Advantage(advantage).value)
+    if stored is not None:
+        return DenseDistribution(*stored)
+
+    result = dense_distribution(cleaned, advantage)
+    if result is None:
+        parsed, _ = parse(cleaned, advantage)
+        result = d100.distribution(parsed)
+
+    if DistributionDisk.enabled and (persisted := _persisted(result)) is not None:
+        DistributionDisk.store(cleaned, Advantage(advantage).value, persisted.probabilities, persisted.offset)
+    return result
+
+
+def distribution_cache_info():
+    """Statistics of the in-memory distribution cache, only meaningful inside the workers of the process pool."""
+    return _cached_distribution.cache_info()
+
+
+def warm_distribution_cache(expressions: list[str]) -> int:
+    """
+    Calculates the distributions of common expressions with every advantage, so they are stored in the disk
+    cache before anyone asks for them. Returns the amount of distributions which had to be calculated.
+    """
+    if not DistributionDisk.enabled:
+        return 0
+
+    DistributionDisk.remove_stale_versions()
+    misses = DistributionDisk.misses
+    for expression in dict.fromkeys([*COMMON_EXPRESSIONS, *expressions]):
+        for advantage in Advantage:
+            try:
+                if not distribution_too_expensive(expression, advantage):
+                    _cached_distribution(clean_expression(expression), advantage)
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                logging.debug("Could not warm the distribution of '%s': %s", expression, exception)
+    return DistributionDisk.misses - misses
+
+
+def dice_distribution(expression: str, advantage: Advantage = Advantage.NORMAL) -> DiceDistribution:
+    check_distribution_cost(expression, advantage)
+    return _cached_distribution(clean_expression(expression), advantage)
 
 
 class SingleDistributionResult:
-    distribution: Distribution
+    distribution: DiceDistribution
     advantage: Advantage
     expression: str
     min_to_beat: int | None
 
-    def __init__(self, expr: str, advantage: Advantage, min_to_beat: int | None) -> None:
+    def __init__(
+        self,
+        expr: str,
+        advantage: Advantage,
+        min_to_beat: int | None,
+        simulate: bool = False,
+        time_budget: float = SIMULATION_TIME_BUDGET,
+    ) -> None:
         self.expression = expr
         self.min_to_beat = min_to_beat
         self.advantage = advantage
-        self.distribution = dice_distribution(expr, advantage=advantage)
+        if simulate or distribution_too_expensive(expr, advantage):
+            self.distribution = simulate_distribution(expr, advantage, time_budget)
+        else:
+            self.distribution = dice_distribution(expr, advantage=advantage)
+
+    @property
+    def approximate(self) -> bool:
+        return isinstance(self.distribution, SimulatedDistribution)
 
     @property
     def min_to_beat_odds(self) -> float:
@@ -55,6 +522,13 @@ class SingleDistributionResult:
 
         return self.distribution.get_at_least(self.min_to_beat)
 
+    @property
+    def min_to_beat_bounds(self) -> tuple[float, float] | None:
+        """Confidence interval of the odds to beat `min_to_beat`, only available for approximate distributions."""
+        if self.min_to_beat is None or not isinstance(self.distribution, SimulatedDistribution):
+            return None
+        return self.distribution.bounds(self.min_to_beat_odds)
+
     @property
     def min(self) -> int:
         return self.distribution.min()
@@ -87,64 +561,25 @@ class DistributionResult:
     def max(self) -> int:
         return max(dist.distribution.max() for dist in self.distributions)
 
+    @property
+    def approximate(self) -> bool:
+        return any(dist.approximate for dist in self.distributions)
+
 
 def to_matplotlib_color(color: int) -> tuple[float, float, float]:
     r, g, b = UserColor.to_rgb(color)
     return (r / 255.0, g / 255.0, b / 255.0)
 
 
-def _empty_distribution_chart(keys: list[int]) -> tuple[matplotlib.figure.Figure, matplotlib.axes.Axes]:
-    plt.rcParams["figure.dpi"] = 600
-    fig, ax = plt.subplots(subplot_kw={})  # type: ignore
-
-    max_ticks = 20 / len(str(max(keys)))
-    steps = int(math.ceil(len(keys) / max_ticks))
-    ax.set_xticks(range(min(keys), max(keys) + 1, steps))  # type: ignore
-    ax.yaxis.set_major_formatter("{x:.2f}%")  # Add percent on y-axis
-    ax.tick_params(colors="white")  # type: ignore
-    ax.grid(color="white", alpha=0.3, linewidth=1)  # type: ignore
-    ax.spines["top"].set_color("white")
-    ax.spines["right"].set_color("white")
-    ax.spines["bottom"].set_color("white")
-    ax.spines["left"].set_color("white")
-    ax.set_axisbelow(True)
-
-    return fig, ax
-
-
-def _style_legend(legend: matplotlib.legend.Legend) -> None:
-    frame = legend.get_frame()
-    frame.set_alpha(None)
-    frame.set_facecolor((1, 1, 1, 0.25))
-
-    frame.set_edgecolor("white")
-    frame.set_linewidth(1)
-
-    for text in legend.texts:
-        text.set_color("white")
-
-    for handle in legend.legend_handles:
-        if not handle:
-            continue
-        if hasattr(handle, "set_markeredgecolor"):
-            handle.set_markeredgecolor("white")  # type: ignore
-        if hasattr(handle, "set_markeredgewidth"):
-            handle.set_markeredgewidth(0.5)  # type: ignore
-        if hasattr(handle, "set_edgecolor"):
-            handle.set_edgecolor("white")  # type: ignore
-
-
-def _convert_and_close_fig(fig: matplotlib.figure.Figure) -> io.BytesIO:
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", transparent=True)  # type: ignore
-    buf.seek(0)
-    plt.close(fig)
-
-    return buf
+def _approximate_chart_title(dists: list[DiceDistribution]) -> str | None:
+    samples = [dist.samples for dist in dists if isinstance(dist, SimulatedDistribution)]
+    if not samples:
+        return None
+    return f"Approximate, simulated from {min(samples):,} rolls"
 
 
 def _single_distribution_chart(
-    dist: Distribution,
+    dist: DiceDistribution,
     color: int,
     min_to_beat: float,
 ) -> discord.File:
@@ -155,11 +590,11 @@ def _single_distribution_chart(
     values = [100 * dist.get(key) for key in keys]  # In percent
     colors = [plt_color if key >= min_to_beat else white for key in keys]
 
-    fig, ax = _empty_distribution_chart(keys)
+    fig, ax = empty_distribution_chart(keys, _approximate_chart_title([dist]))
     ax.bar(keys, values, color=colors)  # type: ignore
 
-    buf = _convert_and_close_fig(fig)
-    return discord.File(fp=buf, filename="distribution.png")
+    buf = convert_and_close_fig(fig)
+    return PicklableFile(fp=buf, filename="distribution.png")
 
 
 def _multi_adjacent_distribution_chart(dists: list[SingleDistributionResult], colors: list[ColorRGBFloat]) -> discord.File:
@@ -167,7 +602,7 @@ def _multi_adjacent_distribution_chart(dists: list[SingleDistributionResult], co
     max_key = max(dist.max for dist in dists)
     keys = list(range(min_key, max_key + 1))
 
-    fig, ax = _empty_distribution_chart(keys)
+    fig, ax = empty_distribution_chart(keys, _approximate_chart_title([dist.distribution for dist in dists]))
 
     total_bar_width = 0.8
     single_bar_width = total_bar_width / len(dists)
@@ -178,10 +613,22 @@ def _multi_adjacent_distribution_chart(dists: list[SingleDistributionResult], co
         offset = i * single_bar_width - total_bar_width / 2 + single_bar_width / 2
         ax.bar(np.array(keys) + offset, values, width=single_bar_width, label=dist.expression, color=colors[i])  # type: ignore
 
-    _style_legend(ax.legend())  # type: ignore
+    style_legend(ax.legend())  # type: ignore
 
-    buf = _convert_and_close_fig(fig)
-    return discord.File(fp=buf, filename="distribution.png")
+    buf = convert_and_close_fig(fig)
+    return PicklableFile(fp=buf, filename="distribution.png")
+
+
+def _probability_matrix(dists: list[SingleDistributionResult], keys: list[int]) -> npt.NDArray[np.float64]:
+    """Probabilities of each distribution (rows) for each key (columns), in percent."""
+    matrix = np.zeros((len(dists), len(keys)))
+    for row, dist in zip(matrix, dists):
+        if isinstance(dist.distribution, DenseDistribution):
+            start = dist.distribution.offset - keys[0]
+            row[start : start + len(dist.distribution.probabilities)] = dist.distribution.probabilities
+        else:
+            row[:] = [dist.distribution.get(key) for key in keys]
+    return 100 * matrix
 
 
 def _multi_overlap_distribution_chart(dists: list[SingleDistributionResult], colors: list[ColorRGBFloat]) -> discord.File:
@@ -189,6 +636,11 @@ def _multi_overlap_distribution_chart(dists: list[SingleDistributionResult], col
     Matplotlib does not blend colors when multiple bar charts are overlapping. To address this,
     we manually calculate the overlapping regions and draw the regions with the most overlap
     latest.
+
+    At each key, the region between the n-th and (n+1)-th highest probability is covered by exactly
+    the n most likely distributions. Sorting the probabilities of each key results in n layers, where
+    layer n has the n-th highest probability as its height and the blended color of the n most likely
+    distributions at that key.
     """
 
     colors = colors[: len(dists)]
@@ -197,55 +649,62 @@ def _multi_overlap_distribution_chart(dists: list[SingleDistributionResult], col
     max_key = max(dist.max for dist in dists)
     keys = list(range(min_key, max_key + 1))
 
-    fig, ax = _empty_distribution_chart(keys)
+    fig, ax = empty_distribution_chart(keys, _approximate_chart_title([dist.distribution for dist in dists]))
 
-    # This dict contains all the overlaps for all distributions. For example, key
-    # (0, 2, 3) contains the overlapping regions for the distributions at indices
-    # 0, 2, and 3
-    values: dict[tuple[int, ...], list[float]] = {}
+    probabilities = _probability_matrix(dists, keys)
+    order = np.argsort(-probabilities, axis=0, kind="stable")
+    heights = np.take_along_axis(probabilities, order, axis=0)
 
-    for size in range(1, len(dists) + 1):
-        for combination in itertools.combinations(range(len(dists)), size):
-            overlap = [100 * min(dists[i].distribution.get(key) for i in combination) for key in keys]
-            values[combination] = overlap
+    merged_colors: dict[tuple[int, ...], ColorRGBFloat] = {}
+    for layer in range(len(dists)):
+        layer_colors: list[ColorRGBFloat] = []
+        for members in np.sort(order[: layer + 1], axis=0).T.tolist():
+            combination = tuple(members)
+            if combination not in merged_colors:
+                merged_colors[combination] = lerp_float_colors(list(colors[i] for i in combination))
+            layer_colors.append(merged_colors[combination])
 
-    combinations = sorted(values.keys(), key=lambda comb: (len(comb), comb))
-    for combination in combinations:
-        merged_color = lerp_float_colors(list(colors[i] for i in combination))
-        value = values[combination]
-
-        # If there is one value in the combination, it's one of the original distributions
-        # In this case, add a label
-        if len(combination) == 1:
-            label = dists[combination[0]].expression
-        else:
-            label = None
+        ax.bar(keys, heights[layer], color=layer_colors)  # type: ignore
 
-        ax.bar(keys, value, color=merged_color, label=label)  # type: ignore
+    # Layers don't have a single color, so the legend shows the original color of each distribution
+    handles = [matplotlib.patches.Patch(color=colors[i], label=dist.expression) for i, dist in enumerate(dists)]
+    style_legend(ax.legend(handles=handles))  # type: ignore
 
-    _style_legend(ax.legend())  # type: ignore
+    buf = convert_and_close_fig(fig)
+    return PicklableFile(fp=buf, filename="distribution.png")
 
-    buf = _convert_and_close_fig(fig)
-    return discord.File(fp=buf, filename="distribution.png")
 
-
-def distribution(
+def distribution_results(
     expressions: str,
     advantage: Advantage,
-    color: int,
     min_to_beat: int | None = None,
-    style: DistributionChartStyle = DistributionChartStyle.ADJACENT,
-):
+    simulate: bool = False,
+) -> list[SingleDistributionResult]:
+    """
+    Calculates the distributions of comma-separated expressions, without drawing their chart. Distributions which
+    are too expensive to calculate exactly, or all distributions if `simulate` is set, are approximated by simulation.
+    """
     split = expressions.split(",")
     cleaned = [clean_expression(expr) for expr in split if expr]
-    results = [SingleDistributionResult(expr, advantage, min_to_beat) for expr in cleaned]
+    if len(cleaned) == 0:
+        raise ValueError(f"Expected at least one dice expression in '{expressions}'!")
+
+    time_budget = SIMULATION_TIME_BUDGET / len(cleaned)
+    return [SingleDistributionResult(expr, advantage, min_to_beat, simulate, time_budget) for expr in cleaned]
+
+
+def distribution_chart(
+    results: list[SingleDistributionResult],
+    color: int,
+    style: DistributionChartStyle = DistributionChartStyle.ADJACENT,
+) -> DistributionResult:
+    """Draws the chart of distributions calculated by distribution_results."""
+    advantage = results[0].advantage
+    min_to_beat = results[0].min_to_beat
 
     rgb = to_matplotlib_color(color)
     colors = hue_shift_n_colors_from_base(rgb, len(results), fallback_color=(1.0, 0.0, 0.0))
 
-    if len(results) == 0:
-        raise ValueError(f"Expected at least one dice expression in '{expressions}'!")
-
     if len(results) == 1:
         chart = _single_distribution_chart(dist=results[0].distribution, color=color, min_to_beat=min_to_beat or 0)
     elif style == DistributionChartStyle.ADJACENT:
@@ -261,3 +720,16 @@ def distribution(
         advantage=advantage,
         min_to_beat=min_to_beat,
     )
+
+
+def distribution(
+    expressions: str,
+    advantage: Advantage,
+    color: int,
+    min_to_beat: int | None = None,
+    style: DistributionChartStyle = DistributionChartStyle.ADJACENT,
+    simulate: bool = False,
+):
+    """Calculates the distributions of comma-separated expressions and draws their chart."""
+    results = distribution_results(expressions, advantage, min_to_beat, simulate)
+    return distribution_chart(results, color, style)
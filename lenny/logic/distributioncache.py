@@ -0,0 +1,189 @@
+"""
+Persistent cache of calculated distributions, shared between restarts, worker processes and shards. Each
+distribution is stored as a compressed numpy file, named after the hash of its expression and advantage.
+"""
+
+import hashlib
+import importlib.metadata
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import numpy.typing as npt
+from dotenv import load_dotenv
+
+# Workers of the process pool read the settings on import, before the bot gets the chance to load them.
+load_dotenv()
+
+# Directory of the cache, the cache is disabled if this is empty.
+CACHE_DIR = os.getenv("DISTRIBUTION_CACHE_DIR", "")
+CACHE_SIZE = int(float(os.getenv("DISTRIBUTION_CACHE_SIZE_MB", "64")) * 1024 * 1024)
+CACHE_FORMAT_VERSION = 1
+
+# Distributions which are common enough to calculate when the bot starts, on top of the user's default dice.
+COMMON_EXPRESSIONS = [
+    "1d20",
+    "2d20kh1",
+    "2d20kl1",
+    "4d6kh3",
+    "8d6",
+    "2d6",
+    "1d6",
+    "1d8",
+    "1d10",
+    "1d12",
+    *(f"1d20+{modifier}" for modifier in range(1, 16)),
+]
+
+
+def _library_version() -> str:
+    try:
+        return importlib.metadata.version("d100")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def cache_version() -> str:
+    """
+    Version stamp of the cached distributions. Cached distributions are discarded when d100 is updated,
+    as its distributions may change between versions.
+    """
+    return f"v{CACHE_FORMAT_VERSION}-d100-{_library_version()}"
+
+
+class DistributionDiskCache:
+    """
+    Stores distributions as their probabilities and offset, in a directory per version stamp. Entries are
+    loaded lazily when they are looked up, and the least recently used entries are removed once the cache
+    grows larger than `max_size` bytes.
+    """
+
+    directory: str
+    max_size: int
+
+    def __init__(self, base_dir: str, max_size: int = CACHE_SIZE, version: str | None = None):
+        self.base_dir = base_dir
+        self.max_size = max_size
+        self.version = version or cache_version()
+        self.directory = os.path.join(base_dir, self.version) if base_dir else ""
+        self.hits = 0
+        self.misses = 0
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    @staticmethod
+    def key(expression: str, advantage: str) -> str:
+        return hashlib.sha256(f"{advantage}:{expression}".encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, expression: str, advantage: str) -> str:
+        return os.path.join(self.directory, f"{self.key(expression, advantage)}.npz")
+
+    def load(self, expression: str, advantage: str) -> tuple[npt.NDArray[np.float64], int] | None:
+        """Returns the probabilities and offset of a cached distribution, or None if it isn't cached."""
+        if not self.enabled:
+            return None
+
+        path = self._path(expression, advantage)
+        try:
+            with np.load(path) as data:
+                if str(data["expression"]) != f"{advantage}:{expression}":
+                    self.misses += 1
+                    return None  # Hash collision
+                probabilities, offset = data["probabilities"], int(data["offset"])
+            os.utime(path)  # Marks the entry as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError) as exception:
+            logging.warning("Could not read cached distribution '%s': %s", path, exception)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return probabilities, offset
+
+    def store(self, expression: str, advantage: str, probabilities: npt.NDArray[np.float64], offset: int):
+        if not self.enabled or probabilities.nbytes > self.max_size // 16:
+            return  # Huge distributions would evict most of the cache
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(expression, advantage)
+
+        # Written to a temporary file first, so other processes never read a partially written entry.
+        fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".npz", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez_compressed(
+                    file,
+                    expression=np.array(f"{advantage}:{expression}"),
+                    probabilities=probabilities,
+                    offset=np.array(offset),
+                )
+            os.replace(temp_path, path)
+        except OSError as exception:
+            logging.warning("Could not cache distribution '%s': %s", path, exception)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.max_size:
+                self._size = self.evict()
+
+    def _entries(self) -> list[os.DirEntry[str]]:
+        if not os.path.isdir(self.directory):
+            return []
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.is_file() and entry.name.endswith(".npz")]
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def size(self) -> int:
+        """Total size of all cached distributions, in bytes."""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used entries until the cache is below 90% of its maximum size, so entries
+        aren't evicted on every store. Returns the size of the cache afterwards.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        size = sum(entry.stat().st_size for entry in entries)
+        target = int(self.max_size * 0.9)
+        for entry in entries:
+            if size <= target:
+                break
+            try:
+                size -= entry.stat().st_size
+                os.remove(entry.path)
+            except FileNotFoundError:
+                ...  # Already evicted by another process
+        return size
+
+    def remove_stale_versions(self) -> int:
+        """Removes the entries of other version stamps, returns the amount of removed versions."""
+        if not self.enabled or not os.path.isdir(self.base_dir):
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.base_dir):
+            path = os.path.join(self.base_dir, name)
+            if name != self.version and name.startswith("v") and "-d100-" in name and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+DistributionDisk = DistributionDiskCache(CACHE_DIR)
@@ -2,9 +2,12 @@ import discord
 
 from logic.dnd.abstract import DNDEntry
 from logic.jsonhandler import JsonFolderHandler, JsonHandler
+from logic.storage import SerializationFormat
 
 
 class FavoritesHandler(JsonHandler[list[str]]):
+    _format = SerializationFormat.MSGPACK
+
     def __init__(self, user_id: int):
         super().__init__(filename=str(user_id), sub_dir="user_favorites")
 
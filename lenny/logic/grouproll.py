@@ -3,7 +3,7 @@ import time
 import discord
 from discord import Interaction
 
-from logic.roll import Advantage, RollResult, parse, roll
+from logic.roll import Advantage, RollResult, has_d20, roll, roll_batch
 
 
 class GroupRollRoll:
@@ -15,21 +15,32 @@ class GroupRollRoll:
     owner: discord.User | discord.Member
     time_added: float
 
-    def __init__(self, itr: Interaction, name: str | None, modifier: str, advantage: Advantage):
+    def __init__(
+        self, itr: Interaction, name: str | None, modifier: str, advantage: Advantage, result: RollResult | None = None
+    ):
         self.is_npc = name is not None
         self.name = (name or itr.user.display_name).title().strip()
         self.advantage = advantage
         self.owner = itr.user
         self.modifier = modifier
         self.time_added = time.time()
+        self.roll = result or roll(self.expression(modifier), advantage=advantage)
 
+    @staticmethod
+    def expression(modifier: str) -> str:
         # Check if the modifier contains a d20 expression, e.g. "1d20 + 5". In this case, the user
         # most likely made a mistake and placed the entire expression, rather than just the modifier.
-        expr, _ = parse(modifier, advantage=advantage)
-        if expr.find_d20() is not None:
-            self.roll = roll(modifier, advantage=advantage)
-        else:
-            self.roll = roll(f"1d20 + ({modifier})", advantage=advantage)
+        if has_d20(modifier):
+            return modifier
+        return f"1d20 + ({modifier})"
+
+    @classmethod
+    def batch(
+        cls, itr: Interaction, name: str | None, modifier: str, advantage: Advantage, count: int
+    ) -> list["GroupRollRoll"]:
+        """Rolls for multiple creatures sharing the same modifier, parsing the expression only once."""
+        results = roll_batch(cls.expression(modifier), count, advantage)
+        return [cls(itr, name, modifier, advantage, result) for result in results]
 
     @property
     def total(self) -> int:
@@ -81,7 +81,7 @@ class HelpTabList:
     Distribution = HelpTab(
         tab="distribution",
         name="Distribution",
-        commands=["distribution", "average"],
+        commands=["distribution", "versus", "average"],
         text="You can generate the image of a dice distribution using the following command:",
         info=[
             (
@@ -96,12 +96,20 @@ class HelpTabList:
                     "You can simulate advantages and disadvantages with the command. Additionally, you can supply a `min_to_beat` value to calculate the chances of rolling at least that value."
                 ],
             ),
+            (
+                "Contested Rolls",
+                [
+                    "Use `/versus` to compare your roll against an opponent's roll, such as Stealth versus Perception. It shows your odds of winning, tying and losing, and the distribution of the difference between both results."
+                ],
+            ),
             (
                 "Timeouts",
                 [
-                    "Generating the distributions can take a while. Specifically, if your expression uses the 'e' and 'ra' modifiers or it uses the 'l' and 'h' selectors, a slower algorithm is used to calculate the distributions. In these cases, even for small dice, it can take some time to calculate the end result.",
+                    "Sums of dice and numbers, including dice using the 'kh' and 'kl' modifiers, are calculated quickly even for large expressions such as `100d6`.",
+                    "",
+                    "Generating other distributions can take a while. Specifically, if your expression uses the 'e' and 'ra' modifiers or it uses the 'l' and 'h' selectors on other modifiers, a slower algorithm is used to calculate the distributions. In these cases, even for small dice, it can take some time to calculate the end result.",
                     "",
-                    "A five second limit was put in place to prevent calculating overly difficult or big expressions. If the calculations takes longer than five seconds, a timeout is raised.",
+                    "A five second limit was put in place to prevent calculating overly difficult or big expressions. If an expression is too expensive to calculate, or the calculation takes too long, its distribution is approximated by simulating a large amount of rolls instead. Approximate distributions are marked as such, and show the 95% confidence intervals of their results.",
                 ],
             ),
         ],
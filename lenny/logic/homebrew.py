@@ -200,6 +200,8 @@ class HomebrewGuildData(JsonHandler[list[HomebrewEntry]]):
 
 class GlobalHomebrewData(JsonFolderHandler[HomebrewGuildData]):
     _handler_type = HomebrewGuildData
+    _max_entries = 500
+    _max_bytes = 64 * 1024 * 1024  # Homebrew descriptions can be long, so also limit the total size
 
     def _itr_key(self, itr: discord.Interaction) -> int:
         if not itr.guild_id:
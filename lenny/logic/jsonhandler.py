@@ -1,14 +1,25 @@
+import asyncio
 import dataclasses
-import json
+import functools
 import logging
 import os
 import time
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
 from typing import TYPE_CHECKING, Any, Generic, TypeVar
 
 import discord
 
+from logic.storage import (
+    FLUSH_INTERVAL,
+    JsonFileBackend,
+    LogRecord,
+    SerializationFormat,
+    Storage,
+    encode,
+)
+
 if TYPE_CHECKING:
     from _typeshed import DataclassInstance
 else:
@@ -23,26 +34,93 @@ SerializedTypes = Sequence["SerializedBaseTypes"] | SerializedBaseTypes
 T = TypeVar("T", bound=SupportedTypes)
 
 
+class WriteBehindQueue:
+    """
+    Keeps track of handlers with unsaved changes when write-behind is enabled.
+
+    Instead of writing to storage on every `save()`, handlers are marked as dirty and
+    written in bulk by `flush()`, which is called periodically by the bot. Multiple
+    saves of the same handler between two flushes are coalesced into a single write.
+    """
+
+    interval: float
+    _pending: dict[int, "JsonHandler[Any]"]
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def mark_dirty(self, handler: "JsonHandler[Any]") -> None:
+        self._pending[id(handler)] = handler
+
+    def is_dirty(self, handler: "JsonHandler[Any]") -> bool:
+        return id(handler) in self._pending
+
+    def discard(self, handler: "JsonHandler[Any]") -> None:
+        self._pending.pop(id(handler), None)
+
+    def _take(self) -> list["JsonHandler[Any]"]:
+        handlers = list(self._pending.values())
+        self._pending.clear()
+        return handlers
+
+    def flush(self) -> int:
+        """Writes all dirty handlers to storage, returns the amount of handlers written."""
+        handlers = self._take()
+        for handler in handlers:
+            handler.write()
+        return len(handlers)
+
+    async def flush_async(self) -> int:
+        """Same as `flush()`, but waits for the writes without blocking the event loop."""
+        handlers = self._take()
+        results = await asyncio.gather(*(handler.write_async() for handler in handlers), return_exceptions=True)
+        for handler, result in zip(handlers, results):
+            if isinstance(result, Exception):
+                logging.error("Failed to write '%s' to storage: %s", handler.file_path, result)
+                self.mark_dirty(handler)  # Retry on the next flush
+        return len(handlers)
+
+
+PendingWrites = WriteBehindQueue(FLUSH_INTERVAL)
+
+
 class JsonHandler(Generic[T]):
     """
-    Abstract base class for managing JSON-based file storage.
+    Abstract base class for managing JSON-based storage.
 
-    This class provides a structured way to load and save data to JSON files.
+    This class provides a structured way to load and save data through the configured
+    storage backend (JSON files by default, see `logic.storage`).
     Subclasses define how raw JSON data is converted to and from internal
     Python objects via `serialize()` and `deserialize()`. Note that these functions
     work on *direct values*, so they must also be able to (de)serialize lists.
     Serialize has already been implemented, whereas deserialized has to be implemented
     in the subclass.
+
+    The format in which the data is stored is chosen per handler through `_format`. Data
+    stored in another format is detected when loading, and converted on the spot.
     """
 
+    _format: SerializationFormat = SerializationFormat.JSON
     _filename: str
+    _family: str
     _path: str
     _allow_save: bool
     data: dict[str, T]
+    # Called after every save, JsonFolderHandler uses this to keep track of the size of its cached handlers.
+    size_observer: Callable[[], None] | None = None
 
     def __init__(self, filename: str, sub_dir: str = ""):
         base_dir = "./temp"
         self._filename = filename
+        self._family = sub_dir
         self._path = os.path.join(base_dir, sub_dir) if sub_dir else base_dir
         self._allow_save = True
         self.data = {}
@@ -50,36 +128,78 @@ class JsonHandler(Generic[T]):
 
     @property
     def file_path(self) -> str:
-        filename = f"{self._filename}.json"
+        if isinstance(Storage.backend, JsonFileBackend):
+            # Takes the backend's directory layout into account, see `JsonFileBackend.sharded`
+            return Storage.backend.file_path(self._family, self._filename, self._format)
+        filename = f"{self._filename}{self._format.extension}"
         return os.path.join(self._path, filename)
 
     def load(self):
-        if not os.path.exists(self._path):
-            os.makedirs(self._path)
-            logging.info("Created new filepath at: %s", self._path)
-
-        try:
-            with open(self.file_path, "r", encoding="utf-8") as file:
-                data: dict[str, Any] = json.load(file)
-                self.data = {k: self.deserialize(v) for k, v in data.items()}
-        except FileNotFoundError:
+        document = Storage.read_document(self._family, self._filename)
+        if document is None:
             logging.warning("File not found, new file created at: '%s'", self.file_path)
             self.data = {}
             self.save()
+            return
+
+        data, fmt = document
+        try:
+            self.data = {k: self.deserialize(v) for k, v in data.items()}
         except KeyError as e:
             logging.error("Failed to read '%s', saving will be disabled for this file!\n%s", self.file_path, e)
             self._allow_save = False
             self.data = {}
+            return
+
+        if fmt != self._format:
+            logging.info("Converting '%s' from %s to %s", self.file_path, fmt.value, self._format.value)
+            self.write()
 
     def save(self):
         if not self._allow_save:
             raise RuntimeError(
                 "Your command worked, but the information will not be retained on a restart.\nKeep a backup of your changes and reach out to the bot's host to resolve this!"
             )
-        os.makedirs(self._path, exist_ok=True)
-        data = {k: self.serialize(v) for k, v in self.data.items()}
-        with open(self.file_path, "w", encoding="utf-8") as file:
-            json.dump(data, file, indent=2)
+        if PendingWrites.enabled:
+            PendingWrites.mark_dirty(self)
+        else:
+            # Writes are queued on the storage thread in order, so later reads and writes always see this one.
+            PendingWrites.discard(self)
+            Storage.write_in_background(self._family, self._filename, self._snapshot(), self._format)
+
+        if self.size_observer is not None:
+            self.size_observer()
+
+    async def save_async(self):
+        """Same as `save()`, but the data is written on the storage thread without blocking the event loop."""
+        if PendingWrites.enabled or not self._allow_save:
+            self.save()  # Only marks the handler as dirty, or raises the appropriate error
+            return
+        await self.write_async()
+        if self.size_observer is not None:
+            self.size_observer()
+
+    def _snapshot(self) -> dict[str, Any]:
+        # Serializing creates copies of the data, so the handler can safely be modified while the snapshot is being written.
+        return {k: self.serialize(v) for k, v in self.data.items()}
+
+    def write(self):
+        """Immediately writes the handler's data to storage, regardless of write-behind."""
+        PendingWrites.discard(self)
+        Storage.write(self._family, self._filename, self._snapshot(), self._format)
+
+    async def write_async(self):
+        PendingWrites.discard(self)
+        await Storage.write_async(self._family, self._filename, self._snapshot(), self._format)
+
+    def approximate_size(self) -> int:
+        """Size in bytes of the handler's data when stored in its current format."""
+        return len(encode(self._snapshot(), self._format))
+
+    def flush(self):
+        """Writes the handler's data to storage if it has unsaved changes."""
+        if PendingWrites.is_dirty(self):
+            self.write()
 
     def serialize(self, obj: T) -> SerializedTypes:
         if isinstance(obj, (int, str, bool)):
@@ -102,17 +222,113 @@ class JsonHandler(Generic[T]):
         )
 
 
+class JournaledJsonHandler(JsonHandler[T]):
+    """
+    JsonHandler for data which changes very often, e.g. on every roll.
+
+    Instead of rewriting the whole document on every change, each change is appended to
+    the document's change log as a small record through `record()`. Records are replayed
+    through `apply()` when loading, and the log is compacted into a new snapshot of the
+    document once it contains more than `_compact_threshold` records.
+
+    Records should be idempotent where possible, as a crash during compaction can cause
+    them to be replayed twice.
+    """
+
+    _compact_threshold: int = 100
+    _journal_size: int
+
+    def load(self):
+        records = Storage.read_log(self._family, self._filename)
+        self._journal_size = len(records)
+        super().load()
+        if not self._allow_save:
+            return  # Data could not be read, so the records can't be applied either
+
+        for record in records:
+            self.apply(record)
+
+        # If the snapshot was written while loading, the log was compacted without the replayed records.
+        if self._journal_size != len(records) or self._journal_size > self._compact_threshold:
+            self.write()
+
+    def apply(self, record: LogRecord):
+        """Applies a single change record to the data, without saving it."""
+        raise NotImplementedError(f"Applying change records is not implemented in {self.__class__.__name__}")
+
+    def record(self, *change: Any):
+        """Applies a change and appends it to the change log."""
+        if not self._allow_save:
+            self.save()  # Raises the appropriate error
+
+        record = list(change)
+        self.apply(record)
+        Storage.append(self._family, self._filename, record)
+        self._journal_size += 1
+        if self._journal_size > self._compact_threshold:
+            PendingWrites.discard(self)
+            Storage.compact_in_background(self._family, self._filename, self._snapshot(), self._format)
+            self._journal_size = 0
+
+    def write(self):
+        PendingWrites.discard(self)
+        Storage.compact(self._family, self._filename, self._snapshot(), self._format)
+        self._journal_size = 0
+
+    async def write_async(self):
+        PendingWrites.discard(self)
+        snapshot = self._snapshot()
+        self._journal_size = 0
+        await Storage.compact_async(self._family, self._filename, snapshot, self._format)
+
+
 THandler = TypeVar("THandler", bound=JsonHandler[Any])  # pylint: disable=invalid-name
 
 
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
 class JsonFolderHandler(ABC, Generic[THandler]):
-    _data: dict[int, THandler]
+    """
+    Keeps the handlers of a folder (one per user, guild, ...) in memory, as a size-bounded LRU cache.
+
+    Handlers are ordered from least to most recently used, so both touching and evicting
+    a handler on `get()` take constant time. The cache is limited to `_max_entries`
+    handlers and, optionally, to an approximate size of `_max_bytes`. Sizes are measured
+    when a handler is loaded and whenever it is saved, and kept as a running total.
+    """
+
+    _max_entries: int = 5000
+    _max_bytes: int | None = None
+
+    _data: OrderedDict[int, THandler]
     _last_accessed: dict[int, int]
+    _sizes: dict[int, int]
+    _total_size: int
     _handler_type: type[THandler]
+    stats: CacheStats
 
-    def __init__(self):
-        self._data = {}
+    def __init__(self, max_entries: int | None = None, max_bytes: int | None = None):
+        self._data = OrderedDict()
         self._last_accessed = {}
+        self._sizes = {}
+        self._total_size = 0
+        self.stats = CacheStats()
+        if max_entries is not None:
+            self._max_entries = max_entries
+        if max_bytes is not None:
+            self._max_bytes = max_bytes
+        if self._max_entries < 1:
+            raise ValueError("max_entries should be at least 1!")
         if not self._handler_type:
             raise NotImplementedError("_handler_type not implemented!")
 
@@ -123,21 +339,76 @@ class JsonFolderHandler(ABC, Generic[THandler]):
         Additionally raise any interaction-checks in case Interaction is not allowed.
         """
 
+    def _create_handler(self, itr: discord.Interaction, key: int) -> THandler:
+        """Creates the handler for a key which is not cached yet, can be overridden if the handler needs the interaction."""
+        return self._handler_type(str(key))
+
     def get(self, itr: discord.Interaction) -> THandler:
         key = self._itr_key(itr)
-        if key not in self._data:
-            self._data[key] = self._handler_type(str(key))
+        handler = self._data.get(key)
+        if handler is None:
+            self.stats.misses += 1
+            handler = self._create_handler(itr, key)
+            self._data[key] = handler
+            if self._max_bytes is not None:
+                handler.size_observer = functools.partial(self._on_save, key)
+            self._measure(key)
+            self._evict()
+        else:
+            self.stats.hits += 1
+            self._data.move_to_end(key)
         self._last_accessed[key] = int(time.time())
-        return self._data[key]
+        return handler
+
+    def _measure(self, key: int):
+        if self._max_bytes is None:
+            return
+        size = self._data[key].approximate_size()
+        self._total_size += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _on_save(self, key: int):
+        if key in self._data:
+            self._measure(key)
+            self._evict()
+
+    def _pop(self, key: int):
+        self._last_accessed.pop(key, None)
+        self._total_size -= self._sizes.pop(key, 0)
+        handler = self._data.pop(key, None)
+        if handler is not None:
+            handler.size_observer = None
+            handler.flush()  # Don't lose pending changes when evicting
+
+    def _is_full(self) -> bool:
+        if len(self._data) > self._max_entries:
+            return True
+        return self._max_bytes is not None and self._total_size > self._max_bytes
+
+    def _evict(self):
+        # The most recently used handler is always kept, even if it exceeds the byte budget by itself.
+        while len(self._data) > 1 and self._is_full():
+            key = next(iter(self._data))
+            self._pop(key)
+            self.stats.evictions += 1
 
     def clear_cache(self, max_age: int = 1800):
         now = int(time.time())
         threshold = now - max_age
-        for key in self.keys:
-            last_accessed = self._last_accessed.get(key, 0)
-            if last_accessed < threshold:
-                self._last_accessed.pop(key, None)
-                self._data.pop(key, None)
+        # Handlers are ordered by last access, so the sweep can stop at the first recent one.
+        while self._data:
+            key = next(iter(self._data))
+            if self._last_accessed.get(key, 0) >= threshold:
+                break
+            self._pop(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size(self) -> int:
+        """Approximate size in bytes of all cached handlers, only tracked if `_max_bytes` is set."""
+        return self._total_size
 
     @property
     def keys(self) -> set[int]:
@@ -1,15 +1,28 @@
+import base64
+import contextlib
+import copy
 import dataclasses
+import functools
+import json
+import math
+import re
+from collections.abc import Iterator
+from typing import ClassVar, Literal
 
 import d100
 import d100.utils
+import numpy as np
+import numpy.typing as npt
 from d100.ast.dice import Dice
 from d100.ast.die import DiceSize, Die
 from d100.ast.expression import ASTExpression, Expression
+from d100.enums import Critical
 from d100.errors import RollError
 from d100.roll import RollResult as D20RollResult
 from d100.roll import SingleRollResult
 from d100.stringifier import SimpleStringifier
 
+from logic.dicecost import ExpressionCost, estimate_cost
 from methods import ChoicedEnum
 
 
@@ -66,13 +79,26 @@ class RollResult:
         return self.result.total
 
 
+@dataclasses.dataclass(frozen=True)
+class FastRollResult:
+    """Result of a roll on the fast path of `multi_roll`, mirrors the attributes of d100's SingleRollResult."""
+
+    expr: str
+    total: int
+    crit: Critical | None = None
+    is_comparison: bool = False
+
+
+SingleRoll = SingleRollResult | FastRollResult
+
+
 @dataclasses.dataclass
 class MultiRollResult:
     expression: str
     advantage: Advantage
-    rolls: list[SingleRollResult]
-    rolls_lose_1: list[SingleRollResult]
-    rolls_lose_2: list[SingleRollResult]  # A second losing roll column is added to account for Elven Accuracy
+    rolls: list[SingleRoll]
+    rolls_lose_1: list[SingleRoll]
+    rolls_lose_2: list[SingleRoll]  # A second losing roll column is added to account for Elven Accuracy
     warnings: list[str]
 
     @property
@@ -80,8 +106,241 @@ class MultiRollResult:
         return sum(r.total for r in self.rolls)
 
 
-def parse(expr: str, advantage: Advantage) -> tuple[ASTExpression, set[str]]:
+@dataclasses.dataclass(frozen=True)
+class RollMetadata:
+    """
+    Compact record of a roll, stored as the URL of roll embeds. This allows a roll to be repeated without
+    parsing the embed's text. Roll embeds have no title, so Discord never shows the URL to users.
+    """
+
+    # Discord requires a well-formed URL, the reserved .invalid domain makes sure it never resolves.
+    PREFIX: ClassVar[str] = "https://lenny.invalid/roll#"
+
+    expression: str
+    advantage: Advantage
+    amount: int | None = None  # None for single rolls
+    reason: str | None = None
+
+    def encode(self) -> str:
+        payload = json.dumps([self.expression, self.advantage.value, self.amount, self.reason], separators=(",", ":"))
+        return self.PREFIX + base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, text: str | None) -> "RollMetadata | None":
+        """Decodes an encoded record, returns None if the text does not contain a valid record."""
+        if not text or not text.startswith(cls.PREFIX):
+            return None
+
+        token = text.removeprefix(cls.PREFIX)
+        try:
+            payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            expression, advantage, amount, reason = json.loads(payload)
+            return cls(
+                expression=str(expression),
+                advantage=Advantage(advantage),
+                amount=None if amount is None else int(amount),
+                reason=None if reason is None else str(reason),
+            )
+        except (ValueError, TypeError):
+            return None
+
+
+# Tokens of an expression's cleaned form, which is how d100 stringifies its AST (e.g. '4d6kh3 + 2')
+EXPRESSION_TOKEN_PATTERN = re.compile(
+    r"\s*(?:"
+    r"(?P<dice>(?P<count>\d*)d(?P<size>\d+)(?P<operations>(?:(?:rr|ro|ra|mi|ma|k|p|e)[hl<>]?\d+)*))"
+    r"|(?P<set_operations>(?:[kp][hl<>]?\d+)+)"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<operator>//|==|!=|>=|<=|[-+*/%(),<>])"
+    r"|(?P<annotation>\[[^\]]*\])"
+    r")"
+)
+OPERATION_PATTERN = re.compile(r"(rr|ro|ra|mi|ma|k|p|e)([hl<>]?)(\d+)")
+SIMPLE_EXPRESSION_MAX_DICE = 100
+
+TokenKind = Literal["dice", "set_operations", "number", "operator", "annotation"]
+
+
+@dataclasses.dataclass(frozen=True)
+class DiceOperation:
+    """An operation on dice or sets, e.g. 'kh3' is DiceOperation('k', 'h', 3)."""
+
+    operation: str
+    selector: str  # 'h', 'l', '<', '>', or '' to select a single value
+    value: int
+
+
+@dataclasses.dataclass(frozen=True)
+class ExpressionToken:
+    kind: TokenKind
+    text: str
+    count: int = 0  # Dice only
+    size: int = 0  # Dice only
+    operations: tuple[DiceOperation, ...] = ()  # Dice and set operations only
+    value: float = 0  # Numbers only
+
+
+@dataclasses.dataclass(frozen=True)
+class SumTerm:
+    """A term of a sum of dice and numbers, e.g. '- 3 * 2d6kh1'. Constants have no dice."""
+
+    sign: int
+    factor: int
+    dice: ExpressionToken | None = None
+    constant: int = 0
+
+
+def _operations(text: str) -> tuple[DiceOperation, ...]:
+    return tuple(DiceOperation(op, selector, int(value)) for op, selector, value in OPERATION_PATTERN.findall(text))
+
+
+@functools.lru_cache(maxsize=1024)
+def tokenize_expression(cleaned: str) -> tuple[ExpressionToken, ...] | None:
+    """
+    Splits the cleaned form of an expression into tokens. This is the only place where expressions are split
+    outside of d100, the fast roll path, the cost analyzer and the dense distributions all use these tokens.
+    Returns None if the expression contains syntax which is not recognized.
+    """
+    tokens: list[ExpressionToken] = []
+    position = 0
+    end = len(cleaned.rstrip())
+    while position < end:
+        match = EXPRESSION_TOKEN_PATTERN.match(cleaned, position)
+        if match is None or match.end() == position:
+            return None
+        position = match.end()
+
+        text = match.group(0).strip()
+        if match.group("dice"):
+            count, size = int(match.group("count") or 1), int(match.group("size"))
+            tokens.append(ExpressionToken("dice", text, count, size, _operations(match.group("operations"))))
+        elif match.group("set_operations"):
+            tokens.append(ExpressionToken("set_operations", text, operations=_operations(text)))
+        elif match.group("number"):
+            tokens.append(ExpressionToken("number", text, value=float(text)))
+        elif match.group("operator"):
+            tokens.append(ExpressionToken("operator", text))
+        else:
+            tokens.append(ExpressionToken("annotation", text))
+    return tuple(tokens)
+
+
+def _integer(token: ExpressionToken) -> int | None:
+    if token.kind != "number" or not token.value.is_integer():
+        return None
+    return int(token.value)
+
+
+@functools.lru_cache(maxsize=1024)
+def sum_terms(cleaned: str) -> tuple[SumTerm, ...] | None:
+    """
+    Splits an expression into a sum of dice and whole numbers, each optionally multiplied by a whole number,
+    e.g. '2d6 + 1d20kh1 - 3 * 2'. Returns None if the expression has any other syntax.
+    """
+    tokens = tokenize_expression(cleaned)
+    if not tokens:
+        return None
+
+    terms: list[SumTerm] = []
+    position = 0
+    while position < len(tokens):
+        sign = 1
+        if tokens[position].text in ("+", "-"):
+            sign = -1 if tokens[position].text == "-" else 1
+            position += 1
+        elif terms:
+            return None  # Terms have to be separated by a sign
+
+        factors: list[int] = []
+        dice: ExpressionToken | None = None
+        while position < len(tokens):
+            token = tokens[position]
+            if token.kind == "dice" and dice is None:
+                dice = token
+            elif (number := _integer(token)) is not None:
+                factors.append(number)
+            else:
+                return None
+            position += 1
+            if position < len(tokens) and tokens[position].text == "*":
+                position += 1
+                continue
+            break
+        else:
+            return None  # Ends with a sign or multiplication
+
+        if dice is None:
+            terms.append(SumTerm(sign, 1, constant=math.prod(factors)))
+        else:
+            terms.append(SumTerm(sign, math.prod(factors), dice))
+    return tuple(terms)
+
+
+@dataclasses.dataclass(frozen=True)
+class SimpleExpression:
+    """An expression in the form of NdM+K, which can be rolled without d100."""
+
+    dice: int
+    size: int
+    sign: str
+    modifier: int
+
+    @classmethod
+    def from_cleaned(cls, cleaned: str) -> "SimpleExpression | None":
+        # Only 'NdM' or 'NdM + K', any other form is formatted differently by d100.
+        tokens, terms = tokenize_expression(cleaned), sum_terms(cleaned)
+        if tokens is None or terms is None or len(tokens) not in (1, 3) or tokens[0].kind != "dice":
+            return None
+
+        dice = tokens[0]
+        if dice.operations or len(terms) != len(tokens) // 2 + 1 or any(term.dice for term in terms[1:]):
+            return None
+
+        modifier = terms[1] if len(terms) == 2 else SumTerm(1, 1)
+        expression = cls(dice.count, dice.size, "-" if modifier.sign < 0 else "+", modifier.constant)
+        if not 1 <= expression.dice <= SIMPLE_EXPRESSION_MAX_DICE or expression.size < 1:
+            return None
+        # Multiple d20s are handled differently by d100 when it comes to crits and advantage.
+        if expression.size == 20 and expression.dice != 1:
+            return None
+        return expression
+
+    @property
+    def is_d20(self) -> bool:
+        return self.dice == 1 and self.size == 20
+
+    @property
+    def signed_modifier(self) -> int:
+        return -self.modifier if self.sign == "-" else self.modifier
+
+    def format(self, values: list[int]) -> str:
+        """Formats rolled dice the same way as DiceStringifier, e.g. '[3,5] + 3'."""
+        dice = "[" + ",".join(str(value) for value in values) + "]"
+        if not self.modifier:
+            return dice
+        return f"{dice} {self.sign} {self.modifier}"
+
+
+@dataclasses.dataclass(frozen=True)
+class ParsedExpression:
+    """
+    Result of parsing an expression, which is cached in `_parse_cached`. The AST is shared between
+    all users of the cache, so it should never be handed out without copying it first.
+    """
+
+    ast: ASTExpression
+    cleaned: str
+    warnings: frozenset[str]
+    has_d20: bool
+    simple: SimpleExpression | None
+    cost: ExpressionCost | None  # None if the cost of the expression could not be estimated
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_cached(expr: str, advantage: Advantage) -> ParsedExpression:
     parsed = d100.parse(expr)
+    cleaned = str(parsed)
+    has_d20 = parsed.find_d20() is not None
     warnings: set[str] = set()
 
     try:
@@ -102,50 +361,201 @@ def parse(expr: str, advantage: Advantage) -> tuple[ASTExpression, set[str]]:
     except RollError as exception:
         warnings.add(str(exception))
 
-    return parsed, warnings
+    tokens = tokenize_expression(cleaned)
+    cost = estimate_cost(tokens) if tokens is not None else None
+    if cost is not None and advantage == Advantage.SAVAGE_ATTACKER:
+        cost = cost.repeated(advantage.rolls)
+    elif cost is not None and tokens is not None and has_d20:
+        # Advantage only rolls the d20s again, not the rest of the expression.
+        d20_count = sum(token.count for token in tokens if token.kind == "dice" and token.size == 20)
+        cost = cost.with_rerolled_dice(d20_count, 20, advantage.rolls)
+
+    return ParsedExpression(
+        ast=parsed,
+        cleaned=cleaned,
+        warnings=frozenset(warnings),
+        has_d20=has_d20,
+        simple=SimpleExpression.from_cleaned(cleaned),
+        cost=cost,
+    )
 
 
-def _validate_expression(expr: str) -> D20RollResult:
-    # Roll an expression once, to check for errors
+def parse(expr: str, advantage: Advantage) -> tuple[ASTExpression, set[str]]:
+    parsed = _parse_cached(expr, advantage)
+    # Rolling may modify the AST, so every caller gets its own copy of the cached AST.
+    return copy.deepcopy(parsed.ast), set(parsed.warnings)
+
+
+def has_d20(expr: str) -> bool:
+    return _parse_cached(expr, Advantage.NORMAL).has_d20
+
+
+def expression_cost(expr: str, advantage: Advantage = Advantage.NORMAL) -> ExpressionCost | None:
+    """Estimated cost of an expression, without rolling it. Returns None if the cost could not be estimated."""
+    return _parse_cached(expr, advantage).cost
+
+
+def _check_rolls(expr: str, parsed: ParsedExpression):
+    """
+    Rejects expressions which are certain to exceed d100's roll limit, before rolling them. Expressions which are
+    only likely to exceed it are still rolled, d100 stops those once they actually reach the limit.
+    """
+    if parsed.cost is not None and parsed.cost.too_many_rolls:
+        raise TimeoutError(f"Expression '{expr}' has too many dice rolls!")
+
+
+@contextlib.contextmanager
+def _raise_readable_errors(expr: str) -> Iterator[None]:
+    """Converts d100's syntax and roll limit errors into errors with a readable message."""
     try:
-        return d100.roll(expr)
+        yield
     except d100.errors.RollSyntaxError as exception:
         raise SyntaxError(f"Expression '{expr}' has an invalid syntax!") from exception
     except d100.errors.TooManyRolls as exception:
         raise TimeoutError(f"Expression '{expr}' has too many dice rolls!") from exception
-    except Exception as exception:
-        raise exception
 
 
 def clean_expression(expr: str) -> str:
-    return str(d100.parse(expr))
+    return _parse_cached(expr, Advantage.NORMAL).cleaned
 
 
 def roll(expr: str, advantage: Advantage = Advantage.NORMAL) -> RollResult:
-    cleaned = clean_expression(expr)
-    parsed, warnings = parse(expr, advantage)
-
-    stringifier = DiceStringifier()
-    result = d100.roll(parsed, stringifier)
-    result.warnings.extend(warnings)
-    return RollResult(expression=cleaned, advantage=advantage, result=result)
+    return roll_batch(expr, 1, advantage)[0]
 
 
-def multi_roll(expr: str, amount: int, advantage: Advantage) -> MultiRollResult:
-    cleaned = clean_expression(expr)
-    parsed, parsing_warnings = parse(expr, advantage)
+def roll_batch(expr: str, count: int, advantage: Advantage = Advantage.NORMAL) -> list[RollResult]:
+    """Rolls an expression `count` times, each roll being independent. The expression is only parsed once."""
+    parsed = _parse_cached(expr, advantage)
+    _check_rolls(expr, parsed)
     stringifier = DiceStringifier()
-    validation = _validate_expression(expr)
-    warnings = [*validation.warnings, *parsing_warnings]
 
-    rolls_win: list[SingleRollResult] = []
-    rolls_lose_1: list[SingleRollResult] = []
-    rolls_lose_2: list[SingleRollResult] = []
+    results: list[RollResult] = []
+    for _ in range(count):
+        result = d100.roll(copy.deepcopy(parsed.ast), stringifier)
+        result.warnings.extend(parsed.warnings)
+        results.append(RollResult(expression=parsed.cleaned, advantage=advantage, result=result))
+    return results
+
+
+def _get_crit(expression: SimpleExpression, value: int, total: int) -> Critical | None:
+    if not expression.is_d20:
+        return None
+    if value == 20:
+        return Critical.CRIT
+    if value == 1:
+        return Critical.FAIL
+    if total == 20:
+        return Critical.DIRTY
+    return None
+
+
+class DiceRNG:
+    """
+    Random number generator for dice rolled outside of d100, backed by a numpy Generator. Values are drawn
+    in bulk into a buffer per die size, so rolling a single die doesn't require a call into numpy.
+
+    Dice rolled through d100 (e.g. by `roll()`) use d100's own random numbers, so seeding only makes rolls
+    outside of d100 deterministic, such as the fast path of `multi_roll()`.
+    """
+
+    def __init__(self, seed: int | None = None, buffer_size: int = 4096):
+        self.buffer_size = buffer_size
+        self.seed(seed)
+
+    def seed(self, seed: int | None = None):
+        """Resets the generator and discards all buffered values. Rolls are deterministic if a seed is given."""
+        self._generator = np.random.default_rng(seed)
+        self._buffers: dict[int, list[int]] = {}
+
+    def _refill(self, size: int) -> list[int]:
+        buffer = self._generator.integers(1, size + 1, size=self.buffer_size).tolist()
+        self._buffers[size] = buffer
+        return buffer
+
+    def roll(self, size: int) -> int:
+        """Rolls a single die with `size` faces."""
+        buffer = self._buffers.get(size) or self._refill(size)
+        return buffer.pop()
+
+    def roll_many(self, size: int, count: int) -> list[int]:
+        """Rolls `count` dice with `size` faces."""
+        buffer = self._buffers.get(size) or self._refill(size)
+        if len(buffer) < count:
+            if count > self.buffer_size:
+                return self._generator.integers(1, size + 1, size=count).tolist()
+            buffer = buffer + self._refill(size)
+            self._buffers[size] = buffer
+
+        values = buffer[-count:]
+        del buffer[-count:]
+        return values
+
+    def array(self, size: int, shape: tuple[int, ...]) -> npt.NDArray[np.int64]:
+        """Rolls an array of dice with `size` faces, small arrays are drawn from the buffers like any other roll."""
+        count = math.prod(shape)
+        if count > self.buffer_size:
+            return self._generator.integers(1, size + 1, size=shape)
+        return np.array(self.roll_many(size, count), dtype=np.int64).reshape(shape)
+
+
+dice_rng = DiceRNG()
+
+
+def _fast_multi_roll(
+    expression: SimpleExpression, amount: int, advantage: Advantage
+) -> tuple[list[SingleRoll], list[SingleRoll], list[SingleRoll]]:
+    """
+    Rolls a simple expression `amount` times using a single numpy call, instead of rolling each
+    repetition through d100. Advantage only applies to d20 rolls, same as when rolling through d100.
+    """
+    rolls = advantage.rolls if expression.is_d20 and advantage != Advantage.SAVAGE_ATTACKER else 1
+    values = dice_rng.array(expression.size, (amount, rolls, expression.dice))
+    totals = values.sum(axis=2) + expression.signed_modifier
+
+    # Sort each repetition's rolls by total, the last roll is the winning roll.
+    order = np.argsort(totals, axis=1, kind="stable")
+    if advantage == Advantage.DISADVANTAGE:
+        order = order[:, ::-1]
+
+    def result(row: int, column: int) -> FastRollResult:
+        index = order[row, column]
+        dice: list[int] = values[row, index].tolist()
+        total = int(totals[row, index])
+        return FastRollResult(expr=expression.format(dice), total=total, crit=_get_crit(expression, dice[0], total))
+
+    rolls_win = [result(row, -1) for row in range(amount)]
+    rolls_lose_1 = [result(row, 0) for row in range(amount)] if rolls >= 2 else []
+    rolls_lose_2 = [result(row, 1) for row in range(amount)] if rolls >= 3 else []
+    return rolls_win, rolls_lose_1, rolls_lose_2
+
 
-    for _ in range(amount):
+def multi_roll(expr: str, amount: int, advantage: Advantage) -> MultiRollResult:
+    with _raise_readable_errors(expr):
+        cached = _parse_cached(expr, advantage)
+    _check_rolls(expr, cached)
+    if cached.simple is not None and advantage != Advantage.SAVAGE_ATTACKER:
+        rolls_win, rolls_lose_1, rolls_lose_2 = _fast_multi_roll(cached.simple, amount, advantage)
+        return MultiRollResult(
+            expression=cached.cleaned,
+            advantage=advantage,
+            warnings=list(cached.warnings),
+            rolls=rolls_win,
+            rolls_lose_1=rolls_lose_1,
+            rolls_lose_2=rolls_lose_2,
+        )
+
+    with _raise_readable_errors(expr):
+        results = roll_batch(expr, amount, advantage)
+    # Warnings depend on the expression, not on the rolled values, so they are the same for every roll.
+    warnings = results[0].result.warnings if results else list(cached.warnings)
+
+    rolls_win: list[SingleRoll] = []
+    rolls_lose_1: list[SingleRoll] = []
+    rolls_lose_2: list[SingleRoll] = []
+
+    for result in results:
         reverse = advantage == Advantage.DISADVANTAGE
-        rolls = d100.roll(parsed, stringifier).rolls
-        rolls = list(sorted(rolls, key=lambda r: r.total, reverse=reverse))
+        rolls = list(sorted(result.result.rolls, key=lambda r: r.total, reverse=reverse))
 
         rolls_win.append(rolls[-1])
         if len(rolls) >= 2:
@@ -154,7 +564,7 @@ def multi_roll(expr: str, amount: int, advantage: Advantage) -> MultiRollResult:
             rolls_lose_2.append(rolls[1])
 
     return MultiRollResult(
-        expression=cleaned,
+        expression=cached.cleaned,
         advantage=advantage,
         warnings=warnings,
         rolls=rolls_win,
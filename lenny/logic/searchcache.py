@@ -2,9 +2,12 @@ import discord
 
 from logic.dnd.abstract import DNDEntry
 from logic.jsonhandler import JsonFolderHandler, JsonHandler
+from logic.storage import SerializationFormat
 
 
 class SearchCacheHandler(JsonHandler[list[str]]):
+    _format = SerializationFormat.MSGPACK
+
     def __init__(self, user_id: str):
         super().__init__(user_id, "user_search")
 
@@ -1,8 +1,7 @@
-import random
-
 import discord
 
 from logic.charts import get_radar_chart
+from logic.roll import dice_rng
 
 
 def get_stat_mod(stat: int) -> str:
@@ -31,8 +30,7 @@ class Stats:
 
     def roll_stat(self) -> tuple[list[int], int]:
         """Rolls a single stat in D&D 5e."""
-        rolls = [random.randint(1, 6) for _ in range(4)]
-        rolls = sorted(rolls)
+        rolls = sorted(dice_rng.roll_many(6, 4))
         result = sum(rolls[1:])
         return rolls, result
 
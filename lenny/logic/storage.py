@@ -0,0 +1,619 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import IO, Any
+
+import msgpack  # type: ignore
+from dotenv import load_dotenv
+
+# Handlers are created on import (e.g. UserColor), so the .env file has to be
+# read before the bot itself gets the chance to do so.
+load_dotenv()
+
+BASE_DIR = "./temp"
+
+# Interval in seconds in which saved handlers are written to storage, 0 writes on every save.
+FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", "0"))
+
+# Stores the documents of each family in hash-prefixed subdirectories, see `JsonFileBackend`.
+SHARDED = os.getenv("STORAGE_SHARDED", "false").strip().lower() in ("1", "true", "yes")
+
+StoredData = dict[str, Any]
+LogRecord = list[Any]
+
+
+class SerializationFormat(str, Enum):
+    JSON_PRETTY = "json_pretty"  # Indented JSON, easy to read and edit by hand
+    JSON = "json"  # Minified JSON
+    MSGPACK = "msgpack"  # Compact binary format
+
+    @property
+    def extension(self) -> str:
+        if self == SerializationFormat.MSGPACK:
+            return ".msgpack"
+        return ".json"
+
+
+def encode(data: StoredData, fmt: SerializationFormat) -> bytes:
+    match fmt:
+        case SerializationFormat.JSON_PRETTY:
+            return json.dumps(data, indent=2).encode("utf-8")
+        case SerializationFormat.JSON:
+            return json.dumps(data, separators=(",", ":")).encode("utf-8")
+        case SerializationFormat.MSGPACK:
+            return msgpack.packb(data)  # type: ignore
+
+
+def detect_format(raw: bytes) -> SerializationFormat:
+    """Detects the format of an encoded document, based on its first bytes."""
+    first = raw[:1]
+    # Msgpack maps start with 0x80-0x8f (fixmap), 0xde (map 16) or 0xdf (map 32)
+    if first and (0x80 <= first[0] <= 0x8F or first[0] in (0xDE, 0xDF)):
+        return SerializationFormat.MSGPACK
+    if raw.startswith(b"{\n"):
+        return SerializationFormat.JSON_PRETTY
+    return SerializationFormat.JSON
+
+
+def decode(raw: bytes | str) -> tuple[StoredData, SerializationFormat]:
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    fmt = detect_format(raw)
+    if fmt == SerializationFormat.MSGPACK:
+        return msgpack.unpackb(raw), fmt  # type: ignore
+    return json.loads(raw), fmt
+
+
+class StorageBackend(ABC):
+    """
+    Persists the serialized data of JsonHandlers.
+
+    Data is grouped into families (the handler's sub-directory, e.g. 'user_cache'), which
+    contain one document per key (the handler's filename, e.g. a user or guild id).
+    The root family is represented by an empty string.
+    """
+
+    # Whether documents can be read from multiple threads at once without blocking each other
+    parallel_reads: bool = False
+
+    @abstractmethod
+    def read_document(self, family: str, key: str) -> tuple[StoredData, SerializationFormat] | None:
+        """Returns the stored document and the format it was stored in, or None if it does not exist."""
+
+    def read(self, family: str, key: str) -> StoredData | None:
+        document = self.read_document(family, key)
+        return document[0] if document else None
+
+    @abstractmethod
+    def write(self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON) -> None:
+        """Stores a document, overwriting any previous version regardless of its format."""
+
+    @abstractmethod
+    def delete(self, family: str, key: str) -> None:
+        """Removes a document and its change log, does nothing if it does not exist."""
+
+    @abstractmethod
+    def append(self, family: str, key: str, record: LogRecord) -> None:
+        """Appends a small change record to the document's change log."""
+
+    @abstractmethod
+    def read_log(self, family: str, key: str) -> list[LogRecord]:
+        """All change records logged since the document was last compacted, oldest first."""
+
+    @abstractmethod
+    def clear_log(self, family: str, key: str) -> None:
+        """Removes all change records of a document."""
+
+    def compact(self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON) -> None:
+        """
+        Stores a snapshot of the document which includes all logged changes, and clears its change log.
+        If this is interrupted between both steps, the logged changes will be replayed twice.
+        """
+        self.write(family, key, data, fmt)
+        self.clear_log(family, key)
+
+    @abstractmethod
+    def families(self) -> list[str]:
+        """All families which contain stored documents."""
+
+    @abstractmethod
+    def keys(self, family: str) -> Iterator[str]:
+        """All keys stored within a family."""
+
+    @contextlib.contextmanager
+    def snapshot(self) -> Iterator["StorageBackend"]:
+        """
+        A read-only copy of the stored data, which is not affected by writes while it is being read.
+        Backends which do not support snapshots return themselves.
+        """
+        yield self
+
+
+class JsonFileBackend(StorageBackend):
+    """
+    Stores every document as its own file, in a directory per family. Documents are stored
+    as '.json' or '.msgpack' files, depending on their format.
+
+    Families can grow to hundreds of thousands of documents (one per user), which slows down
+    many filesystems. With `sharded` enabled, the documents of a family are spread over two
+    levels of subdirectories based on a hash of their key, e.g. 'user_cache/3f/a2/<id>.json'.
+    Documents in the root family are never sharded.
+    """
+
+    EXTENSIONS = (".json", ".msgpack")
+    LOG_EXTENSION = ".log"
+    parallel_reads = True
+
+    base_dir: str
+    sharded: bool
+    _known_dirs: set[str]
+
+    def __init__(self, base_dir: str = BASE_DIR, sharded: bool = SHARDED):
+        self.base_dir = base_dir
+        self.sharded = sharded
+        self._known_dirs = set()
+
+    def _family_directory(self, family: str) -> str:
+        return os.path.join(self.base_dir, family) if family else self.base_dir
+
+    def _directory(self, family: str, key: str) -> str:
+        directory = self._family_directory(family)
+        if not self.sharded or not family:
+            return directory
+        digest = hashlib.md5(key.encode("utf-8"), usedforsecurity=False).hexdigest()
+        return os.path.join(directory, digest[:2], digest[2:4])
+
+    def file_path(self, family: str, key: str, fmt: SerializationFormat = SerializationFormat.JSON) -> str:
+        return os.path.join(self._directory(family, key), f"{key}{fmt.extension}")
+
+    def log_path(self, family: str, key: str) -> str:
+        return os.path.join(self._directory(family, key), f"{key}{self.LOG_EXTENSION}")
+
+    def _existing_paths(self, family: str, key: str) -> list[str]:
+        paths: list[tuple[float, str]] = []
+        for fmt in (SerializationFormat.JSON, SerializationFormat.MSGPACK):
+            path = self.file_path(family, key, fmt)
+            try:
+                paths.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        # Newest first, in case a crash during a format migration left both files behind
+        return [path for _, path in sorted(paths, reverse=True)]
+
+    def read_document(self, family: str, key: str) -> tuple[StoredData, SerializationFormat] | None:
+        for path in self._existing_paths(family, key):
+            try:
+                with open(path, "rb") as file:
+                    return decode(file.read())
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _ensure_directory(self, path: str) -> None:
+        # Directories are only checked once, as the file system calls add up when saving often.
+        directory = os.path.dirname(path)
+        if directory in self._known_dirs:
+            return
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+            logging.info("Created new filepath at: %s", directory)
+        self._known_dirs.add(directory)
+
+    def _open_for_write(self, path: str, mode: str) -> IO[bytes]:
+        self._ensure_directory(path)
+        try:
+            return open(path, mode)  # pylint: disable=consider-using-with
+        except FileNotFoundError:
+            # The directory was removed while the bot was running
+            self._known_dirs.discard(os.path.dirname(path))
+            self._ensure_directory(path)
+            return open(path, mode)  # pylint: disable=consider-using-with
+
+    def write(self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON) -> None:
+        path = self.file_path(family, key, fmt)
+
+        # Write to a temporary file first, so a crash halfway through never leaves a truncated file behind.
+        content = encode(data, fmt)
+        temp_path = f"{path}.tmp"
+        with self._open_for_write(temp_path, "wb") as file:
+            file.write(content)
+        os.replace(temp_path, path)
+
+        # Remove the document if it was previously stored in a format with another extension
+        for other in self._existing_paths(family, key):
+            if other != path:
+                os.remove(other)
+
+    def delete(self, family: str, key: str) -> None:
+        for path in self._existing_paths(family, key):
+            os.remove(path)
+        self.clear_log(family, key)
+
+    def append(self, family: str, key: str, record: LogRecord) -> None:
+        with self._open_for_write(self.log_path(family, key), "ab") as file:
+            file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    def read_log(self, family: str, key: str) -> list[LogRecord]:
+        try:
+            with open(self.log_path(family, key), "r", encoding="utf-8") as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+        records: list[LogRecord] = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Only the last record can be incomplete, in case the bot stopped while appending it
+                logging.warning("Ignoring incomplete change record in '%s'", self.log_path(family, key))
+                break
+        return records
+
+    def clear_log(self, family: str, key: str) -> None:
+        try:
+            os.remove(self.log_path(family, key))
+        except FileNotFoundError:
+            pass
+
+    def _is_document(self, name: str) -> bool:
+        return name.endswith(self.EXTENSIONS)
+
+    def families(self) -> list[str]:
+        if not os.path.isdir(self.base_dir):
+            return []
+
+        families: list[str] = []
+        with os.scandir(self.base_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and self._is_document(entry.name):
+                    if "" not in families:
+                        families.append("")
+                elif entry.is_dir() and any(self.keys(entry.name)):
+                    families.append(entry.name)
+        return families
+
+    def _walk(self, family: str) -> Iterator[os.DirEntry[str]]:
+        """All files of a family, in both the flat and the sharded layout."""
+        directories = [self._family_directory(family)]
+        while directories:
+            directory = directories.pop()
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield entry
+                    elif entry.is_dir() and family:  # The root family's subdirectories are other families
+                        directories.append(entry.path)
+
+    def keys(self, family: str) -> Iterator[str]:
+        seen: set[str] = set()
+        for entry in self._walk(family):
+            if not self._is_document(entry.name):
+                continue
+            key = os.path.splitext(entry.name)[0]
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+    @contextlib.contextmanager
+    def snapshot(self) -> Iterator["JsonFileBackend"]:
+        """
+        Hard links every file into a temporary directory next to the storage directory. Documents are
+        replaced instead of rewritten when saving, so the links keep pointing to the old, complete versions.
+        Files are copied instead if the file system does not support hard links.
+        """
+        base_dir = os.path.abspath(self.base_dir)
+        snapshot_dir = tempfile.mkdtemp(prefix=".snapshot-", dir=os.path.dirname(base_dir))
+        try:
+            for directory, _, names in os.walk(base_dir):
+                target_dir = os.path.join(snapshot_dir, os.path.relpath(directory, base_dir))
+                os.makedirs(target_dir, exist_ok=True)
+                for name in names:
+                    if not name.endswith((*self.EXTENSIONS, self.LOG_EXTENSION)):
+                        continue
+                    try:
+                        os.link(os.path.join(directory, name), os.path.join(target_dir, name))
+                    except FileNotFoundError:
+                        continue  # Removed while taking the snapshot
+                    except OSError:
+                        shutil.copy2(os.path.join(directory, name), os.path.join(target_dir, name))
+            yield JsonFileBackend(base_dir=snapshot_dir, sharded=self.sharded)
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    def relayout(self) -> int:
+        """
+        Moves all documents and change logs which are stored in another layout (flat or sharded)
+        to the location used by this backend. Returns the amount of files moved.
+        """
+        count = 0
+        for family in os.listdir(self.base_dir) if os.path.isdir(self.base_dir) else []:
+            if not os.path.isdir(self._family_directory(family)):
+                continue
+            for entry in list(self._walk(family)):
+                key, extension = os.path.splitext(entry.name)
+                if extension not in (*self.EXTENSIONS, self.LOG_EXTENSION):
+                    continue
+                path = os.path.join(self._directory(family, key), entry.name)
+                if os.path.abspath(path) == os.path.abspath(entry.path):
+                    continue
+                self._ensure_directory(path)
+                os.replace(entry.path, path)
+                count += 1
+            self._remove_empty_directories(self._family_directory(family))
+            layout = "sharded" if self.sharded else "flat"
+            logging.info("Moved storage family '%s' to the %s layout (%d files total)", family, layout, count)
+        return count
+
+    def _remove_empty_directories(self, family_directory: str) -> None:
+        for directory, _, _ in os.walk(family_directory, topdown=False):
+            if directory != family_directory and not os.listdir(directory):
+                os.rmdir(directory)
+                self._known_dirs.discard(directory)
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Stores all documents in a single SQLite database, using one table per family and
+    one row per key. The database runs in WAL mode, so reads are not blocked by writes.
+    Change logs are stored in a separate table per family, with one row per record.
+    """
+
+    ROOT_TABLE = "global"
+    LOG_SUFFIX = "__log"
+
+    db_path: str
+    _connection: sqlite3.Connection
+    _lock: threading.Lock
+    _tables: set[str]
+
+    def __init__(self, db_path: str = os.path.join(BASE_DIR, "storage.db")):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._tables = set(self._list_tables())
+
+    def _list_tables(self) -> list[str]:
+        cursor = self._connection.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        return [row[0] for row in cursor.fetchall()]
+
+    def _table(self, family: str, create: bool = False) -> str | None:
+        table = family or self.ROOT_TABLE
+        if not re.fullmatch(r"[A-Za-z0-9_]+", table) or table.endswith(self.LOG_SUFFIX):
+            raise ValueError(f"Invalid storage family name: '{family}'")
+
+        if table not in self._tables:
+            if not create:
+                return None
+            self._connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (key TEXT PRIMARY KEY, data BLOB NOT NULL)')
+            self._tables.add(table)
+        return table
+
+    def _log_table(self, family: str, create: bool = False) -> str | None:
+        table = f"{family or self.ROOT_TABLE}{self.LOG_SUFFIX}"
+        if table not in self._tables:
+            if not create:
+                return None
+            self._connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (key TEXT NOT NULL, record TEXT NOT NULL)')
+            self._connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_key" ON "{table}" (key)')
+            self._tables.add(table)
+        return table
+
+    def read_document(self, family: str, key: str) -> tuple[StoredData, SerializationFormat] | None:
+        with self._lock:
+            table = self._table(family)
+            if table is None:
+                return None
+            row = self._connection.execute(f'SELECT data FROM "{table}" WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return decode(row[0])
+
+    def _write(self, family: str, key: str, serialized: bytes) -> None:
+        table = self._table(family, create=True)
+        self._connection.execute(f'INSERT OR REPLACE INTO "{table}" (key, data) VALUES (?, ?)', (key, serialized))
+
+    def _clear_log(self, family: str, key: str) -> None:
+        table = self._log_table(family)
+        if table is not None:
+            self._connection.execute(f'DELETE FROM "{table}" WHERE key = ?', (key,))
+
+    def write(self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON) -> None:
+        serialized = encode(data, fmt)
+        with self._lock, self._connection:
+            self._write(family, key, serialized)
+
+    def delete(self, family: str, key: str) -> None:
+        with self._lock, self._connection:
+            table = self._table(family)
+            if table is not None:
+                self._connection.execute(f'DELETE FROM "{table}" WHERE key = ?', (key,))
+            self._clear_log(family, key)
+
+    def append(self, family: str, key: str, record: LogRecord) -> None:
+        serialized = json.dumps(record, separators=(",", ":"))
+        with self._lock, self._connection:
+            table = self._log_table(family, create=True)
+            self._connection.execute(f'INSERT INTO "{table}" (key, record) VALUES (?, ?)', (key, serialized))
+
+    def read_log(self, family: str, key: str) -> list[LogRecord]:
+        with self._lock:
+            table = self._log_table(family)
+            if table is None:
+                return []
+            rows = self._connection.execute(f'SELECT record FROM "{table}" WHERE key = ? ORDER BY rowid', (key,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def clear_log(self, family: str, key: str) -> None:
+        with self._lock, self._connection:
+            self._clear_log(family, key)
+
+    def compact(self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON) -> None:
+        # Both steps happen in a single transaction, so logged changes can never be replayed twice.
+        serialized = encode(data, fmt)
+        with self._lock, self._connection:
+            self._write(family, key, serialized)
+            self._clear_log(family, key)
+
+    def families(self) -> list[str]:
+        with self._lock:
+            tables = [table for table in self._tables if not table.endswith(self.LOG_SUFFIX)]
+        return ["" if table == self.ROOT_TABLE else table for table in tables]
+
+    def keys(self, family: str) -> Iterator[str]:
+        with self._lock:
+            table = self._table(family)
+            if table is None:
+                return iter([])
+            rows = self._connection.execute(f'SELECT key FROM "{table}"').fetchall()
+        return iter(row[0] for row in rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    @contextlib.contextmanager
+    def snapshot(self) -> Iterator["SqliteBackend"]:
+        """Copies the database using SQLite's online backup API, which results in a consistent copy of all families."""
+        fd, snapshot_path = tempfile.mkstemp(
+            prefix=".snapshot-", suffix=".db", dir=os.path.dirname(os.path.abspath(self.db_path))
+        )
+        os.close(fd)
+        try:
+            target = sqlite3.connect(snapshot_path)
+            with self._lock:
+                self._connection.backup(target)
+            target.close()
+
+            snapshot = SqliteBackend(db_path=snapshot_path)
+            try:
+                yield snapshot
+            finally:
+                snapshot.close()
+        finally:
+            for path in (snapshot_path, f"{snapshot_path}-wal", f"{snapshot_path}-shm"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+
+def migrate(source: StorageBackend, target: StorageBackend) -> int:
+    """Copies every document from one backend to another, returns the amount of documents copied."""
+    count = 0
+    for family in source.families():
+        for key in source.keys(family):
+            document = source.read_document(family, key)
+            if document is None:
+                continue
+            target.write(family, key, *document)
+            for record in source.read_log(family, key):
+                target.append(family, key, record)
+            count += 1
+        logging.info("Migrated storage family '%s' (%d documents total)", family or SqliteBackend.ROOT_TABLE, count)
+    return count
+
+
+def create_backend(name: str) -> StorageBackend:
+    match name.strip().lower():
+        case "json":
+            return JsonFileBackend()
+        case "sqlite":
+            return SqliteBackend()
+        case _:
+            raise ValueError(f"Unknown storage backend '{name}', expected 'json' or 'sqlite'.")
+
+
+class StorageWriter:
+    """
+    Runs all operations on a storage backend on a single dedicated I/O thread.
+
+    Because there is only one thread, operations are executed in the order they were
+    submitted. Reads are queued as well, so they always see the result of writes which
+    were submitted earlier.
+    """
+
+    backend: StorageBackend
+    _executor: ThreadPoolExecutor
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+
+    def submit_write(
+        self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON
+    ) -> Future[None]:
+        return self._executor.submit(self.backend.write, family, key, data, fmt)
+
+    def write(self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON) -> None:
+        self.submit_write(family, key, data, fmt).result()
+
+    async def write_async(
+        self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON
+    ) -> None:
+        await asyncio.wrap_future(self.submit_write(family, key, data, fmt))
+
+    def write_in_background(
+        self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON
+    ) -> None:
+        """Queues a write without waiting for it to be written, failures are logged."""
+        self.submit_write(family, key, data, fmt).add_done_callback(self._log_failure)
+
+    def append(self, family: str, key: str, record: LogRecord) -> None:
+        """Queues a change record without waiting for it to be written, failures are logged."""
+        future = self._executor.submit(self.backend.append, family, key, record)
+        future.add_done_callback(self._log_failure)
+
+    def compact(self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON) -> None:
+        self._executor.submit(self.backend.compact, family, key, data, fmt).result()
+
+    async def compact_async(
+        self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON
+    ) -> None:
+        await asyncio.wrap_future(self._executor.submit(self.backend.compact, family, key, data, fmt))
+
+    def compact_in_background(
+        self, family: str, key: str, data: StoredData, fmt: SerializationFormat = SerializationFormat.JSON
+    ) -> None:
+        future = self._executor.submit(self.backend.compact, family, key, data, fmt)
+        future.add_done_callback(self._log_failure)
+
+    def wait(self) -> None:
+        """Waits until every operation which was queued before is finished, e.g. writes queued in the background."""
+        self._executor.submit(lambda: None).result()
+
+    @staticmethod
+    def _log_failure(future: Future[None]) -> None:
+        error = future.exception()
+        if error is not None:
+            logging.error("Failed to write to storage: %s", error)
+
+    def read(self, family: str, key: str) -> StoredData | None:
+        return self._executor.submit(self.backend.read, family, key).result()
+
+    def read_log(self, family: str, key: str) -> list[LogRecord]:
+        return self._executor.submit(self.backend.read_log, family, key).result()
+
+    def read_document(self, family: str, key: str) -> tuple[StoredData, SerializationFormat] | None:
+        return self._executor.submit(self.backend.read_document, family, key).result()
+
+
+Storage = StorageWriter(create_backend(os.getenv("STORAGE_BACKEND", "json")))
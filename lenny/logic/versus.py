@@ -0,0 +1,98 @@
+import dataclasses
+
+import discord
+import numpy as np
+
+from logic.charts import convert_and_close_fig, empty_distribution_chart, style_legend
+from logic.color import UserColor, hue_shift_n_colors_from_base
+from logic.distribution import (
+    DenseDistribution,
+    dice_distribution,
+    to_dense,
+    to_matplotlib_color,
+)
+from logic.roll import Advantage
+from methods import PicklableFile
+
+
+@dataclasses.dataclass(frozen=True)
+class VersusChances:
+    win: float
+    tie: float
+    loss: float
+
+
+def versus_chances(first: DenseDistribution, second: DenseDistribution) -> VersusChances:
+    """
+    Chances of the first result being higher than, equal to, or lower than the second result. Uses the
+    cumulative distribution of the second result, so only O(|first| + |second|) work is required.
+    """
+    keys = np.arange(first.min(), first.max() + 1)
+    # cumulative[i] is the chance of the second result being lower than `second.offset + i`
+    cumulative = np.concatenate(([0.0], np.cumsum(second.probabilities)))
+    lower = cumulative[np.clip(keys - second.offset, 0, len(cumulative) - 1)]
+    at_most = cumulative[np.clip(keys - second.offset + 1, 0, len(cumulative) - 1)]
+
+    win = float((first.probabilities * lower).sum())
+    tie = float((first.probabilities * (at_most - lower)).sum())
+    return VersusChances(win=win, tie=tie, loss=max(0.0, 1.0 - win - tie))
+
+
+@dataclasses.dataclass
+class VersusResult:
+    expression: str
+    advantage: Advantage
+    opponent: str
+    opponent_advantage: Advantage
+    difference: DenseDistribution  # Distribution of the expression's result minus the opponent's result
+    chances: VersusChances
+    chart: discord.File
+
+
+def _versus_chart(result: DenseDistribution, color: int, labels: tuple[str, str]) -> discord.File:
+    win_color, loss_color = hue_shift_n_colors_from_base(to_matplotlib_color(color), 2, fallback_color=(1.0, 0.0, 0.0))
+    white = to_matplotlib_color(UserColor.parse("#FFFFFF"))
+
+    keys = np.arange(result.min(), result.max() + 1)
+    values = 100 * result.probabilities  # In percent
+
+    fig, ax = empty_distribution_chart(keys.tolist(), "Difference between results")
+    for mask, bar_color, label in (
+        (keys > 0, win_color, labels[0]),
+        (keys == 0, white, "Tie"),
+        (keys < 0, loss_color, labels[1]),
+    ):
+        if mask.any():
+            ax.bar(keys[mask], values[mask], color=bar_color, label=label)  # type: ignore
+
+    style_legend(ax.legend())  # type: ignore
+
+    buf = convert_and_close_fig(fig)
+    return PicklableFile(fp=buf, filename="versus.png")
+
+
+def versus(
+    expression: str,
+    opponent: str,
+    advantage: Advantage,
+    opponent_advantage: Advantage,
+    color: int,
+) -> VersusResult:
+    """
+    Compares an expression against an opponent's expression, e.g. for contested checks. The difference between
+    both results is the convolution of the first distribution with the negated second distribution.
+    """
+    first = to_dense(dice_distribution(expression, advantage))
+    second = to_dense(dice_distribution(opponent, opponent_advantage))
+    difference = first + (-second)
+
+    chart = _versus_chart(difference, color, (f"{expression} wins", f"{opponent} wins"))
+    return VersusResult(
+        expression=expression,
+        advantage=advantage,
+        opponent=opponent,
+        opponent_advantage=opponent_advantage,
+        difference=difference,
+        chances=versus_chances(first, second),
+        chart=chart,
+    )
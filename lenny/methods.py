@@ -1,8 +1,12 @@
+import asyncio
+import io
 import json
 import logging
+import multiprocessing
 import os
 from collections.abc import Callable
 from enum import Enum
+from multiprocessing.connection import Connection
 from typing import Any, TypeVar
 
 import discord
@@ -65,6 +69,145 @@ def call_with_timeout(timeout: int, func: Callable[..., T], args: list[Any]) ->
     return proc.result
 
 
+def _restore_file(data: bytes, filename: str | None, spoiler: bool, description: str | None) -> "PicklableFile":
+    return PicklableFile(io.BytesIO(data), filename=filename, spoiler=spoiler, description=description)
+
+
+class PicklableFile(discord.File):
+    """A discord.File which can be sent between processes, required for files created in the ProcessPool."""
+
+    def __reduce__(self):
+        position = self.fp.tell()
+        self.fp.seek(0)
+        data = self.fp.read()
+        self.fp.seek(position)
+        return (_restore_file, (data, self.filename, self.spoiler, self.description))
+
+
+def _worker_stats(stats: Callable[[], Any] | None) -> Any:
+    try:
+        return stats() if stats is not None else None
+    except Exception:  # pylint: disable=broad-exception-caught
+        return None
+
+
+def _worker_main(connection: Connection):
+    """Entry point of the ProcessPool's workers, runs the received functions until the connection is closed."""
+    while True:
+        try:
+            func, args, stats = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            result = (True, func(*args))
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            result = (False, exception)
+
+        # Statistics are sent along with every result, so they can be collected without running extra calculations.
+        try:
+            connection.send((*result, _worker_stats(stats)))
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            connection.send((False, RuntimeError(f"Could not send the result back to the bot: {exception}"), None))
+
+
+class _Worker:
+    def __init__(self, context: Any):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def terminate(self):
+        self.process.kill()
+        self.connection.close()
+
+
+class ProcessPool:
+    """
+    Runs heavy calculations in separate worker processes, so they can't block the bot's event loop.
+    Calculations which take too long are cancelled by killing their worker, which is replaced on the next
+    request. At most `max_queued` requests wait for a free worker, any additional requests are refused.
+
+    If `stats` is set, workers call it after every calculation and send its result back along with the
+    calculation's result, e.g. to keep track of the workers' caches.
+    """
+
+    stats: Callable[[], Any] | None
+
+    def __init__(self, workers: int, max_queued: int, stats: Callable[[], Any] | None = None):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.stats = stats
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = asyncio.Semaphore(workers)
+        self._idle: list[_Worker] = []
+        self._stats: dict[_Worker, Any] = {}
+        self._requests = 0
+
+    async def run(self, timeout: float, func: Callable[..., T], *args: Any, timeout_message: str | None = None) -> T:
+        """
+        Runs `func(*args)` in a worker process and returns its result, the function and its arguments need to be
+        picklable. Raises a TimeoutError if the calculation takes longer than `timeout` seconds.
+        """
+        if self._requests >= self.workers + self.max_queued:
+            raise RuntimeError("Too many calculations are running right now, please try again in a moment.")
+
+        self._requests += 1
+        try:
+            async with self._slots:
+                success, result = await self._run_in_worker(timeout, func, args, timeout_message)
+        finally:
+            self._requests -= 1
+
+        if not success:
+            raise result
+        return result
+
+    def worker_stats(self) -> list[Any]:
+        """The latest statistics sent back by each worker which is still running, see `stats`."""
+        return list(self._stats.values())
+
+    async def _run_in_worker(
+        self,
+        timeout: float,
+        func: Callable[..., Any],
+        args: tuple[Any, ...],
+        timeout_message: str | None,
+    ) -> tuple[bool, Any]:
+        worker = self._idle.pop() if self._idle else _Worker(self._context)
+        loop = asyncio.get_running_loop()
+        try:
+            worker.connection.send((func, args, self.stats))
+            success, result, stats = await asyncio.wait_for(loop.run_in_executor(None, worker.connection.recv), timeout)
+        except TimeoutError as exception:
+            self._terminate(worker)
+            raise TimeoutError(timeout_message or f"Calculation took longer than {timeout} seconds!") from exception
+        except EOFError as exception:
+            self._terminate(worker)
+            raise RuntimeError("Calculation stopped unexpectedly!") from exception
+        except BaseException:  # e.g. the interaction was cancelled, the calculation is no longer needed
+            self._terminate(worker)
+            raise
+
+        if stats is not None:
+            self._stats[worker] = stats
+        self._idle.append(worker)
+        return success, result
+
+    def _terminate(self, worker: _Worker):
+        worker.terminate()
+        self._stats.pop(worker, None)  # The worker's caches are gone as well
+
+    def shutdown(self):
+        for worker in self._idle:
+            self._terminate(worker)
+        self._idle.clear()
+
+
+Calculations = ProcessPool(workers=2, max_queued=8)
+
+
 def join_strings(strings: list[str], separator: str, final_separator: str) -> str:
     """
     Join multiple strings together with a special final separator. For example:
@@ -175,6 +175,15 @@ SLASH_COMMAND_TESTS: Iterable[Iterable[Any]] = [
             "style": DistributionChartStyle.values(),
         },
     ),
+    (
+        "versus",
+        {
+            "expression": ["1d20+7", "2d6"],
+            "opponent": ["1d20+4"],
+            "advantage": [None, "advantage"],
+            "opponent_advantage": [None, "disadvantage"],
+        },
+    ),
     (
         "charactergen",
         {
@@ -1,9 +1,11 @@
+import discord
 import pytest
 from mocking import MockEmbed, MockInteraction, MockMessage, MockUser
 from test_context_menus.context_menu import TestAbstractContextMenu
 
 from context_menus.context_menu import BaseContextMenu
 from context_menus.reroll import RerollContextMenu
+from logic.roll import Advantage, RollMetadata
 
 
 class TestRerollContextMenu(TestAbstractContextMenu):
@@ -44,6 +46,21 @@ class TestRerollContextMenu(TestAbstractContextMenu):
             with pytest.raises(ValueError):
                 await cmd.handle(itr, message)
 
+    @pytest.mark.parametrize("amount", [None, 3])
+    async def test_reroll_metadata(self, cmd: BaseContextMenu, itr: MockInteraction, message: MockMessage, amount: int | None):
+        """Rolls with metadata in their URL should not rely on the embed's text."""
+        metadata = RollMetadata("1d20 + 3", Advantage.ADVANTAGE, amount, "Attack")
+        embed = MockEmbed(title="abcdef", author="abcdef")
+        embed.url = metadata.encode()
+        message.embeds = [embed]
+
+        await cmd.handle(itr, message)
+
+        sent: discord.Embed = itr.response.send_message.call_args.kwargs["embed"]
+        multiple = "" if amount is None else " multiple times"
+        assert sent.author.name == f"Re-rolling 1d20 + 3{multiple} with advantage!"
+        assert RollMetadata.decode(sent.url) == metadata, "Re-roll should use the expression, advantage, amount and reason."
+
     async def test_invalid_embed_reroll(self, cmd: BaseContextMenu, itr: MockInteraction, message: MockMessage):
         """Try to roll on message with no embeds."""
         message.embeds = []
@@ -0,0 +1,32 @@
+import time
+from typing import Any
+
+import pytest
+
+from embeds.distribution import (
+    DISTRIBUTION_TIMEOUT,
+    EXACT_TIMEOUT,
+    calculate_distribution,
+)
+from logic.roll import Advantage
+from methods import Calculations
+
+
+class TestCalculateDistribution:
+    async def test_steps_share_deadline(self, monkeypatch: pytest.MonkeyPatch):
+        timeouts: list[float] = []
+
+        async def run(timeout: float, func: Any, *args: Any, timeout_message: str | None = None) -> Any:
+            timeouts.append(timeout)
+            if len(timeouts) == 1:
+                time.sleep(0.1)  # The exact calculation takes time before timing out
+                raise TimeoutError()
+            return None
+
+        monkeypatch.setattr(Calculations, "run", run)
+        await calculate_distribution("1d20", Advantage.NORMAL, 0xFF0000)
+
+        exact, simulation, chart = timeouts
+        assert exact == EXACT_TIMEOUT
+        assert simulation <= DISTRIBUTION_TIMEOUT - 0.1, "The simulation should only get the time which is left."
+        assert chart <= simulation, "The chart should only get the time which is left."
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from logic.archive import export_archive, import_archive
+from logic.storage import (
+    JsonFileBackend,
+    SerializationFormat,
+    SqliteBackend,
+    StorageBackend,
+)
+
+
+def create_backend(name: str, directory: str) -> StorageBackend:
+    if name == "json":
+        return JsonFileBackend(base_dir=os.path.join(directory, "temp"))
+    return SqliteBackend(db_path=os.path.join(directory, "storage.db"))
+
+
+def populate(backend: StorageBackend):
+    backend.write("", "user_colors", {"123": 255})
+    backend.write("config", "1", {"config": {"roles": [1, 2]}})
+    backend.write("homebrew", "1", {"spell": [{"name": "Homebrew Bolt"}]}, SerializationFormat.JSON_PRETTY)
+    for key in range(300):
+        backend.write("user_cache", str(key), {"dice": {"rolls": [f"{key}d20"]}}, SerializationFormat.MSGPACK)
+    backend.append("user_cache", "0", ["roll", "1d4"])
+
+
+class TestArchive:
+    @pytest.mark.parametrize("source_name", ["json", "sqlite"])
+    @pytest.mark.parametrize("target_name", ["json", "sqlite"])
+    def test_export_import(self, tmp_path: str, source_name: str, target_name: str):
+        source = create_backend(source_name, os.path.join(tmp_path, "source"))
+        populate(source)
+
+        archive = os.path.join(tmp_path, "backup.tar.gz")
+        assert export_archive(source, archive, workers=4) == 303, "All documents should be exported."
+
+        target = create_backend(target_name, os.path.join(tmp_path, "target"))
+        assert import_archive(target, archive) == 303, "All documents should be imported."
+
+        assert target.read("", "user_colors") == {"123": 255}
+        assert target.read_document("homebrew", "1") == (
+            {"spell": [{"name": "Homebrew Bolt"}]},
+            SerializationFormat.JSON_PRETTY,
+        )
+        assert target.read_document("user_cache", "299") == ({"dice": {"rolls": ["299d20"]}}, SerializationFormat.MSGPACK)
+        assert target.read_log("user_cache", "0") == [["roll", "1d4"]], "Change logs should be exported as well."
+
+    @pytest.mark.parametrize("backend_name", ["json", "sqlite"])
+    def test_snapshot_is_isolated(self, tmp_path: str, backend_name: str):
+        backend = create_backend(backend_name, str(tmp_path))
+        backend.write("config", "1", {"a": 1})
+
+        with backend.snapshot() as snapshot:
+            backend.write("config", "1", {"b": 2})
+            backend.write("config", "2", {})
+
+            assert snapshot.read("config", "1") == {"a": 1}, "Snapshots should not see later writes."
+            assert set(snapshot.keys("config")) == {"1"}
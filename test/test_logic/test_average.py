@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from approx import approx
+
+from logic.average import (
+    AverageDamageACResults,
+    AverageDamageDCResults,
+    AverageDamageSweep,
+    double_dice_in_expression,
+)
+from logic.distribution import dice_distribution, distribution_cache_info
+from logic.roll import Advantage
+
+
+def _scalar_average_damage(
+    hit: str,
+    damage: str,
+    ac: int,
+    advantage: Advantage,
+    crit_min: int,
+    miss_damage: str = "0",
+    ignore_crit: bool = False,
+    attacks: int = 1,
+) -> float:
+    """The average damage against a single AC, calculated one roll at a time as /average did before its sweeps."""
+    roll_advantage = Advantage.NORMAL if advantage == Advantage.SAVAGE_ATTACKER else advantage
+    damage_advantage = Advantage.SAVAGE_ATTACKER if advantage == Advantage.SAVAGE_ATTACKER else Advantage.NORMAL
+    d20_hit = dice_distribution("1d20", roll_advantage)
+    hit_bonus = dice_distribution(hit)
+
+    crit_miss_values: set[int] = set() if ignore_crit else {1}
+    crit_hit_values: set[int] = set() if ignore_crit else set(range(crit_min, 21))
+    other_roll_values = set(range(1, 21)) - crit_miss_values - crit_hit_values
+
+    crit_miss_chance = sum(d20_hit.get(r) for r in crit_miss_values)
+    crit_hit_chance = sum(d20_hit.get(r) for r in crit_hit_values)
+    normal_hit_chance = 0
+    normal_miss_chance = 0
+    for value in other_roll_values:
+        for bonus in hit_bonus.keys():
+            odds = d20_hit.get(value) * hit_bonus.get(bonus)
+            if value + bonus >= ac:
+                normal_hit_chance += odds
+            else:
+                normal_miss_chance += odds
+    miss_chance = normal_miss_chance + crit_miss_chance
+
+    hit_avg = dice_distribution(damage, damage_advantage).mean()
+    miss_avg = dice_distribution(miss_damage, damage_advantage).mean()
+    crit_avg = dice_distribution(double_dice_in_expression(damage), damage_advantage).mean()
+    return ((normal_hit_chance * hit_avg) + (miss_chance * miss_avg) + (crit_hit_chance * crit_avg)) * attacks
+
+
+class TestAverageDamage:
+    @pytest.mark.parametrize(
+        ("hit", "damage", "crit_min", "miss_damage", "attacks"),
+        [
+            ("5", "1d8+3", 20, "0", 1),
+            ("7+1d4", "4d6kh3+5", 19, "1d4", 2),
+            ("-1", "1d10", 18, "0", 3),
+            ("12", "2d6ro1", 2, "1", 1),
+        ],
+    )
+    def test_ac_matches_scalar(self, hit: str, damage: str, crit_min: int, miss_damage: str, attacks: int):
+        """The sweep should give exactly the same averages as calculating each AC separately, so the csv doesn't change."""
+        results = AverageDamageACResults(hit, damage, 0, 30, crit_min, miss_damage, attacks)
+
+        for (ac, advantage), avg in results.data.items():
+            assert avg == _scalar_average_damage(hit, damage, ac, advantage, crit_min, miss_damage, attacks=attacks)
+
+    def test_dc_matches_scalar(self):
+        results = AverageDamageDCResults(15, "8d6", "4d6", -5, 12)
+
+        for (mod, advantage), avg in results.data.items():
+            assert avg == _scalar_average_damage("0", "4d6", 15 - mod, advantage, 20, "8d6", ignore_crit=True)
+
+    def test_distributions_are_shared(self):
+        """A full sweep should compute each distinct distribution exactly once."""
+        before = distribution_cache_info()
+        AverageDamageACResults("5", "1d8+3", 8, 30, 20, "0", 1)
+        after = distribution_cache_info()
+
+        misses, hits = after.misses - before.misses, after.hits - before.hits
+        assert misses == after.currsize - before.currsize, "Each distribution should only be computed once."
+        assert hits > misses
+
+
+class TestAverageDamageSweep:
+    @pytest.fixture
+    def sweep(self) -> AverageDamageSweep:
+        return AverageDamageSweep(
+            advantage=Advantage.NORMAL,
+            attacks=2,
+            hit_chance=np.array([0.5, 0.0]),
+            miss_chance=np.array([0.45, 0.95]),
+            crit_chance=np.array([0.05, 0.05]),
+            hit_damage=dice_distribution("1d4"),
+            miss_damage=dice_distribution("0"),
+            crit_damage=dice_distribution("2d4"),
+        )
+
+    def test_avg_damage(self, sweep: AverageDamageSweep):
+        assert sweep.avg_damage[0] == approx(2 * (0.5 * 2.5 + 0.05 * 5))
+        assert sweep.avg_damage[1] == approx(2 * 0.05 * 5)
+
+    def test_round_damage(self, sweep: AverageDamageSweep):
+        for index in range(2):
+            dist = sweep.round_damage(index)
+            assert dist.mean() == approx(float(sweep.avg_damage[index])), "Mean damage should match the average."
+
+        assert sweep.round_damage(0).get(0) == approx(0.45**2), "Both attacks have to miss to deal no damage."
+        assert sweep.round_damage(1).max() == 16, "Two maximum crits deal 16 damage."
+
+
+class TestRoundDamage:
+    def test_matches_average(self):
+        results = AverageDamageACResults("5", "1d8+3", 10, 20, 20, "0", 2)
+
+        for ac in results.x_values:
+            dist = results.round_damage(ac, Advantage.NORMAL)
+            assert dist.mean() == approx(results.data[(ac, Advantage.NORMAL)]), "Mean damage should match the average."
+
+    def test_kill_chance(self):
+        results = AverageDamageACResults("5", "1d8+3", 10, 20, 20, "0", 1, target_hp=20)
+
+        assert results.kill_chance(15, Advantage.NORMAL, 19) == approx(0.05 / 64), "Only maximum crits deal 19 damage."
+        assert results.kill_chance(15, Advantage.NORMAL, 1) == approx(0.55)
+        assert results.kill_chance(15, Advantage.NORMAL, 30) == 0
+
+    def test_round_summary(self):
+        assert AverageDamageACResults("5", "1d8+3", 10, 20, 20, "0", 1).round_summary is None
+
+        summary = AverageDamageACResults("5", "1d8+3", 10, 20, 20, "0", 1, target_ac=12, target_hp=10).round_summary
+        assert summary is not None
+        assert "AC 12" in summary
+        assert "Kill (10 HP)" in summary
+
+    def test_halved_miss_damage(self):
+        results = AverageDamageACResults("5", "8d6", 10, 20, 20, "(8d6)/2", 1, target_hp=20)
+
+        assert results.round_summary is not None
+        assert results.kill_chance(15, Advantage.NORMAL, 1) == approx(1.0), "Halved damage on a miss still deals damage."
+
+    def test_target_ac_out_of_range(self):
+        with pytest.raises(ValueError):
+            AverageDamageACResults("5", "1d8+3", 10, 20, 20, "0", 1, target_ac=25)
@@ -5,6 +5,7 @@ import pytest
 from mocking import MockInteraction
 
 from logic.color import ColorRGBFloat, UserColor, is_nearly_grayscale
+from logic.storage import Storage
 
 
 class TestColorUtil:
@@ -55,6 +56,7 @@ class TestUserColor:
         color = 7110183
 
         UserColor.load()
+        Storage.wait()  # Loading a missing file saves it in the background
         if os.path.exists(UserColor.file_path):
             os.remove(UserColor.file_path)
         else:
@@ -69,6 +71,7 @@ class TestUserColor:
 
         # Test saving
         UserColor.add(itr, color)
+        Storage.wait()
         assert os.path.exists(UserColor.file_path), "Test file should exist after saving."
 
         # Test getting color
@@ -82,4 +85,5 @@ class TestUserColor:
         remove_status = UserColor.remove(itr)
         assert not remove_status, "Removal should fail as color is already removed."
 
+        Storage.wait()
         os.remove(UserColor.file_path)
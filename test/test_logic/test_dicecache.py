@@ -3,7 +3,8 @@ from discord import Interaction
 from mocking import MockInteraction, MockUser
 
 from logic.coin import parse_coin
-from logic.dicecache import DiceCache, DiceCacheInfo, DiceCacheTrie
+from logic.dicecache import DiceCache, DiceCacheHandler, DiceCacheInfo, DiceCacheTrie
+from logic.storage import Storage
 
 
 class TestDiceCacheTrie:
@@ -119,3 +120,50 @@ class TestDiceExpressionCache:
     def test_coin_autocomplete_empty_on_query(self, itr: Interaction):
         suggestions = DiceCache.get(itr).get_autocomplete_suggestions("20gp")
         assert suggestions == [], "Suggestions should be empty when a query is entered."
+
+
+class TestDiceCacheJournal:
+    user_id = MockUser("JournalTest").id
+
+    @pytest.fixture
+    def handler(self) -> DiceCacheHandler:
+        handler = DiceCacheHandler(self.user_id)
+        handler.cache = DiceCacheInfo.empty()
+        handler.write()
+        return handler
+
+    def test_changes_are_logged(self, handler: DiceCacheHandler):
+        handler.store_expression("1d20+5")
+        handler.store_reason("Attack")
+        handler.store_grouproll("Initiative", "3")
+
+        assert len(Storage.read_log("user_cache", str(self.user_id))) == 3, "Every change should be logged."
+
+        reloaded = DiceCacheHandler(self.user_id)
+        assert reloaded.cache.rolls == ["1d20+5"], "Logged changes should be replayed when loading."
+        assert reloaded.cache.reasons == ["Attack"]
+        assert reloaded.get_last_grouproll("Initiative") == "3"
+
+    def test_log_is_compacted(self, handler: DiceCacheHandler, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(DiceCacheHandler, "_compact_threshold", 3)
+        for i in range(4):
+            handler.store_expression(f"{i + 1}d20")
+
+        assert Storage.read_log("user_cache", str(self.user_id)) == [], "Log should be compacted after the threshold."
+
+        document = Storage.read("user_cache", str(self.user_id))
+        assert document is not None
+        assert document["dice"]["rolls"] == ["1d20", "2d20", "3d20", "4d20"]
+
+    def test_replay_after_interrupted_compaction(self, handler: DiceCacheHandler, monkeypatch: pytest.MonkeyPatch):
+        """A crash between writing the snapshot and clearing the log replays the log, which shouldn't count rolls twice."""
+        monkeypatch.setattr(DiceCacheHandler, "_compact_threshold", 3)
+        monkeypatch.setattr(Storage.backend, "clear_log", lambda family, key: None)
+        loaded = DiceCacheHandler(self.user_id)  # Loaded from the fixture's empty cache, with a matching trie
+        for _ in range(4):
+            loaded.store_expression("1d20")
+        Storage.wait()
+
+        assert len(Storage.read_log("user_cache", str(self.user_id))) == 4, "The log should not have been cleared."
+        reloaded = DiceCacheHandler(self.user_id)
+        assert reloaded.cache.trie["1d20"] == 4, "Replayed rolls should not be counted again."
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from logic.dicecost import MAX_ROLLS, ExpressionCost, estimate_cost
+from logic.roll import expression_cost, tokenize_expression
+
+# Expressions accepted by d100, as used throughout the bot and its tests
+D100_EXPRESSIONS = [
+    "1d20",
+    "d20",
+    "1d20 + 5",
+    "1d20 - 2d8",
+    "1d20 + (1d4+2)",
+    "1d20 + (5)",
+    "1d20 + (2d6, 1d8)kh1",
+    "1d20,2d20,3d20",
+    "1d6, 2d4",
+    "(1d4, 2d6)kh1",
+    "(1d6)/2",
+    "1d20/2",
+    "1d20-1d20-1d20-1d20 / 2",
+    "3 * 1d6 - 2",
+    "-1d4 * 2",
+    "7+1d4",
+    "(1d20+7>14) * 1d8",
+    "((6>7)*(1d8+7))",
+    "1d20 >= 15",
+    "2d6 [fire] + 1d4",
+    "4d6kh3",
+    "5d10kl2",
+    "2d20kh1",
+    "1d20mi10+5",
+    "1d20mi17ma17+3",
+    "1d4ro1",
+    "2d4ro<5",
+    "3d6ra>0",
+    "1d6rr<7",
+    "10d6e6",
+    "1d1e1",
+    "2000d6",
+]
+
+
+def estimate(expression: str) -> ExpressionCost | None:
+    tokens = tokenize_expression(expression)
+    return estimate_cost(tokens) if tokens is not None else None
+
+
+class TestEstimateCost:
+    @pytest.mark.parametrize(
+        "expression, rolls, minimum, maximum",
+        [
+            ("1d20 + 5", 1, 6, 25),
+            ("d20", 1, 1, 20),
+            ("4d6kh3", 4, 3, 18),
+            ("2d6 - 1d4", 3, -2, 11),
+            ("1d20mi21", 1, 21, 21),
+            ("1d8ro1", 2, 1, 8),
+            ("(1d4, 2d6)kh1", 3, 0, 16),
+            ("2d6 [fire] + 1d4", 3, 3, 16),
+            ("1d20 >= 15", 1, 0, 1),
+            ("-1d4 * 2", 1, -8, -2),
+        ],
+    )
+    def test_bounds(self, expression: str, rolls: int, minimum: int, maximum: int):
+        cost = estimate(expression)
+
+        assert cost is not None, f"'{expression}' should be supported."
+        assert cost.rolls == rolls
+        assert (cost.minimum, cost.maximum) == (minimum, maximum)
+        assert cost.support <= maximum - minimum + 1, "Support can't be larger than the range of results."
+
+    def test_exploding_dice(self):
+        cost = estimate("10d6e6")
+        assert cost is not None
+        assert 10 < cost.rolls < 100, "Exploding dice should add a bounded amount of rolls."
+        assert not cost.too_many_rolls
+
+    @pytest.mark.parametrize("expression", ["1d1e1", "1d6rr<7", f"{MAX_ROLLS + 1}d6"])
+    def test_too_many_rolls(self, expression: str):
+        cost = estimate(expression)
+        assert cost is not None and cost.too_many_rolls, f"'{expression}' should exceed the roll limit."
+
+    def test_likely_too_many_rolls(self):
+        """Expressions which only exceed the roll limit by chance can still be rolled."""
+        cost = estimate("25d20rr<20")
+        assert cost is not None
+
+        assert cost.min_rolls == 25
+        assert not cost.too_many_rolls
+        assert cost.too_expensive, "The distribution should be simulated instead of calculated."
+
+    @pytest.mark.parametrize(
+        "expression, min_rolls",
+        [("4d6", 4), ("1d8ro1", 1), ("2d4ro<5", 4), ("3d6ra>0", 6), ("10d6e6", 10), ("1d20 + (2d6, 1d8)kh1", 4)],
+    )
+    def test_min_rolls(self, expression: str, min_rolls: int):
+        cost = estimate(expression)
+        assert cost is not None and cost.min_rolls == min_rolls
+
+    def test_convolution_cost(self):
+        cheap, expensive = estimate("2d6"), estimate("200d100")
+        assert cheap is not None and expensive is not None
+
+        assert not cheap.too_expensive
+        assert expensive.too_expensive, "Large distributions should be too expensive to calculate."
+
+    def test_repeated(self):
+        cost = estimate("1d20 + 5")
+        assert cost is not None
+
+        assert cost.repeated(3).rolls == 3 * cost.rolls, "Rolling with advantage rolls the expression multiple times."
+
+    @pytest.mark.parametrize("expression", ["1d10red", "1d20 +", "(1d4", "1d6kx1"])
+    def test_unsupported(self, expression: str):
+        assert estimate(expression) is None, "Unsupported syntax should not be estimated."
+
+    @pytest.mark.parametrize("expression", D100_EXPRESSIONS)
+    def test_d100_expressions_are_estimated(self, expression: str):
+        assert expression_cost(expression) is not None, f"'{expression}' is accepted by d100, so it should have a cost."
+
+    def test_never_raises(self):
+        """Any sequence of tokens either gets a cost or is rejected with None, but never raises."""
+        parts = ["1d20", "4d6kh3", "2d6e6", "1d0", "0d6", "3", "1.5", "1" * 400, "+", "-", "*", "/", "%", "(", ")"]
+        parts += [",", ">=", "==", "kh1", "[fire]"]
+        generator = random.Random(0)
+        for _ in range(2000):
+            expression = " ".join(generator.choices(parts, k=generator.randint(1, 8)))
+            cost = estimate(expression)
+            assert cost is None or isinstance(cost, ExpressionCost)
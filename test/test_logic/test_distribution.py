@@ -1,7 +1,27 @@
+import math
+
+import d100
+import numpy as np
+import pytest
 from approx import approx
 
-from logic.distribution import distribution
-from logic.roll import Advantage
+from logic.distribution import (  # type: ignore
+    DenseDistribution,
+    DistributionChartStyle,
+    SimulatedDistribution,
+    SingleDistributionResult,
+    _cached_distribution,
+    _probability_matrix,
+    dense_distribution,
+    dice_distribution,
+    distribution,
+    distribution_chart,
+    distribution_results,
+    simulate_distribution,
+    to_dense,
+)
+from logic.distributioncache import DistributionDiskCache
+from logic.roll import Advantage, clean_expression, parse
 
 
 class TestDistribution:
@@ -30,3 +50,158 @@ class TestDistribution:
         assert dist.distributions[1].min == 1
         assert dist.distributions[1].max == 8
         assert dist.distributions[1].mean == approx(4.50)
+
+    def test_overlap_many_distributions(self):
+        """The overlap chart should only draw one layer per distribution, instead of one per combination."""
+        expressions = ",".join(f"{amount}d6" for amount in range(1, 11))
+        dist = distribution(expressions, Advantage.NORMAL, 0xFF00FF, style=DistributionChartStyle.OVERLAP)
+
+        assert len(dist.distributions) == 10
+        assert dist.chart.filename == "distribution.png"
+
+    def test_results_then_chart(self):
+        """The math and the chart are calculated separately, so only the math counts towards the exact time limit."""
+        results = distribution_results("1d6, 2d4", Advantage.ADVANTAGE, min_to_beat=5)
+        dist = distribution_chart(results, 0xFF00FF, DistributionChartStyle.OVERLAP)
+
+        assert [result.expression for result in dist.distributions] == ["1d6", "2d4"]
+        assert dist.advantage == Advantage.ADVANTAGE and dist.min_to_beat == 5
+        assert dist.chart.filename == "distribution.png"
+
+    def test_probability_matrix(self):
+        dists = [SingleDistributionResult(expr, Advantage.NORMAL, None) for expr in ["1d4", "1d8ro1", "2d4"]]
+        matrix = _probability_matrix(dists, list(range(1, 9)))
+
+        for row, dist in zip(matrix, dists):
+            for column, key in enumerate(range(1, 9)):
+                assert row[column] == approx(100 * dist.distribution.get(key))
+
+
+class TestDistributionCache:
+    def test_shared_between_expressions(self):
+        _cached_distribution.cache_clear()
+        first = dice_distribution("1d8+2")
+        second = dice_distribution("1d8 + 2")
+
+        assert first is second, "Expressions with the same cleaned form should share their distribution."
+        assert _cached_distribution.cache_info().misses == 1
+
+    def test_disk_cache(self, tmp_path: str, monkeypatch: pytest.MonkeyPatch):
+        disk = DistributionDiskCache(str(tmp_path), version="v1-d100-test")
+        monkeypatch.setattr("logic.distribution.DistributionDisk", disk)
+
+        _cached_distribution.cache_clear()
+        calculated = dice_distribution("1d8ro1", Advantage.ADVANTAGE)
+        _cached_distribution.cache_clear()
+        loaded = dice_distribution("1d8ro1", Advantage.ADVANTAGE)
+
+        assert disk.hits == 1, "The distribution should be loaded from disk after being calculated once."
+        assert loaded.keys() == calculated.keys()
+        for key in calculated.keys():
+            assert loaded.get(key) == approx(calculated.get(key))
+
+
+class TestDenseDistribution:
+    @pytest.mark.parametrize("expression", ["2d6 + 3", "4d6kh3", "1d20 + 1d4 + 5", "3 * 1d6 - 2", "1d20 - 2d8", "5d10kl2"])
+    @pytest.mark.parametrize("advantage", Advantage.values())
+    def test_matches_d100(self, expression: str, advantage: Advantage):
+        dense = dense_distribution(clean_expression(expression), advantage)
+        assert dense is not None, f"'{expression}' should be supported by the dense engine."
+
+        parsed, _ = parse(expression, advantage)
+        reference = d100.distribution(parsed)
+
+        assert dense.min() == reference.min()
+        assert dense.max() == reference.max()
+        assert dense.mean() == approx(reference.mean())
+        for key in range(reference.min(), reference.max() + 1):
+            assert dense.get(key) == approx(reference.get(key)), f"Odds of {key} should match d100's distribution."
+
+    @pytest.mark.parametrize("expression", ["1d6e6", "1d20mi10", "(1d4, 2d6)kh1", "1d20 >= 15", "1d6 / 2"])
+    def test_unsupported(self, expression: str):
+        assert dense_distribution(clean_expression(expression), Advantage.NORMAL) is None
+
+    def test_large_expression(self):
+        """Large sums are calculated through the dense engine, instead of being rejected as too expensive."""
+        dist = dice_distribution("100d100 + 40d6")
+
+        assert dist.min() == 140 and dist.max() == 10240
+        assert dist.mean() == approx(100 * 50.5 + 40 * 3.5)
+        assert dist.stdev() == approx(math.sqrt(100 * (100**2 - 1) / 12 + 40 * 35 / 12))
+
+    def test_percentile(self):
+        dist = DenseDistribution.die(10)
+
+        assert dist.percentile(10) == 1
+        assert dist.percentile(50) == 5
+        assert dist.percentile(100) == 10
+
+    def test_mixture(self):
+        dist = DenseDistribution.mixture([(0.25, DenseDistribution.constant(0)), (0.75, DenseDistribution.die(4))])
+
+        assert dist.get(0) == approx(0.25)
+        assert dist.get(4) == approx(0.75 / 4)
+        assert dist.mean() == approx(0.75 * 2.5)
+
+    def test_to_dense_rounds_down(self):
+        """Halved results aren't always whole numbers, those are rounded down like halved damage is."""
+        parsed, _ = parse("(1d6)/2", Advantage.NORMAL)
+        dist = to_dense(d100.distribution(parsed))
+
+        assert dist.keys() == [0, 1, 2, 3]
+        assert dist.get(1) == approx(2 / 6)
+        assert dist.get(3) == approx(1 / 6)
+
+
+class TestSimulatedDistribution:
+    @pytest.mark.parametrize("expression", ["2d6 + 3", "4d6kh3", "1d20 - 2d8"])
+    @pytest.mark.parametrize("advantage", [Advantage.NORMAL, Advantage.ADVANTAGE, Advantage.SAVAGE_ATTACKER])
+    def test_matches_exact(self, expression: str, advantage: Advantage):
+        exact = dense_distribution(clean_expression(expression), advantage)
+        simulated = simulate_distribution(expression, advantage)
+        assert exact is not None
+
+        assert simulated.min() >= exact.min() and simulated.max() <= exact.max()
+        assert abs(simulated.mean() - exact.mean()) < 5 * simulated.mean_margin()
+        for key in range(exact.min(), exact.max() + 1):
+            assert abs(simulated.get(key) - exact.get(key)) < 0.005, f"Odds of {key} should be close to the exact odds."
+
+    def test_rolled_through_d100(self):
+        """Expressions which can't be rolled with numpy are rolled through d100 instead."""
+        simulated = simulate_distribution("1d6e6", time_budget=0.1)
+
+        assert simulated.samples > 0
+        assert simulated.min() >= 1
+        assert simulated.mean() == approx(4.2, eps=0.5)
+
+    def test_rounds_down_like_exact(self):
+        """Simulated results which aren't whole numbers are rounded down, the same as the exact distribution."""
+        exact = to_dense(dice_distribution("1d6/2"))
+        simulated = simulate_distribution("1d6/2", time_budget=0.2)
+
+        assert simulated.keys() == exact.keys() == [0, 1, 2, 3]
+        for key in exact.keys():
+            assert simulated.get(key) == approx(exact.get(key), eps=0.05)
+
+    def test_bounds(self):
+        simulated = SimulatedDistribution(np.array([1, 2, 2, 3] * 250))
+        lower, upper = simulated.bounds(simulated.get(2))
+
+        assert simulated.samples == 1000
+        assert lower < 0.5 < upper
+        assert simulated.bounds(0.0)[1] > 0, "Results that weren't rolled can still have a small chance."
+
+    def test_approximate_result(self):
+        result = distribution("2d6, 4d6kh3", Advantage.NORMAL, 0xFF0000, min_to_beat=7, simulate=True)
+
+        assert result.approximate
+        for dist in result.distributions:
+            bounds = dist.min_to_beat_bounds
+            assert bounds is not None
+            assert bounds[0] <= dist.min_to_beat_odds <= bounds[1]
+
+    def test_exact_result(self):
+        result = distribution("2d6", Advantage.NORMAL, 0xFF0000, min_to_beat=7)
+
+        assert not result.approximate
+        assert result.distributions[0].min_to_beat_bounds is None
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+
+from logic.distributioncache import DistributionDiskCache
+
+
+class TestDistributionDiskCache:
+    def test_store_and_load(self, tmp_path: str):
+        cache = DistributionDiskCache(str(tmp_path), version="v1-d100-test")
+        probabilities = np.full(6, 1 / 6)
+
+        assert cache.load("1d6", "normal") is None
+        cache.store("1d6", "normal", probabilities, 1)
+
+        stored = cache.load("1d6", "normal")
+        assert stored is not None
+        assert np.array_equal(stored[0], probabilities)
+        assert stored[1] == 1
+        assert cache.load("1d6", "advantage") is None, "Advantage is part of the key."
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_shared_between_instances(self, tmp_path: str):
+        """Distributions should survive restarts, and be shared by all processes using the same directory."""
+        DistributionDiskCache(str(tmp_path), version="v1-d100-test").store("1d4", "normal", np.full(4, 0.25), 1)
+
+        assert DistributionDiskCache(str(tmp_path), version="v1-d100-test").load("1d4", "normal") is not None
+        assert DistributionDiskCache(str(tmp_path), version="v1-d100-other").load("1d4", "normal") is None
+
+    def test_disabled(self):
+        cache = DistributionDiskCache("")
+        cache.store("1d6", "normal", np.full(6, 1 / 6), 1)
+
+        assert not cache.enabled
+        assert cache.load("1d6", "normal") is None
+
+    def test_eviction(self, tmp_path: str):
+        cache = DistributionDiskCache(str(tmp_path), max_size=20_000, version="v1-d100-test")
+        rng = np.random.default_rng(0)
+        for size in range(1, 41):
+            cache.store(f"1d{size}", "normal", rng.random(100), 1)
+            os.utime(cache._path(f"1d{size}", "normal"), (size, size))  # type: ignore
+
+        assert cache.size() <= cache.max_size
+        assert cache.load("1d40", "normal") is not None, "Recently used entries should be kept."
+        assert cache.load("1d1", "normal") is None, "The least recently used entries should be evicted."
+
+    def test_remove_stale_versions(self, tmp_path: str):
+        DistributionDiskCache(str(tmp_path), version="v1-d100-old").store("1d6", "normal", np.full(6, 1 / 6), 1)
+        os.makedirs(os.path.join(tmp_path, "unrelated"))
+        cache = DistributionDiskCache(str(tmp_path), version="v1-d100-new")
+
+        assert cache.remove_stale_versions() == 1
+        assert not os.path.exists(os.path.join(tmp_path, "v1-d100-old"))
+        assert os.path.exists(os.path.join(tmp_path, "unrelated")), "Only cached distributions should be removed."
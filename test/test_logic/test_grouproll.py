@@ -52,3 +52,17 @@ class TestGroupRoll:
             group_roll = GroupRollRoll(itr, None, "0", advantage)
             for roll in group_roll.roll.result.rolls:
                 assert 1 <= roll.total <= 20, f"GroupRoll d20 roll should be value between 1 or 20, was {roll}"
+
+    @pytest.mark.parametrize("mod, expected", [("5", "1d20 + (5)"), ("1d20+5", "1d20+5"), ("1d4+2", "1d20 + (1d4+2)")])
+    def test_expression(self, mod: str, expected: str):
+        assert GroupRollRoll.expression(mod) == expected
+
+    def test_batch(self):
+        itr = MockInteraction()
+        group_rolls = GroupRollRoll.batch(itr, "Goblin", "2", Advantage.ADVANTAGE, 25)
+
+        assert len(group_rolls) == 25, "Batch should create a GroupRoll per creature."
+        assert len({id(group_roll.roll) for group_roll in group_rolls}) == 25, "Every creature should have its own roll."
+        for group_roll in group_rolls:
+            assert len(group_roll.roll.result.rolls) == 2, "Batched rolls should keep their advantage."
+            assert 3 <= group_roll.total <= 22
@@ -10,6 +10,7 @@ from commands.homebrew import (
 )
 from logic.dnd.abstract import DNDEntryType
 from logic.homebrew import HOMEBREW_PATH, GlobalHomebrewData
+from logic.storage import Storage
 
 
 class TestHomebrew:
@@ -23,6 +24,7 @@ class TestHomebrew:
 
         yield
 
+        Storage.wait()  # Saves are written in the background
         if os.path.exists(file_path):
             os.remove(file_path)
 
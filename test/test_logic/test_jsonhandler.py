@@ -2,11 +2,20 @@ import copy
 import dataclasses
 import json
 import os
+import threading
 from typing import Any
 
+import discord
 import pytest
+from mocking import MockInteraction, MockUser
 
-from logic.jsonhandler import JsonHandler
+from logic.jsonhandler import (
+    JsonFolderHandler,
+    JsonHandler,
+    PendingWrites,
+    WriteBehindQueue,
+)
+from logic.storage import Storage
 
 
 @dataclasses.dataclass
@@ -40,6 +49,20 @@ class UnimplementedComplexJsonHandler(JsonHandler[ComplexClass]):
         super().__init__("test3")
 
 
+class UserJsonHandler(JsonHandler[list[str]]):
+    """A simple per-user JsonHandler, meant to test JsonFolderHandler."""
+
+    def __init__(self, user_id: str):
+        super().__init__(user_id, "test_users")
+
+
+class UserJsonFolderHandler(JsonFolderHandler[UserJsonHandler]):
+    _handler_type = UserJsonHandler
+
+    def _itr_key(self, itr: discord.Interaction) -> int:
+        return itr.user.id
+
+
 class TestJsonHandler:
     @pytest.fixture
     def handler(self) -> SimpleJsonHandler:
@@ -99,6 +122,37 @@ class TestJsonHandler:
         assert "spells" in handler.data, "Saved data should still exist."
         assert "skills" not in handler.data, "Loading without saving should not maintain contents."
 
+    async def test_save_async(self, handler: SimpleJsonHandler) -> None:
+        handler.data["spells"] = ["Fire Bolt"]
+        await handler.save_async()
+
+        new_handler = SimpleJsonHandler()
+        assert new_handler.data["spells"] == ["Fire Bolt"], "Data saved asynchronously should be loaded."
+
+    def test_save_does_not_wait_for_write(self, handler: SimpleJsonHandler, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Saving queues the write on the storage thread, so the event loop isn't blocked while it's written."""
+        release = threading.Event()
+        write = Storage.backend.write
+
+        def slow_write(*args: Any) -> None:
+            release.wait(timeout=5)
+            write(*args)
+
+        monkeypatch.setattr(Storage.backend, "write", slow_write)
+        handler.data["spells"] = ["Fire Bolt"]
+        handler.save()
+
+        assert not release.is_set(), "Saving should return before the data is written."
+        release.set()
+        assert SimpleJsonHandler().data["spells"] == ["Fire Bolt"], "Loading should wait for the queued write."
+
+    def test_save_does_not_leave_temp_files(self, handler: SimpleJsonHandler) -> None:
+        handler.data["spells"] = ["Fire Bolt"]
+        handler.save()
+
+        directory = os.path.dirname(handler.file_path)
+        assert not any(name.endswith(".tmp") for name in os.listdir(directory)), "Atomic saves should clean up temp files."
+
     def test_complex_json_handler(self, complex: ComplexJsonHandler) -> None:
         complex.data["1"] = ComplexClass(1, "2", 3.0)
         complex.save()
@@ -128,6 +182,7 @@ class TestJsonHandler:
             assert False, "save() may not cause RuntimeError if there is no data-mismatch."
 
         # File's data must be a mismatch from what we expect in deserialize.
+        Storage.wait()
         with open(complex.file_path, "r", encoding="utf-8") as file:
             data: dict[str, Any] = json.load(file)
             data[key] = {"spell": "Fire Bolt"}
@@ -138,3 +193,115 @@ class TestJsonHandler:
         with pytest.raises(RuntimeError):
             complex.save()
         os.remove(complex.file_path)  # Prevent unintended fails, when ComplexJsonHandler is loaded in the future.
+
+
+class TestWriteBehind:
+    @pytest.fixture
+    def handler(self, monkeypatch: pytest.MonkeyPatch) -> SimpleJsonHandler:
+        handler = SimpleJsonHandler()
+        handler.data.clear()
+        handler.write()
+        monkeypatch.setattr(PendingWrites, "interval", 5.0)
+        return handler
+
+    def test_save_is_deferred(self, handler: SimpleJsonHandler) -> None:
+        handler.data["spells"] = ["Fire Bolt"]
+        handler.save()
+        handler.data["spells"].append("Chain Lightning")
+        handler.save()
+
+        assert PendingWrites.is_dirty(handler), "Saving with write-behind should mark the handler as dirty."
+        assert "spells" not in SimpleJsonHandler().data, "Data should not be written before a flush."
+
+        assert PendingWrites.flush() == 1, "Multiple saves should be coalesced into a single write."
+        assert SimpleJsonHandler().data["spells"] == ["Fire Bolt", "Chain Lightning"]
+
+    def test_flush_without_changes(self, handler: SimpleJsonHandler) -> None:
+        handler.flush()
+        assert not PendingWrites.is_dirty(handler), "Flushing a clean handler should not mark it as dirty."
+
+    async def test_failed_writes_are_retried(self, handler: SimpleJsonHandler, monkeypatch: pytest.MonkeyPatch) -> None:
+        async def fail():
+            raise OSError("Disk is full")
+
+        monkeypatch.setattr(handler, "write_async", fail)
+        queue = WriteBehindQueue(5.0)
+        queue.mark_dirty(handler)
+
+        assert await queue.flush_async() == 1
+        assert queue.is_dirty(handler), "Failed writes should be retried by the queue that flushed them."
+        assert not PendingWrites.is_dirty(handler), "Failed writes should not end up in another queue."
+
+    def test_eviction_flushes(self, handler: SimpleJsonHandler) -> None:
+        itr = MockInteraction()
+        folder = UserJsonFolderHandler()
+        user_handler = folder.get(itr)
+        user_handler.data["spells"] = ["Fire Bolt"]
+        user_handler.save()
+
+        folder.clear_cache(max_age=-1)
+
+        assert not PendingWrites.is_dirty(user_handler), "Evicted handlers should be flushed."
+        assert UserJsonHandler(str(itr.user.id)).data["spells"] == ["Fire Bolt"]
+
+
+class TestJsonFolderHandlerCache:
+    @pytest.fixture
+    def interactions(self) -> list[MockInteraction]:
+        return [MockInteraction(user=MockUser(f"cache_user_{i}")) for i in range(3)]
+
+    def test_lru_eviction(self, interactions: list[MockInteraction]) -> None:
+        folder = UserJsonFolderHandler(max_entries=2)
+        first, second, third = interactions
+
+        folder.get(first)
+        folder.get(second)
+        folder.get(first)  # Touch, so the second user becomes the least recently used
+        folder.get(third)
+
+        assert len(folder) == 2, "Cache should not exceed its maximum amount of entries."
+        assert folder.keys == {first.user.id, third.user.id}, "Least recently used handler should be evicted."
+        assert (folder.stats.hits, folder.stats.misses, folder.stats.evictions) == (1, 3, 1)
+
+    def test_byte_budget(self, interactions: list[MockInteraction]) -> None:
+        folder = UserJsonFolderHandler(max_bytes=1)
+
+        for itr in interactions:
+            folder.get(itr)
+
+        assert len(folder) == 1, "Only the most recently used handler should be kept when over budget."
+        assert folder.keys == {interactions[-1].user.id}
+        assert folder.stats.evictions == 2
+
+    def test_evicted_handler_is_reloaded(self, interactions: list[MockInteraction]) -> None:
+        folder = UserJsonFolderHandler(max_entries=1)
+        first, second, _ = interactions
+
+        handler = folder.get(first)
+        handler.data["spells"] = ["Fire Bolt"]
+        handler.save()
+        folder.get(second)
+
+        reloaded = folder.get(first)
+        assert reloaded is not handler, "Evicted handlers should be loaded again."
+        assert reloaded.data["spells"] == ["Fire Bolt"], "Evicted handlers should not lose their data."
+
+    def test_size_is_measured_on_save(self, interactions: list[MockInteraction], monkeypatch: pytest.MonkeyPatch) -> None:
+        folder = UserJsonFolderHandler(max_bytes=1 << 20)
+        handler = folder.get(interactions[0])
+        measured = handler.approximate_size()
+
+        handler.data["spells"] = ["Fire Bolt"] * 100
+        handler.save()
+        assert folder.size == handler.approximate_size() > measured, "Saving should update the handler's size."
+
+        calls = 0
+
+        def counting_size(self: UserJsonHandler) -> int:
+            nonlocal calls
+            calls += 1
+            return 0
+
+        monkeypatch.setattr(UserJsonHandler, "approximate_size", counting_size)
+        folder.clear_cache()
+        assert calls == 0, "Cleaning the cache should not measure every handler again."
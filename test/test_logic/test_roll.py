@@ -1,9 +1,28 @@
 import math
+import re
+from typing import Any
 
 import pytest
 from d100.enums import Critical
 
-from logic.roll import Advantage, roll
+from logic.roll import (
+    Advantage,
+    DiceRNG,
+    FastRollResult,
+    RollMetadata,
+    SimpleExpression,
+    SumTerm,
+    clean_expression,
+    dice_rng,
+    expression_cost,
+    has_d20,
+    multi_roll,
+    parse,
+    roll,
+    roll_batch,
+    sum_terms,
+    tokenize_expression,
+)
 
 
 class TestDiceExpression:
@@ -138,3 +157,253 @@ class TestDiceExpression:
     def test_has_comparison_result(self, expected: bool, expr: str):
         result = roll(expr).result.roll.is_comparison
         assert result == expected, f"expression '{expr}' expected {expected} but got {result}"
+
+
+class TestParseCache:
+    def test_parsed_ast_is_not_shared(self):
+        first, _ = parse("1d20+5", Advantage.ADVANTAGE)
+        second, _ = parse("1d20+5", Advantage.ADVANTAGE)
+
+        assert first is not second, "Every parse should return its own copy of the cached AST."
+        assert str(first) == str(second)
+
+    def test_cached_rolls_are_independent(self):
+        results = [roll("1d20", Advantage.ADVANTAGE) for _ in range(50)]
+
+        assert all(len(result.result.rolls) == 2 for result in results), "Cached advantage should not be applied twice."
+        assert len({result.total for result in results}) > 1, "Cached expressions should still be rolled every time."
+
+    def test_warnings_do_not_accumulate(self):
+        results = [roll("120 + 5") for _ in range(3)]
+        assert all(len(result.result.warnings) == 1 for result in results), "Warnings should not be shared between rolls."
+
+    def test_clean_expression(self):
+        assert clean_expression("1d20   +5") == str(parse("1d20   +5", Advantage.NORMAL)[0])
+
+    @pytest.mark.parametrize("expected, expr", [(True, "1d20+5"), (True, "1d20mi10+5"), (False, "5"), (False, "2d6+3")])
+    def test_has_d20(self, expected: bool, expr: str):
+        assert has_d20(expr) == expected
+
+
+class TestRollBatch:
+    def test_roll_batch(self):
+        results = roll_batch("4d6kh3", 50, Advantage.NORMAL)
+
+        assert len(results) == 50
+        assert all(result.expression == clean_expression("4d6kh3") for result in results)
+        assert all(3 <= result.total <= 18 for result in results)
+        assert len({result.total for result in results}) > 1, "Batched rolls should be independent."
+
+    def test_roll_batch_warnings(self):
+        results = roll_batch("1d6", 3, Advantage.ADVANTAGE)
+        assert all(len(result.result.warnings) == 1 for result in results), "Each roll should carry the parse warning once."
+
+    def test_multi_roll_invalid(self):
+        with pytest.raises(SyntaxError):
+            multi_roll("1d20+(4", 3, Advantage.NORMAL)
+
+    @pytest.mark.parametrize("expression", ["1d1e1", "2000d6"])
+    def test_too_many_rolls(self, expression: str):
+        with pytest.raises(TimeoutError):
+            roll(expression)
+        with pytest.raises(TimeoutError):
+            multi_roll(expression, 3, Advantage.NORMAL)
+
+    def test_likely_too_many_rolls(self):
+        """Only expressions certain to exceed the roll limit are rejected, these take around 500 rolls."""
+        result = roll("25d20rr<20")
+        assert result.result.roll.total == 25 * 20, "Every die is rerolled until it rolls a 20."
+
+    def test_expression_cost_advantage(self):
+        normal = expression_cost("1d20+5", Advantage.NORMAL)
+        elven = expression_cost("1d20+5", Advantage.ELVEN_ACCURACY)
+
+        assert normal is not None and elven is not None
+        assert elven.rolls == 3 * normal.rolls, "Elven accuracy rolls the d20 three times."
+
+    def test_advantage_cost_only_repeats_d20(self):
+        normal = expression_cost("500d6+1d20", Advantage.NORMAL)
+        advantage = expression_cost("500d6+1d20", Advantage.ADVANTAGE)
+        savage = expression_cost("500d6+1d20", Advantage.SAVAGE_ATTACKER)
+
+        assert normal is not None and advantage is not None and savage is not None
+        assert advantage.rolls == normal.rolls + 1, "Advantage should only roll the d20 again."
+        assert not advantage.too_many_rolls
+        assert savage.rolls == 2 * normal.rolls, "Savage attacker rolls the entire expression twice."
+
+
+class TestExpressionTokens:
+    def test_tokens(self):
+        tokens = tokenize_expression("(1d4, 2d6)kh1 [fire] >= 2")
+        assert tokens is not None
+        assert [token.kind for token in tokens] == [
+            "operator",
+            "dice",
+            "operator",
+            "dice",
+            "operator",
+            "set_operations",
+            "annotation",
+            "operator",
+            "number",
+        ]
+
+    @pytest.mark.parametrize("cleaned", ["1d10red", "1d6kx1"])
+    def test_unknown_tokens(self, cleaned: str):
+        assert tokenize_expression(cleaned) is None
+
+    def test_sum_terms(self):
+        terms = sum_terms("2d6 - 3 * 1d20kh1 + 4 * 2")
+        assert terms is not None
+        assert [(term.sign, term.factor, term.dice and term.dice.text, term.constant) for term in terms] == [
+            (1, 1, "2d6", 0),
+            (-1, 3, "1d20kh1", 0),
+            (1, 1, None, 8),
+        ]
+        assert sum_terms("5") == (SumTerm(1, 1, constant=5),)
+
+    @pytest.mark.parametrize("cleaned", ["2d6 [fire] + 1d4", "(1d6)/2", "1d6 * 1d4", "1d20 >= 15", "2d6 + 1.5", "1d20 +"])
+    def test_not_a_sum(self, cleaned: str):
+        assert sum_terms(cleaned) is None
+
+
+class TestMultiRollFastPath:
+    @pytest.mark.parametrize(
+        "cleaned, expected",
+        [
+            ("1d20 + 5", SimpleExpression(1, 20, "+", 5)),
+            ("2d6 - 3", SimpleExpression(2, 6, "-", 3)),
+            ("8d6", SimpleExpression(8, 6, "+", 0)),
+            ("2d20 + 1", None),  # Multiple d20s use d100
+            ("4d6kh3", None),
+            ("1d20 + 1d4", None),
+        ],
+    )
+    def test_simple_expression(self, cleaned: str, expected: SimpleExpression | None):
+        assert SimpleExpression.from_cleaned(cleaned) == expected
+
+    @pytest.mark.parametrize("expression", ["1d20+5", "2d6-3", "8d6"])
+    def test_uses_fast_path(self, expression: str):
+        result = multi_roll(expression, 8, Advantage.NORMAL)
+        assert all(isinstance(roll, FastRollResult) for roll in result.rolls)
+        assert len(result.rolls) == 8
+
+    def test_fallback(self):
+        result = multi_roll("4d6kh3", 8, Advantage.NORMAL)
+        assert not any(isinstance(roll, FastRollResult) for roll in result.rolls), "Complex expressions should use d100."
+
+    def test_format_matches_d100(self):
+        fast = multi_roll("2d6+3", 1, Advantage.NORMAL).rolls[0]
+        slow = roll("2d6+3").result.roll
+
+        assert re.fullmatch(r"\[\d,\d\] \+ 3", fast.expr), f"Unexpected format '{fast.expr}'"
+        assert re.sub(r"\d", "0", fast.expr) == re.sub(r"\d", "0", slow.expr), "Fast rolls should look like d100 rolls."
+
+    @pytest.mark.parametrize(
+        "advantage, columns, comparison",
+        [
+            (Advantage.NORMAL, 1, None),
+            (Advantage.ADVANTAGE, 2, max),
+            (Advantage.DISADVANTAGE, 2, min),
+            (Advantage.ELVEN_ACCURACY, 3, max),
+        ],
+    )
+    def test_advantage(self, advantage: Advantage, columns: int, comparison: Any):
+        result = multi_roll("1d20+5", 32, advantage)
+
+        all_losing_columns = [result.rolls_lose_1, result.rolls_lose_2]
+        losing_columns = all_losing_columns[: columns - 1]
+        assert all(len(column) == 32 for column in losing_columns), "Every extra roll should have a losing column."
+        assert all(len(column) == 0 for column in all_losing_columns[columns - 1 :]), "Unused columns should be empty."
+        if comparison is not None:
+            for i, winner in enumerate(result.rolls):
+                totals = [winner.total, *(column[i].total for column in losing_columns)]
+                assert winner.total == comparison(totals), "Winning roll should be picked based on advantage."
+
+    def test_crits(self):
+        rolls = multi_roll("1d20", 1000, Advantage.NORMAL).rolls
+        for result in rolls:
+            if result.total == 20:
+                assert result.crit == Critical.CRIT
+            elif result.total == 1:
+                assert result.crit == Critical.FAIL
+
+    def test_distribution(self):
+        """The fast path should follow the same distribution as rolling through d100."""
+        totals = [result.total for result in multi_roll("2d6+3", 20_000, Advantage.NORMAL).rolls]
+        mean = sum(totals) / len(totals)
+
+        assert min(totals) == 5 and max(totals) == 15
+        assert math.isclose(mean, 10, abs_tol=0.1), f"Mean of 2d6+3 should be 10, got {mean}."
+
+
+class TestDiceRNG:
+    def test_bounds(self):
+        rng = DiceRNG(buffer_size=16)
+        values = [rng.roll(6) for _ in range(100)] + rng.roll_many(6, 100)
+
+        assert min(values) == 1 and max(values) == 6
+
+    @pytest.mark.parametrize("count", [3, 10, 40])
+    def test_seeded(self, count: int):
+        """Seeded generators should roll the same values, also when rolls span multiple buffers."""
+        a, b = DiceRNG(seed=42, buffer_size=16), DiceRNG(seed=42, buffer_size=16)
+
+        rolls_a = [a.roll(20) for _ in range(10)] + a.roll_many(20, count) + a.roll_many(8, count)
+        rolls_b = [b.roll(20) for _ in range(10)] + b.roll_many(20, count) + b.roll_many(8, count)
+        assert rolls_a == rolls_b
+        assert len(rolls_a) == 10 + 2 * count
+
+    def test_reseed(self):
+        rng = DiceRNG(seed=7)
+        first = rng.roll_many(100, 10)
+        rng.seed(7)
+
+        assert rng.roll_many(100, 10) == first, "Reseeding should discard buffered values."
+
+    def test_array_uses_buffers(self):
+        a, b = DiceRNG(seed=3, buffer_size=16), DiceRNG(seed=3, buffer_size=16)
+        a.roll(6)
+        b.roll(6)
+
+        assert a.array(6, (2, 3)).flatten().tolist() == b.roll_many(6, 6), "Small arrays should come from the buffers."
+        assert a.roll(6) == b.roll(6)
+
+    def test_multi_roll_replay(self):
+        dice_rng.seed(1234)
+        first = [result.total for result in multi_roll("2d6+3", 20, Advantage.NORMAL).rolls]
+        dice_rng.seed(1234)
+        second = [result.total for result in multi_roll("2d6+3", 20, Advantage.NORMAL).rolls]
+        dice_rng.seed()
+
+        assert first == second, "Fast path rolls should be replayable with a seed."
+
+
+class TestRollMetadata:
+    @pytest.mark.parametrize(
+        "metadata",
+        [
+            RollMetadata("1d20 + 5", Advantage.NORMAL),
+            RollMetadata("4d6kh3", Advantage.ELVEN_ACCURACY, amount=6, reason="Stats"),
+            RollMetadata("1d8 + 2d6", Advantage.SAVAGE_ATTACKER, reason='🔥 Fire: "hot"'),
+        ],
+    )
+    def test_encode_decode(self, metadata: RollMetadata):
+        token = metadata.encode()
+
+        assert token.startswith(RollMetadata.PREFIX)
+        assert RollMetadata.decode(token) == metadata
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            None,
+            "",
+            "https://example.com/",
+            RollMetadata.PREFIX,
+            f"{RollMetadata.PREFIX}not-base64!",
+            f"{RollMetadata.PREFIX}WzFd",
+        ],
+    )
+    def test_decode_invalid(self, text: str | None):
+        assert RollMetadata.decode(text) is None, "Invalid metadata should fall back to parsing the embed."
@@ -0,0 +1,150 @@
+import os
+
+import pytest
+
+from logic.storage import (
+    JsonFileBackend,
+    SerializationFormat,
+    SqliteBackend,
+    StorageBackend,
+    decode,
+    encode,
+    migrate,
+)
+
+
+class TestStorageBackends:
+    @pytest.fixture(params=["json", "json_sharded", "sqlite"])
+    def backend(self, request: pytest.FixtureRequest, tmp_path: str) -> StorageBackend:
+        if request.param == "json":
+            return JsonFileBackend(base_dir=str(tmp_path))
+        if request.param == "json_sharded":
+            return JsonFileBackend(base_dir=str(tmp_path), sharded=True)
+        return SqliteBackend(db_path=os.path.join(tmp_path, "storage.db"))
+
+    def test_write_read(self, backend: StorageBackend):
+        data = {"spells": ["Fire Bolt", "Chain Lightning"]}
+        backend.write("user_favorites", "123", data)
+
+        assert backend.read("user_favorites", "123") == data, "Read data should match written data."
+        assert backend.read("user_favorites", "456") is None, "Unknown keys should return None."
+        assert backend.read("unknown_family", "123") is None, "Unknown families should return None."
+
+    def test_overwrite(self, backend: StorageBackend):
+        backend.write("config", "1", {"a": 1})
+        backend.write("config", "1", {"b": 2})
+
+        assert backend.read("config", "1") == {"b": 2}, "Writing should overwrite the previous document."
+
+    def test_root_family(self, backend: StorageBackend):
+        backend.write("", "user_colors", {"123": 255})
+
+        assert backend.read("", "user_colors") == {"123": 255}
+        assert "" in backend.families(), "Root family should be listed."
+
+    def test_keys_and_delete(self, backend: StorageBackend):
+        backend.write("user_cache", "1", {})
+        backend.write("user_cache", "2", {})
+        assert set(backend.keys("user_cache")) == {"1", "2"}
+
+        backend.delete("user_cache", "1")
+        backend.delete("user_cache", "3")  # Deleting unknown keys should not raise
+        assert set(backend.keys("user_cache")) == {"2"}
+
+    @pytest.mark.parametrize("fmt", list(SerializationFormat))
+    def test_formats(self, backend: StorageBackend, fmt: SerializationFormat):
+        data = {"dice": {"rolls": ["1d20+5", "4d6kh3"], "trie": {"1d20": 3}}}
+        backend.write("user_cache", "1", data, fmt)
+
+        assert backend.read_document("user_cache", "1") == (data, fmt), "Stored format should be detected on read."
+
+    def test_change_format(self, backend: StorageBackend):
+        backend.write("user_cache", "1", {"a": 1}, SerializationFormat.JSON)
+        backend.write("user_cache", "1", {"b": 2}, SerializationFormat.MSGPACK)
+
+        assert backend.read_document("user_cache", "1") == ({"b": 2}, SerializationFormat.MSGPACK)
+        assert list(backend.keys("user_cache")) == ["1"], "Changing formats should not leave the old document behind."
+
+    def test_change_log(self, backend: StorageBackend):
+        backend.write("user_cache", "1", {"rolls": []})
+        backend.append("user_cache", "1", ["roll", "1d20"])
+        backend.append("user_cache", "1", ["roll", "2d6"])
+
+        assert backend.read_log("user_cache", "1") == [["roll", "1d20"], ["roll", "2d6"]], "Records should be read in order."
+        assert backend.read_log("user_cache", "2") == [], "Documents without records should have an empty log."
+        assert set(backend.keys("user_cache")) == {"1"}, "Change logs should not be listed as documents."
+
+        backend.compact("user_cache", "1", {"rolls": ["1d20", "2d6"]})
+        assert backend.read_log("user_cache", "1") == [], "Compacting should clear the log."
+        assert backend.read("user_cache", "1") == {"rolls": ["1d20", "2d6"]}
+
+    def test_delete_clears_log(self, backend: StorageBackend):
+        backend.write("user_cache", "1", {})
+        backend.append("user_cache", "1", ["roll", "1d20"])
+        backend.delete("user_cache", "1")
+
+        assert backend.read_log("user_cache", "1") == []
+
+
+class TestSerialization:
+    @pytest.mark.parametrize("fmt", list(SerializationFormat))
+    def test_encode_decode(self, fmt: SerializationFormat):
+        data = {"123": 255, "spells": ["Fire Bolt"], "nested": {"a": [1, 2, 3]}, "empty": {}}
+        assert decode(encode(data, fmt)) == (data, fmt)
+
+    def test_minified_is_smaller(self):
+        data = {"spells": ["Fire Bolt", "Chain Lightning"], "items": ["Bow", "Arrow"]}
+        pretty = encode(data, SerializationFormat.JSON_PRETTY)
+        minified = encode(data, SerializationFormat.JSON)
+        binary = encode(data, SerializationFormat.MSGPACK)
+
+        assert len(minified) < len(pretty), "Minified JSON should be smaller than indented JSON."
+        assert len(binary) < len(minified), "Msgpack should be smaller than minified JSON."
+
+
+class TestFileLayout:
+    def test_sharded_path(self, tmp_path: str):
+        backend = JsonFileBackend(base_dir=str(tmp_path), sharded=True)
+
+        path = os.path.relpath(backend.file_path("user_cache", "123"), tmp_path)
+        assert len(path.split(os.sep)) == 4, "Sharded documents should be stored two directories deep."
+        assert backend.file_path("", "user_colors") == os.path.join(tmp_path, "user_colors.json"), "Root is never sharded."
+
+    @pytest.mark.parametrize("sharded", [True, False])
+    def test_relayout(self, tmp_path: str, sharded: bool):
+        source = JsonFileBackend(base_dir=str(tmp_path), sharded=not sharded)
+        for key in range(20):
+            source.write("user_cache", str(key), {"key": key})
+        source.append("user_cache", "0", ["roll", "1d20"])
+        source.write("", "user_colors", {"123": 255})
+
+        target = JsonFileBackend(base_dir=str(tmp_path), sharded=sharded)
+        assert target.relayout() == 21, "All documents and logs of the family should be moved."
+        assert target.relayout() == 0, "Files which are already in the right place should not be moved."
+
+        assert target.read("user_cache", "7") == {"key": 7}
+        assert target.read_log("user_cache", "0") == [["roll", "1d20"]]
+        assert target.read("", "user_colors") == {"123": 255}
+        assert source.read("user_cache", "7") is None, "Documents should no longer be in the old layout."
+
+
+class TestStorageMigration:
+    def test_migrate_json_to_sqlite(self, tmp_path: str):
+        source = JsonFileBackend(base_dir=str(tmp_path))
+        source.write("", "user_colors", {"123": 255})
+        source.write("homebrew", "42", {"spell": []})
+        source.write("user_cache", "7", {"dice": {"rolls": ["1d20"]}}, SerializationFormat.MSGPACK)
+        source.append("user_cache", "7", ["roll", "2d6"])
+
+        target = SqliteBackend(db_path=os.path.join(tmp_path, "storage.db"))
+        count = migrate(source, target)
+
+        assert count == 3, "All documents should be migrated."
+        assert target.read("", "user_colors") == {"123": 255}
+        assert target.read("homebrew", "42") == {"spell": []}
+        assert target.read("user_cache", "7") == {"dice": {"rolls": ["1d20"]}}
+        assert target.read_document("user_cache", "7") == (
+            {"dice": {"rolls": ["1d20"]}},
+            SerializationFormat.MSGPACK,
+        ), "Migration should keep the document's format."
+        assert target.read_log("user_cache", "7") == [["roll", "2d6"]], "Migration should keep the change log."
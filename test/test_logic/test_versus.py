@@ -0,0 +1,37 @@
+import pytest
+from approx import approx
+
+from logic.distribution import DenseDistribution
+from logic.roll import Advantage
+from logic.versus import versus, versus_chances
+
+
+class TestVersus:
+    def test_d20_contest(self):
+        chances = versus_chances(DenseDistribution.die(20), DenseDistribution.die(20))
+
+        assert chances.tie == approx(1 / 20)
+        assert chances.win == approx(chances.loss), "Identical rolls should be equally likely to win."
+        assert chances.win + chances.tie + chances.loss == approx(1)
+
+    @pytest.mark.parametrize(
+        "expression, opponent, advantage, opponent_advantage",
+        [
+            ("1d20+7", "1d20+4", Advantage.NORMAL, Advantage.NORMAL),
+            ("1d20+2", "1d20+5", Advantage.ADVANTAGE, Advantage.DISADVANTAGE),
+            ("2d6", "1d12", Advantage.NORMAL, Advantage.NORMAL),
+            ("1d4", "1d20+30", Advantage.NORMAL, Advantage.NORMAL),
+        ],
+    )
+    def test_matches_difference(self, expression: str, opponent: str, advantage: Advantage, opponent_advantage: Advantage):
+        """The chances from the cumulative sums should match the chances from the difference distribution."""
+        result = versus(expression, opponent, advantage, opponent_advantage, 0xFF0000)
+
+        assert result.chances.win == approx(result.difference.get_at_least(1))
+        assert result.chances.tie == approx(result.difference.get(0))
+        assert result.chances.loss == approx(1 - result.difference.get_at_least(0))
+
+    def test_without_overlap(self):
+        chances = versus_chances(DenseDistribution.die(4), DenseDistribution.constant(10))
+        assert (chances.win, chances.tie) == (0, 0)
+        assert chances.loss == approx(1)
@@ -1,8 +1,14 @@
+import asyncio
+import io
+import math
+import operator
+import os
+import pickle
 import time
 
 import pytest
 
-from methods import call_with_timeout
+from methods import PicklableFile, ProcessPool, call_with_timeout
 
 
 class TestMethods:
@@ -25,3 +31,50 @@ class TestMethods:
             assert result == 33
         else:
             assert result is None
+
+
+class TestProcessPool:
+    @pytest.fixture
+    def pool(self):
+        pool = ProcessPool(workers=1, max_queued=1)
+        yield pool
+        pool.shutdown()
+
+    async def test_run(self, pool: ProcessPool):
+        assert await pool.run(5, math.factorial, 10) == 3628800
+        assert await pool.run(5, math.factorial, 5) == 120, "Workers should be reused."
+
+    async def test_exception(self, pool: ProcessPool):
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(5, operator.truediv, 1, 0)
+
+    async def test_timeout(self, pool: ProcessPool):
+        with pytest.raises(TimeoutError):
+            await pool.run(0.5, time.sleep, 5)
+        assert await pool.run(5, math.factorial, 3) == 6, "Timed out workers should be replaced."
+
+    async def test_queue_full(self, pool: ProcessPool):
+        running = [asyncio.create_task(pool.run(5, time.sleep, 0.5)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(RuntimeError):
+            await pool.run(5, time.sleep, 0.5)
+        await asyncio.gather(*running)
+
+    async def test_worker_stats(self, pool: ProcessPool):
+        pool.stats = os.getpid
+        assert pool.worker_stats() == [], "Workers only send statistics along with a result."
+
+        pid = await pool.run(5, os.getpid)
+        assert pool.worker_stats() == [pid], "Statistics should be sent without running another calculation."
+
+        with pytest.raises(TimeoutError):
+            await pool.run(0.5, time.sleep, 5)
+        assert pool.worker_stats() == [], "Statistics of terminated workers should be dropped."
+
+    def test_picklable_file(self):
+        file = PicklableFile(io.BytesIO(b"chart"), filename="chart.png")
+        copy = pickle.loads(pickle.dumps(file))
+
+        assert copy.filename == "chart.png"
+        assert copy.fp.read() == b"chart"